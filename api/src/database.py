@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
 from contextlib import contextmanager
@@ -33,10 +33,31 @@ def get_db():
     finally:
         db.close()
 
+def add_missing_columns(conn, metadata):
+    """Add model columns missing from existing tables.
+
+    create_all() never alters existing tables, so databases created before a
+    column was introduced get it added here. The API owns the schema, for the
+    bot's tables too; new columns are nullable and NULLs fall back to
+    defaults, so no backfill is needed. Idempotent.
+    """
+    inspector = inspect(conn)
+    if_not_exists = 'IF NOT EXISTS ' if conn.dialect.name == 'postgresql' else ''
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {if_not_exists}{column.name} {column_type}'))
+
 def init_db():
-    """Initialize the database."""
+    """Initialize the database, creating missing tables and columns."""
     from models import Base
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        add_missing_columns(conn, Base.metadata)
 
 def get_session():
     """Get a new database session."""
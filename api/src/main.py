@@ -17,6 +17,9 @@ class ScammerCreate(BaseModel):
     detection_reasons: dict
     profile_data: Optional[dict] = None
     avatar_hash: Optional[str] = None
+    avatar_ahash: Optional[str] = None
+    avatar_phash: Optional[str] = None
+    avatar_dhash: Optional[str] = None
 
 class ScammerResponse(BaseModel):
     discord_id: str
@@ -47,7 +50,10 @@ async def create_scammer(scammer: ScammerCreate, db: Session = Depends(get_db)):
         detection_score=scammer.detection_score,
         detection_reasons=scammer.detection_reasons,
         profile_data=scammer.profile_data,
-        avatar_hash=scammer.avatar_hash
+        avatar_hash=scammer.avatar_hash,
+        avatar_ahash=scammer.avatar_ahash,
+        avatar_phash=scammer.avatar_phash,
+        avatar_dhash=scammer.avatar_dhash
     )
     
     try:
@@ -16,7 +16,10 @@ class ScammerProfile(Base):
     
     # Profile data at time of detection
     username = Column(String)
-    avatar_hash = Column(String)  # Store hash of avatar for comparison
+    avatar_hash = Column(String)  # Discord CDN avatar key at time of detection
+    avatar_ahash = Column(String)  # Perceptual avatar hashes (64-bit hex) for cross-server matching
+    avatar_phash = Column(String)
+    avatar_dhash = Column(String)
     profile_data = Column(JSON)   # Store additional profile info (status, bio, etc.)
     
     # Detection details
@@ -54,6 +57,12 @@ class ServerConfig(Base):
     # Detection settings
     min_detection_score = Column(Float, default=0.7)
     enabled_checks = Column(JSON)  # List of enabled detection methods
+    custom_patterns = Column(JSON) # Extra suspicious phrases for this server
+    
+    # Raid mode settings
+    raid_join_threshold = Column(Integer, default=10)    # Joins within the window that start raid mode
+    raid_window_seconds = Column(Integer, default=10)
+    raid_cooldown_seconds = Column(Integer, default=120) # Quiet time before raid mode ends
     
     # Auto-moderation settings
     auto_actions = Column(JSON)    # What actions to take at what scores
@@ -105,4 +114,25 @@ class ModLog(Base):
     
     # Additional data
     duration = Column(Integer)  # For temporary actions (mutes, bans)
-    metadata = Column(JSON)    # Any additional context
\ No newline at end of file
+    metadata = Column(JSON)    # Any additional context
+
+class ScanCheckpoint(Base):
+    """Progress of a guild-wide bulk scan, so an interrupted scan can resume."""
+    __tablename__ = 'scan_checkpoints'
+
+    id = Column(Integer, primary_key=True)
+    guild_id = Column(String, unique=True, nullable=False)
+    
+    # Position and counts
+    last_member_id = Column(String)  # Members are scanned in ID order
+    scanned = Column(Integer, default=0)
+    flagged = Column(Integer, default=0)
+    total = Column(Integer)
+    
+    # Progress message
+    channel_id = Column(String)
+    message_id = Column(String)
+    
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)  # Set when the scan completed
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# database.py creates its engine at import; point it at a throwaway SQLite file
+os.environ.setdefault('DATABASE_URL', 'sqlite:///test_dsd.db')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, inspect, text
+from database import add_missing_columns
+from models import Base
+
+
+def test_missing_columns_are_added_to_existing_tables():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE server_configs (id INTEGER PRIMARY KEY, guild_id VARCHAR UNIQUE NOT NULL, "
+            "min_detection_score FLOAT)"
+        ))
+        conn.execute(text("INSERT INTO server_configs (guild_id, min_detection_score) VALUES ('1', 0.5)"))
+        add_missing_columns(conn, Base.metadata)
+        add_missing_columns(conn, Base.metadata)  # Idempotent
+
+        columns = {column['name'] for column in inspect(conn).get_columns('server_configs')}
+        assert {'custom_patterns', 'raid_join_threshold', 'raid_window_seconds', 'raid_cooldown_seconds'} <= columns
+        assert conn.execute(text("SELECT min_detection_score FROM server_configs")).scalar() == 0.5
+        # Tables that do not exist yet are left to create_all()
+        assert not inspect(conn).has_table('scammer_profiles')
@@ -0,0 +1,300 @@
+"""Detection throughput and latency benchmarks.
+
+Runs the detection hot paths over synthetic member profiles (confusable,
+leetspeak and random names; lookalike and random avatars generated
+locally) and reports ops/sec and p50/p95/p99 latency per stage. Results
+are written as JSON so runs can be compared across commits:
+
+    python bot/benchmarks/detection_benchmark.py --output before.json
+    python bot/benchmarks/detection_benchmark.py --output after.json --compare before.json
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+from utils.confusables import CONFUSABLES
+from utils.detection_engine import COST_IO, DetectionContext, DetectionEngine, ProfileSnapshot
+from utils.fingerprint import compare_fingerprints, fingerprint_image
+from utils.fingerprint_matrix import FingerprintMatrix
+from utils.hash_index import ScammerAvatarIndex
+from utils.name_index import ProtectedNameIndex
+from utils.names import CHAR_REPLACEMENTS, name_variants, normalize_unicode, score_variants
+from utils.patterns import DEFAULT_PATTERNS, PatternMatcher
+
+STAFF_NAMES = [
+    'HoboStank', 'ModAlice', 'BobTheBuilder', 'CryptoKate', 'NightOwl', 'SupportSam',
+    'AdminAndy', 'PixelPete', 'LunaMod', 'TradeHelper', 'GuardianGreg', 'ZoeZ'
+]
+
+# Character -> lookalikes, from the confusables table
+LOOKALIKES: Dict[str, List[str]] = {}
+for _lookalike, _char in CONFUSABLES.items():
+    if len(_char) == 1:
+        LOOKALIKES.setdefault(_char, []).append(_lookalike)
+
+
+def confusable_name(rng: random.Random, name: str) -> str:
+    """Swap some letters for Unicode lookalikes."""
+    return ''.join(
+        rng.choice(LOOKALIKES[c.lower()]) if c.lower() in LOOKALIKES and rng.random() < 0.5 else c
+        for c in name
+    )
+
+
+def leet_name(rng: random.Random, name: str) -> str:
+    """Apply leetspeak substitutions and decorations."""
+    leet = ''.join(
+        CHAR_REPLACEMENTS[c.lower()] if c.lower() in CHAR_REPLACEMENTS and rng.random() < 0.6 else c
+        for c in name
+    )
+    return rng.choice(['', '_', '.', 'x']) + leet + rng.choice(['', '_', '1', 'ツ', ' | support'])
+
+
+def random_name(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_letters + string.digits + '_') for _ in range(rng.randint(4, 16)))
+
+
+def random_avatar(rng: random.Random, size: int = 128) -> Image.Image:
+    """Random blocky avatar."""
+    cells = np.array([rng.randrange(256) for _ in range(8 * 8 * 3)], dtype=np.uint8).reshape(8, 8, 3)
+    return Image.fromarray(cells, 'RGB').resize((size, size), Image.NEAREST)
+
+
+def lookalike_avatar(rng: random.Random, img: Image.Image) -> Image.Image:
+    """Re-encoded copy of an avatar: slightly blurred, brightened and rescaled."""
+    copy = img.filter(ImageFilter.GaussianBlur(rng.uniform(0, 1.5)))
+    copy = ImageEnhance.Brightness(copy).enhance(rng.uniform(0.85, 1.15))
+    return copy.resize((rng.choice([64, 96, 128, 256]),) * 2)
+
+
+class Dataset:
+    """Synthetic staff and joiner profiles for one benchmark run."""
+
+    def __init__(self, seed: int, members: int):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        self.staff_avatars = [random_avatar(rng) for _ in STAFF_NAMES]
+        self.staff_fingerprints = [fingerprint_image(img) for img in self.staff_avatars]
+
+        self.names: List[str] = []
+        self.avatars: List[Image.Image] = []
+        self.profiles: List[ProfileSnapshot] = []
+        for i in range(members):
+            kind = i % 4
+            target = rng.randrange(len(STAFF_NAMES))
+            if kind == 0:
+                name = confusable_name(rng, STAFF_NAMES[target])
+            elif kind == 1:
+                name = leet_name(rng, STAFF_NAMES[target])
+            else:
+                name = random_name(rng)
+            avatar = lookalike_avatar(rng, self.staff_avatars[target]) if kind < 2 else random_avatar(rng)
+            self.names.append(name)
+            self.avatars.append(avatar)
+            self.profiles.append(ProfileSnapshot(
+                id=10_000 + i,
+                name=name,
+                nick=leet_name(rng, STAFF_NAMES[target]) if rng.random() < 0.2 else None,
+                global_name=None,
+                created_at=now - timedelta(days=rng.randint(0, 1000)),
+                avatar_key=f'avatar{i}',
+                statuses=('free nitro giveaway dm me',) if rng.random() < 0.1 else (),
+                role_names=('@everyone',)
+            ))
+        self.fingerprints = [fingerprint_image(img) for img in self.avatars]
+
+        self.protected_names = ProtectedNameIndex(enumerate(STAFF_NAMES))
+        self.protected_avatars = FingerprintMatrix(enumerate(self.staff_fingerprints))
+        self.scammer_avatars = ScammerAvatarIndex()
+        for i in range(2000):
+            self.scammer_avatars.add(str(i), fingerprint_image(random_avatar(rng, 32)))
+        self.matcher = PatternMatcher(DEFAULT_PATTERNS)
+        self.owner = ProfileSnapshot(0, STAFF_NAMES[0], None, None, now - timedelta(days=2000), 'owner',
+                                     ('Welcome to the server!',), ('@everyone', 'Owner'))
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """ops/sec over the whole run and latency percentiles in milliseconds."""
+    samples = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'iterations': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4)
+    }
+
+
+def bench(func: Callable[[int], object], iterations: int, size: int) -> Dict[str, float]:
+    """Time func(i) for i over the dataset, after a short warm-up."""
+    for i in range(min(iterations, 10)):
+        func(i % size)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        op_start = time.perf_counter()
+        func(i % size)
+        latencies.append(time.perf_counter() - op_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_async(func, iterations: int, size: int) -> Dict[str, float]:
+    for i in range(min(iterations, 10)):
+        await func(i % size)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        op_start = time.perf_counter()
+        await func(i % size)
+        latencies.append(time.perf_counter() - op_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_benchmarks(data: Dataset, iterations: int, stages: List[str] = None) -> Dict[str, Dict[str, float]]:
+    size = len(data.profiles)
+    uncached_variants = name_variants.__wrapped__
+    engine = DetectionEngine()
+
+    async def no_scammer():
+        return None
+
+    def context_for(i: int) -> DetectionContext:
+        fingerprint = data.fingerprints[i]
+
+        async def avatar_fingerprint():
+            return fingerprint
+
+        async def protected_avatars():
+            return data.protected_avatars
+
+        return DetectionContext(
+            guild_id=1,
+            protected_names=data.protected_names,
+            matcher=data.matcher,
+            owner=data.owner,
+            lookup_scammer=no_scammer,
+            avatar_fingerprint=avatar_fingerprint,
+            protected_avatars=protected_avatars,
+            scammer_avatars=data.scammer_avatars
+        )
+
+    staff_variants = [uncached_variants(name) for name in STAFF_NAMES]
+
+    def compare_usernames(i: int):
+        # Uncached, as for a name never seen before
+        variants = uncached_variants(data.names[i])
+        return [score_variants(variants, staff) for staff in staff_variants]
+
+    def compare_images(i: int):
+        j = i % len(data.staff_avatars)
+        return compare_fingerprints(fingerprint_image(data.avatars[i]), fingerprint_image(data.staff_avatars[j]))
+
+    sync_stages: Dict[str, Tuple[Callable[[int], object], int]] = {
+        'normalize_unicode': (lambda i: normalize_unicode(data.names[i]), iterations * 10),
+        'name_variants': (lambda i: uncached_variants(data.names[i]), iterations * 10),
+        'compare_usernames': (compare_usernames, iterations),
+        'protected_name_match': (lambda i: data.protected_names.match(data.names[i]), iterations),
+        'pattern_match': (lambda i: data.matcher.find(data.names[i]), iterations * 10),
+        'fingerprint_image': (lambda i: fingerprint_image(data.avatars[i]), max(iterations // 10, 1)),
+        'compare_images': (compare_images, max(iterations // 10, 1)),
+        'protected_avatar_match': (lambda i: data.protected_avatars.compare(data.fingerprints[i]), iterations),
+        'scammer_avatar_search': (lambda i: data.scammer_avatars.search(data.fingerprints[i]), iterations),
+    }
+    async_stages = {
+        # Full check over a snapshot, lookups answered from memory
+        'check_user': (lambda i: engine.evaluate(data.profiles[i], context_for(i)), iterations),
+        'check_user_quick': (lambda i: engine.evaluate(data.profiles[i], context_for(i), max_cost=COST_IO), iterations),
+    }
+
+    results = {}
+    for name, (func, count) in sync_stages.items():
+        if not stages or name in stages:
+            results[name] = bench(func, count, size)
+            print_result(name, results[name])
+
+    async def run_async():
+        for name, (func, count) in async_stages.items():
+            if not stages or name in stages:
+                results[name] = await bench_async(func, count, size)
+                print_result(name, results[name])
+
+    asyncio.run(run_async())
+    return results
+
+
+def print_result(name: str, result: Dict[str, float], baseline: Dict[str, float] = None) -> None:
+    line = (f"{name:<24} {result['ops_per_sec']:>12,.1f} ops/s   p50 {result['p50_ms']:>9.4f}ms"
+            f"   p95 {result['p95_ms']:>9.4f}ms   p99 {result['p99_ms']:>9.4f}ms")
+    if baseline:
+        change = (result['ops_per_sec'] / baseline['ops_per_sec'] - 1) * 100
+        line += f"   {change:+.1f}% ops/s"
+    print(line)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=1000, help='operations per stage (scaled per stage)')
+    parser.add_argument('--members', type=int, default=500, help='synthetic profiles to generate')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--stages', nargs='*', help='only run these stages')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file to write results to')
+    parser.add_argument('--compare', help='earlier results file to compare ops/sec against')
+    args = parser.parse_args()
+
+    print(f"Generating {args.members} synthetic profiles (seed {args.seed})...")
+    data = Dataset(args.seed, args.members)
+    results = run_benchmarks(data, args.iterations, args.stages)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'members': args.members,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for name, result in results.items():
+            if name in baseline['results']:
+                print_result(name, result, baseline['results'][name])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Regenerate the precompiled skeleton table used for name normalization.
+
+Builds the table from the Unicode confusables data (UTS #39) overlaid
+with the built-in ASCII lookalikes, and writes it to the package data
+the bot loads at startup:
+
+    curl -O https://www.unicode.org/Public/security/latest/confusables.txt
+    python bot/scripts/build_skeleton_table.py confusables.txt
+
+Rerun it when updating the confusables data or the built-in lookalikes.
+"""
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils.confusables import (SKELETON_TABLE_FILE, build_skeleton_table, combine_confusables,
+                               load_confusables, save_skeleton_table)
+
+
+def data_version(path: str) -> str:
+    """Read the version from a confusables.txt header."""
+    with open(path, encoding='utf-8-sig') as data:
+        for line in data:
+            match = re.match(r'#\s*Version:\s*(\S+)', line)
+            if match:
+                return match.group(1)
+            if not line.startswith('#'):
+                break
+    return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('confusables', help='Path to UTS #39 confusables.txt')
+    parser.add_argument('--output', default=SKELETON_TABLE_FILE, help='Table to write')
+    args = parser.parse_args()
+
+    confusables = combine_confusables(load_confusables(args.confusables))
+    table = build_skeleton_table(confusables)
+    save_skeleton_table(args.output, table, f"confusables.txt {data_version(args.confusables)}")
+    print(f"Wrote {len(table)} mappings ({len(confusables)} confusables) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,13 @@ logger = logging.getLogger('dsd_bot')
 # Load environment variables
 load_dotenv('config/.env')
 
+# These read their tunables from the environment
+from utils.db import close_db, init_db
+from utils.http import AvatarFetcher
+from utils.image_analysis import ImageAnalyzer
+from utils.metrics import MetricsServer, install_rate_limit_counter
+from utils.server_config import ServerConfigCache
+
 # Define intents
 intents = discord.Intents.default()
 intents.message_content = True  # For reading message content
@@ -32,12 +39,33 @@ class DSDBot(commands.Bot):
             'cogs.detection',    # Scammer detection logic
             'cogs.moderation',   # Moderation commands
             'cogs.appeals',      # Appeal system
+            'cogs.config',       # Server configuration commands
             'cogs.admin'         # Admin commands
         ]
+        self.avatar_fetcher = AvatarFetcher()  # Shared pooled HTTP client for avatars
+        self.image_analyzer = ImageAnalyzer()  # Process pool for avatar hashing
+        self.server_configs = ServerConfigCache()  # Server configs shared by all cogs
+        self.metrics_server = MetricsServer()  # Prometheus endpoint (METRICS_PORT=0 disables)
 
     async def setup_hook(self):
         """Setup hook that runs when the bot starts."""
         self.color = discord.Color.blue()
+        await init_db()
+        install_rate_limit_counter()
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            logger.error(f'Failed to start metrics endpoint: {e}')
+
+        # Load every guild's config in bulk once, after login but before the
+        # gateway connects, so the cache is warm before events start flowing
+        try:
+            guild_ids = [str(guild.id) async for guild in self.fetch_guilds(limit=None)]
+        except discord.HTTPException as e:
+            logger.error(f'Failed to list guilds for config preload: {e}')
+            guild_ids = []
+        await self.server_configs.preload(guild_ids)
+
         for ext in self.initial_extensions:
             try:
                 await self.load_extension(ext)
@@ -45,6 +73,14 @@ class DSDBot(commands.Bot):
             except Exception as e:
                 logger.error(f'Failed to load extension {ext}: {e}')
 
+    async def close(self):
+        """Close shared resources before shutting down."""
+        await self.metrics_server.stop()
+        await self.avatar_fetcher.close()
+        self.image_analyzer.shutdown()
+        await super().close()
+        await close_db()
+
     async def on_ready(self):
         """Event that fires when the bot is ready."""
         logger.info(f'Logged in as {self.user.name} (ID: {self.user.id})')
@@ -1,5 +1,9 @@
+from datetime import datetime, timezone
 from discord.ext import commands
+from utils.profiler import PROFILE_MAX_SECONDS, SamplingProfiler
+import asyncio
 import discord
+import io
 import logging
 
 logger = logging.getLogger('dsd_bot.admin')
@@ -7,6 +11,7 @@ logger = logging.getLogger('dsd_bot.admin')
 class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.profiling = False  # One profile at a time; the process has a single SIGPROF timer
 
     @commands.command(name='settings')
     @commands.has_permissions(administrator=True)
@@ -22,6 +27,57 @@ class Admin(commands.Cog):
         await ctx.send('Setup wizard coming soon!')
         # TODO: Implement setup wizard
 
+    @commands.command(name='profile')
+    @commands.is_owner()
+    async def profile(self, ctx, seconds: int = 30):
+        """Sample the running bot for a number of seconds and report where time goes."""
+        if self.profiling:
+            await ctx.send("⏳ A profile is already running.")
+            return
+        seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+        self.profiling = True
+        try:
+            await ctx.send(f"⏱️ Profiling for {seconds}s...")
+            profiler = SamplingProfiler()
+            try:
+                await profiler.run(seconds)
+            except RuntimeError as e:
+                await ctx.send(f"❌ Could not profile: {e}")
+                return
+            logger.info(f"Profiled for {seconds}s: {profiler.samples} samples")
+
+            # Aggregating the samples can take a moment; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            summary = await loop.run_in_executor(None, profiler.summary)
+            report = await loop.run_in_executor(None, profiler.report)
+            stats = await loop.run_in_executor(None, profiler.pstats_bytes)
+        finally:
+            self.profiling = False
+
+        def format_table(rows, unit):
+            lines = [f"`{value:5.1f}{unit}` {name[:80]}" for name, value in rows[:8]]
+            return '\n'.join(lines)[:1024] or "No samples"
+
+        embed = discord.Embed(
+            title="⏱️ Profile",
+            description=f"Wall time: {profiler.wall_time:.1f}s • "
+                        f"CPU: {100 * profiler.cpu_time / max(profiler.wall_time, 1e-9):.0f}% of one core\n"
+                        f"Event loop busy: {100 * profiler.loop_busy():.1f}% of {profiler.samples:,} samples",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Top Functions (own time)", value=format_table(summary['self'], '%'), inline=False)
+        embed.add_field(name="Top Functions (inclusive)", value=format_table(summary['total'], '%'), inline=False)
+        embed.add_field(name="Tasks Running on the Loop", value=format_table(summary['running_tasks'], '%'), inline=False)
+        embed.add_field(name="Tasks Waiting (average count)", value=format_table(summary['await_points'], ''), inline=False)
+        embed.set_footer(text="Percentages are of samples where the loop was busy • "
+                              "Open the .pstats file with python -m pstats or snakeviz")
+
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        await ctx.send(embed=embed, files=[
+            discord.File(io.BytesIO(report.encode()), filename=f"profile-{stamp}.txt"),
+            discord.File(io.BytesIO(stats), filename=f"profile-{stamp}.pstats"),
+        ])
+
 async def setup(bot):
     await bot.add_cog(Admin(bot))
     logger.info('Admin cog loaded')
\ No newline at end of file
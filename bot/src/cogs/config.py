@@ -8,15 +8,10 @@ logger = logging.getLogger('dsd_bot.config')
 class Configuration(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.configs = {}
 
     async def get_config(self, guild_id: str) -> ServerConfig:
-        """Get server configuration, using cache if available."""
-        if guild_id not in self.configs:
-            config = ServerConfig(guild_id)
-            await config.load()
-            self.configs[guild_id] = config
-        return self.configs[guild_id]
+        """Get server configuration from the bot's shared config cache."""
+        return await self.bot.server_configs.get(guild_id)
 
     @commands.group(name='config')
     @commands.has_permissions(administrator=True)
@@ -51,6 +46,15 @@ class Configuration(commands.Cog):
             inline=False
         )
         
+        # Raid mode
+        embed.add_field(
+            name="Raid Mode",
+            value=f"Starts at {config.get('raid_join_threshold')} joins within {config.get('raid_window_seconds')} seconds\n" +
+                  f"Ends after {config.get('raid_cooldown_seconds')} quiet seconds"
+                  if config.get('raid_join_threshold') else "Disabled",
+            inline=False
+        )
+        
         # Channels
         alert_channel = ctx.guild.get_channel(int(config.get('alert_channel'))) if config.get('alert_channel') else None
         log_channel = ctx.guild.get_channel(int(config.get('log_channel'))) if config.get('log_channel') else None
@@ -96,6 +100,24 @@ class Configuration(commands.Cog):
         
         await ctx.send(f"✅ {action.title()} threshold set to {threshold*100}% confidence")
 
+    @config.command(name='setraid')
+    async def set_raid(self, ctx, joins: int, seconds: int, cooldown: int = 120):
+        """Set how many joins within how many seconds start raid mode (0 joins disables it)."""
+        if joins < 0 or seconds <= 0 or cooldown <= 0:
+            await ctx.send("❌ Joins must be 0 or more, seconds and cooldown must be positive")
+            return
+        
+        config = await self.get_config(str(ctx.guild.id))
+        config.set('raid_join_threshold', joins)
+        config.set('raid_window_seconds', seconds)
+        config.set('raid_cooldown_seconds', cooldown)
+        await config.save()
+        
+        if joins:
+            await ctx.send(f"✅ Raid mode starts at {joins} joins within {seconds} seconds and ends after {cooldown} quiet seconds")
+        else:
+            await ctx.send("✅ Raid mode disabled")
+
     @config.command(name='setrole')
     async def set_role(self, ctx, role_type: str, role: discord.Role):
         """Set trusted or immune roles."""
@@ -1,244 +1,265 @@
-from discord.ext import commands
+from discord.ext import commands, tasks
 import discord
 import logging
-from Levenshtein import ratio
 import datetime
-import aiohttp
-from io import BytesIO
-from PIL import Image
-import imagehash
-import re
-import unicodedata
-from utils.db import store_scammer, log_detection, check_existing_scammer
+import asyncio
+import time
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Union
+from utils.db import (store_scammer, log_detection, check_existing_scammer, load_known_scammer_ids,
+                      load_scammer_avatar_hashes, get_scan_checkpoint, save_scan_checkpoint)
 from utils.server_config import ServerConfig
 from utils.moderation import ModerationActions
+from utils.fingerprint import AvatarFingerprint, FingerprintCache, ProtectedFingerprintCache
+from utils.hash_index import ScammerAvatarIndex
+from utils.fingerprint_matrix import FingerprintMatrix
+from utils.protected import StaffDirectory, is_staff_role
+from utils.name_index import ProtectedNameIndex
+from utils.member_index import MemberNameIndex
+from utils.patterns import PatternMatcher, PatternRegistry
+from utils.scammer_set import KnownScammerSet
+from utils.raid import DeferredChecks, JoinQueue, RaidMonitor
+from utils.verdict_cache import VerdictCache
+from utils.metrics import counter, histogram
+from utils.detection_engine import (COST_IO, STAGE_TIMEOUTS, DetectionContext, DetectionEngine, DetectionResult,
+                                    ProfileSnapshot, run_stage)
 
 logger = logging.getLogger('dsd_bot.detection')
 
+JOIN_VERDICT_SECONDS = histogram('dsd_join_verdict_seconds', 'Time from a member joining to their verdict', ['mode'])
+ALERTS = counter('dsd_alerts_total', 'Members reported as potential scammers')
+RAID_OVERFLOW = counter('dsd_raid_overflow_total', 'Raid-mode joins deferred because the join queue was full')
+
+# How often to pick up scammer profiles stored elsewhere (other shards, the API)
+SCAMMER_REFRESH_SECONDS = 60
+
+# How often, and how many per guild, postponed raid-mode checks are run after a raid
+DEFERRED_CHECK_SECONDS = 10
+DEFERRED_CHECK_BATCH = 100
+
+# Bulk scans: members per checkpoint, concurrent checks, seconds between progress edits
+SCAN_BATCH_SIZE = 100
+SCAN_CONCURRENCY = 8
+SCAN_PROGRESS_SECONDS = 5
+
+# Name matches listed when a manual scan is ambiguous
+SCAN_CANDIDATES = 5
+
+
+def profile_snapshot(member: discord.Member, before: Union[discord.Member, discord.User] = None) -> ProfileSnapshot:
+    """Snapshot a member for the detection engine.
+
+    With `before` (the member or user state from an update event), the
+    snapshot is of the profile as it was before the update.
+    """
+    profile = before or member
+    if isinstance(profile, discord.Member):
+        avatar, roles = profile.display_avatar, profile.roles
+    else:
+        # A user update leaves server avatars and roles as they are
+        avatar, roles = member.guild_avatar or profile.display_avatar, member.roles
+    return ProfileSnapshot(
+        id=member.id,
+        name=profile.name,
+        nick=getattr(profile, 'nick', member.nick),
+        global_name=profile.global_name,
+        created_at=member.created_at,
+        avatar_key=str(avatar.key) if avatar else None,
+        statuses=tuple(str(a) for a in member.activities if a.type == discord.ActivityType.custom),
+        role_names=tuple(role.name for role in roles)
+    )
+
+
+def rule_risk(result: DetectionResult, rule: str) -> int:
+    """Risk a single rule contributed to a check result."""
+    return result.parts.get(rule, ([], 0))[1]
+
+
 class Detection(commands.Cog):
     """Commands and features for detecting potential scammers."""
     
     def __init__(self, bot):
         self.bot = bot
         self.mod_actions = ModerationActions(bot)
-        self.server_configs = {}  # Cache for server configs
-        self.suspicious_patterns = [
-            "free nitro",
-            "steam gift",
-            "giveaway",
-            "claim your",
-            "discord staff",
-            "moderator application"
-        ]
-
-    async def download_avatar(self, url: str) -> Image.Image:
-        """Download and return a user's avatar."""
-        if not url:
+        self.protected_fingerprints = ProtectedFingerprintCache()  # Owner/staff avatar fingerprints
+        self.member_fingerprints = FingerprintCache()  # Recently seen member avatar fingerprints
+        self.scammer_avatars = ScammerAvatarIndex()  # Known scammer avatars by perceptual hash
+        self.protected_avatars = {}  # guild_id -> FingerprintMatrix of owner/staff avatars
+        self._protected_locks = {}
+        self.protected_names = {}  # guild_id -> ProtectedNameIndex of owner/staff names
+        self.protected_versions = {}  # guild_id -> counter bumped whenever protected identities change
+        self.staff = StaffDirectory()  # Staff member IDs per guild
+        self.patterns = PatternRegistry()  # Compiled global and per-guild suspicious phrases
+        self.known_scammers = KnownScammerSet()  # Discord IDs with a stored scammer profile
+        self.raids = RaidMonitor()  # Per-guild join rate and raid mode
+        self.join_queue = JoinQueue(self.process_join)  # Bounded workers for raid-mode joins
+        self.deferred_checks = DeferredChecks()  # Full checks postponed until a raid ends
+        self.bulk_scans = {}  # guild_id -> running scanall task
+        self.member_indexes = {}  # guild_id -> MemberNameIndex for name lookups
+        self.member_index_loads = {}  # guild_id -> task filling that guild's index
+        self.verdicts = VerdictCache()  # Recent check results by profile fingerprint
+        self.engine = DetectionEngine()  # Detection rules, run over member snapshots
+
+    async def cog_load(self):
+        """Load known scammer IDs and avatar hashes into memory."""
+        rows = await load_known_scammer_ids()
+        if rows is not None:
+            self.known_scammers.load(rows)
+        self.scammer_avatars.load(await load_scammer_avatar_hashes())
+        self.refresh_known_scammers.start()
+        self.run_deferred_checks.start()
+
+    async def cog_unload(self):
+        self.refresh_known_scammers.cancel()
+        self.run_deferred_checks.cancel()
+        await self.join_queue.stop()
+        for task in self.bulk_scans.values():
+            task.cancel()
+
+    @tasks.loop(seconds=SCAMMER_REFRESH_SECONDS)
+    async def refresh_known_scammers(self):
+        """Pick up scammer profiles stored or updated since the last refresh."""
+        if not self.known_scammers.loaded:
+            rows = await load_known_scammer_ids()
+            if rows is not None:
+                self.known_scammers.load(rows)
+            return
+        rows = await load_known_scammer_ids(since=self.known_scammers.last_updated)
+        if rows:
+            added = self.known_scammers.update(rows)
+            if added:
+                logger.info(f"Picked up {added} new known scammers")
+
+    async def lookup_scammer(self, discord_id: int) -> dict:
+        """Get a user's stored scammer profile, skipping the database for users not in the known set."""
+        if self.known_scammers.loaded and discord_id not in self.known_scammers:
             return None
-        async with aiohttp.ClientSession() as session:
-            async with session.get(str(url)) as response:
-                if response.status == 200:
-                    data = await response.read()
-                    return Image.open(BytesIO(data))
-        return None
-
-    async def compare_images(self, img1: Image.Image, img2: Image.Image) -> tuple[float, list[str]]:
-        """Compare two images using multiple methods."""
-        if not img1 or not img2:
-            return 0.0, []
-
-        reasons = []
-        max_similarity = 0.0
-        
-        # Convert images to same size and mode for comparison
-        size = (128, 128)
-        img1_resized = img1.resize(size).convert('RGB')
-        img2_resized = img2.resize(size).convert('RGB')
-        
-        # 1. Average Hash (overall similarity)
-        hash1 = imagehash.average_hash(img1_resized)
-        hash2 = imagehash.average_hash(img2_resized)
-        avg_similarity = 1 - (hash1 - hash2) / (len(hash1.hash) * len(hash1.hash))
-        
-        # 2. Perceptual Hash (resistant to minor modifications)
-        phash1 = imagehash.phash(img1_resized)
-        phash2 = imagehash.phash(img2_resized)
-        phash_similarity = 1 - (phash1 - phash2) / (len(phash1.hash) * len(phash1.hash))
-        
-        # 3. Difference Hash (edge detection based)
-        dhash1 = imagehash.dhash(img1_resized)
-        dhash2 = imagehash.dhash(img2_resized)
-        dhash_similarity = 1 - (dhash1 - dhash2) / (len(dhash1.hash) * len(dhash1.hash))
-        
-        # 4. Color analysis
-        def get_dominant_colors(img):
-            img = img.resize((50, 50))  # Reduce size for faster processing
-            colors = img.getcolors(2500)  # Get all colors
-            if colors:
-                return sorted(colors, reverse=True)[:3]  # Top 3 colors
-            return []
-            
-        colors1 = get_dominant_colors(img1_resized)
-        colors2 = get_dominant_colors(img2_resized)
-        
-        # Compare color patterns
-        color_similarity = 0
-        if colors1 and colors2:
-            matches = sum(1 for c1 in colors1 for c2 in colors2 
-                        if abs(c1[1][0] - c2[1][0]) < 30 and  # R
-                           abs(c1[1][1] - c2[1][1]) < 30 and  # G
-                           abs(c1[1][2] - c2[1][2]) < 30)     # B
-            color_similarity = matches / max(len(colors1), len(colors2))
-
-        # Analyze results
-        if avg_similarity > 0.8:
-            reasons.append("very similar overall appearance")
-            max_similarity = max(max_similarity, avg_similarity)
-            
-        if phash_similarity > 0.8:
-            reasons.append("similar after minor modifications")
-            max_similarity = max(max_similarity, phash_similarity)
-            
-        if dhash_similarity > 0.8:
-            reasons.append("similar edge patterns")
-            max_similarity = max(max_similarity, dhash_similarity)
-            
-        if color_similarity > 0.7:
-            reasons.append("similar color scheme")
-            max_similarity = max(max_similarity, color_similarity)
-
-        return max_similarity, reasons
-
-    def normalize_unicode(self, text: str) -> str:
-        """Normalize Unicode characters to their closest ASCII representation."""
-        # Common Unicode tricks used by scammers
-        unicode_map = {
-            'а': 'a',  # Cyrillic
-            'е': 'e',  # Cyrillic
-            'і': 'i',  # Cyrillic
-            'о': 'o',  # Cyrillic
-            'р': 'p',  # Cyrillic
-            'с': 'c',  # Cyrillic
-            'у': 'y',  # Cyrillic
-            'ѕ': 's',  # Cyrillic
-            '𝐚': 'a',  # Mathematical
-            '𝐛': 'b',  # Mathematical
-            '𝐨': 'o',  # Mathematical
-            '𝓪': 'a',  # Script
-            '𝓫': 'b',  # Script
-            '𝓸': 'o',  # Script
-            '𝔞': 'a',  # Fraktur
-            '𝔟': 'b',  # Fraktur
-            '𝔬': 'o',  # Fraktur
-            # Add more as needed
-        }
-        
-        # Replace Unicode characters
-        normalized = text.lower()
-        for unicode_char, ascii_char in unicode_map.items():
-            normalized = normalized.replace(unicode_char, ascii_char)
-            
-        # Remove zero-width characters and other invisible Unicode
-        normalized = re.sub(r'[\u200B-\u200D\uFEFF]', '', normalized)
-        
-        # Remove combining diacritical marks
-        normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
-        
-        return normalized
+        return await check_existing_scammer(str(discord_id))
 
-    async def compare_usernames(self, name1: str, name2: str) -> tuple[float, list[str]]:
-        """Compare two usernames for similarity and return score and reasons."""
-        reasons = []
-        
-        # Normalize Unicode characters first
-        norm1 = self.normalize_unicode(name1)
-        norm2 = self.normalize_unicode(name2)
-        
-        # Check for Unicode tricks
-        if norm1 != name1.lower() or norm2 != name2.lower():
-            reasons.append("using special Unicode characters")
-            if norm1 == norm2:
-                return 1.0, reasons
-        
-        # Clean and normalize usernames
-        clean1 = re.sub(r'[^a-zA-Z0-9]', '', norm1)
-        clean2 = re.sub(r'[^a-zA-Z0-9]', '', norm2)
-        
-        # Return 0 if one of the names is empty after cleaning
-        if not clean1 or not clean2:
-            return 0.0, reasons
-            
-        # Check for exact match after cleaning
-        if clean1 == clean2:
-            reasons.append("identical after removing special characters")
-            return 1.0, reasons
-            
-        # Check for character replacement (0/O, l/I, etc.)
-        char_replacements = {
-            'o': '0',
-            'l': '1',
-            'i': '1',
-            'e': '3',
-            'a': '4',
-            's': '5',
-            't': '7',
-            'b': '8',
-            'g': '9'
-        }
-        
-        test1 = clean1
-        test2 = clean2
-        for char, num in char_replacements.items():
-            test1 = test1.replace(char, num)
-            test2 = test2.replace(char, num)
-        
-        if test1 == test2:
-            reasons.append("identical after checking number/letter substitutions")
-            return 0.95, reasons
-            
-        # Check for repeated characters (e.g., Hobo vs Hoboo)
-        stripped1 = re.sub(r'(.)\1+', r'\1', clean1)
-        stripped2 = re.sub(r'(.)\1+', r'\1', clean2)
-        
-        if stripped1 == stripped2:
-            reasons.append("identical after removing repeated characters")
-            return 0.9, reasons
-            
-        # Calculate basic similarity
-        basic_ratio = ratio(clean1, clean2)
-        
-        # Check for substring relationship
-        if clean1 in clean2 or clean2 in clean1:
-            reasons.append("one name contains the other")
-            return max(basic_ratio, 0.8), reasons
-            
-        if basic_ratio > 0.7:
-            reasons.append("general text similarity")
-            
-        return basic_ratio, reasons
-
-    async def compare_text(self, text1: str, text2: str) -> float:
-        """Compare two text strings for similarity."""
-        if not text1 or not text2:
-            return 0.0
-        return ratio(text1.lower(), text2.lower())
-
-    async def check_suspicious_patterns(self, text: str) -> list:
-        """Check text for suspicious patterns."""
-        found_patterns = []
-        text_lower = text.lower()
-        for pattern in self.suspicious_patterns:
-            if pattern in text_lower:
-                found_patterns.append(pattern)
-        return found_patterns
+    async def fingerprint_avatar(self, asset: discord.Asset) -> AvatarFingerprint:
+        """Download a small rendition of an avatar and fingerprint it in the image analysis pool."""
+        data = await self.bot.avatar_fetcher.fetch_avatar(asset)
+        return await self.bot.image_analyzer.fingerprint(data)
+
+    async def get_avatar_fingerprint(self, member: discord.Member) -> AvatarFingerprint:
+        """Get a member's avatar fingerprint, using cache if this avatar was seen before."""
+        avatar_key = str(member.display_avatar.key)
+        fingerprint = self.member_fingerprints.get(avatar_key)
+        if fingerprint is None:
+            fingerprint = await self.fingerprint_avatar(member.display_avatar)
+            if fingerprint:
+                self.member_fingerprints.set(avatar_key, fingerprint)
+        return fingerprint
+
+    async def get_protected_fingerprint(self, member: discord.Member) -> AvatarFingerprint:
+        """Get a protected member's avatar fingerprint, using cache if the avatar is unchanged."""
+        avatar_key = str(member.display_avatar.key)
+        fingerprint = self.protected_fingerprints.get(member.guild.id, member.id, avatar_key)
+        if fingerprint is None:
+            fingerprint = await self.fingerprint_avatar(member.display_avatar)
+            if fingerprint:
+                self.protected_fingerprints.set(member.guild.id, member.id, avatar_key, fingerprint)
+        return fingerprint
+
+    async def get_protected_avatars(self, guild: discord.Guild) -> FingerprintMatrix:
+        """Get the packed avatar fingerprints of a guild's owner and staff."""
+        matrix = self.protected_avatars.get(guild.id)
+        if matrix is not None:
+            return matrix
+
+        # Concurrent joins wait for a single rebuild
+        async with self._protected_locks.setdefault(guild.id, asyncio.Lock()):
+            matrix = self.protected_avatars.get(guild.id)
+            if matrix is None:
+                staff = self.staff.members(guild)
+                fingerprints = await asyncio.gather(*(self.get_protected_fingerprint(m) for m in staff))
+                matrix = FingerprintMatrix((m.id, fp) for m, fp in zip(staff, fingerprints))
+                self.protected_avatars[guild.id] = matrix
+        return matrix
+
+    async def get_member_index(self, guild: discord.Guild) -> MemberNameIndex:
+        """Get the name lookup index of a guild's members, building it on first use.
+
+        The build yields to the event loop between chunks of members, and
+        member events update the index while it is being filled.
+        """
+        loading = self.member_index_loads.get(guild.id)
+        if loading is None:
+            index = MemberNameIndex()
+            self.member_indexes[guild.id] = index
+            loading = asyncio.ensure_future(
+                index.load(list(guild.members), lambda member_id: guild.get_member(member_id) is not None))
+            self.member_index_loads[guild.id] = loading
+        await asyncio.shield(loading)
+        return self.member_indexes[guild.id]
+
+    def get_protected_names(self, guild: discord.Guild) -> ProtectedNameIndex:
+        """Get the name index of a guild's owner and staff."""
+        index = self.protected_names.get(guild.id)
+        if index is None:
+            index = ProtectedNameIndex(
+                (member.id, name)
+                for member in self.staff.members(guild)
+                for name in {member.name, member.nick, member.global_name}
+                if name
+            )
+            self.protected_names[guild.id] = index
+        return index
+
+    def describe_protected(self, guild: discord.Guild, member_id: int) -> str:
+        """Describe a protected member for detection factors."""
+        if member_id == guild.owner_id:
+            return "server owner"
+        staff_member = guild.get_member(member_id)
+        return f"staff member {staff_member.name}" if staff_member else "a staff member"
+
+    def is_protected(self, guild_id: int, member_id: int) -> bool:
+        """Check if a member is in the guild's cached protected identities."""
+        return (member_id in self.protected_avatars.get(guild_id, ()) or
+                member_id in self.protected_names.get(guild_id, ()))
+
+    def invalidate_protected(self, guild_id: int) -> None:
+        """Force the guild's protected identities to be rebuilt on next use."""
+        self.protected_avatars.pop(guild_id, None)
+        self.protected_names.pop(guild_id, None)
+        self.protected_versions[guild_id] = self.protected_versions.get(guild_id, 0) + 1
+
+    def scammer_avatar_matches(self, avatar_key: Optional[str], member_id: int) -> Optional[tuple]:
+        """Known scammer avatars matching this avatar, as (discord_id, distance) pairs.
+
+        None if the avatar has not been fingerprinted yet.
+        """
+        fingerprint = self.member_fingerprints.get(avatar_key) if avatar_key else None
+        if fingerprint is None:
+            return None
+        return tuple(self.scammer_avatars.search(fingerprint, exclude_id=str(member_id)))
+
+    def profile_fingerprint(self, member: discord.Member, matcher: PatternMatcher, enabled_checks: List[str],
+                            before: Union[discord.Member, discord.User] = None) -> tuple:
+        """Everything a check result depends on, for the verdict cache.
+
+        With `before` (the member or user state from an update event), the
+        fingerprint is that of the profile as it was before the update.
+        The avatar's own matches against known scammers come last, so new
+        scammer avatars only invalidate the verdicts they would change.
+        """
+        owner = member.guild.owner
+        snapshot = profile_snapshot(member, before)
+        account_age = (datetime.datetime.now(datetime.timezone.utc) - member.created_at).days
+        return (
+            snapshot,
+            min(account_age, 30),  # Age only matters (and is reported) below 30 days
+            member.id in self.known_scammers,
+            self.protected_versions.get(member.guild.id, 0),
+            matcher,  # Replaced whenever the global or server phrases change
+            tuple(enabled_checks or ()),
+            tuple(profile_snapshot(owner).texts()) if owner else None,
+            self.scammer_avatar_matches(snapshot.avatar_key, member.id)
+        )
 
     async def get_server_config(self, guild_id: str) -> ServerConfig:
-        """Get server configuration, using cache if available."""
-        if guild_id not in self.server_configs:
-            config = ServerConfig(guild_id)
-            await config.load()
-            self.server_configs[guild_id] = config
-        return self.server_configs[guild_id]
+        """Get server configuration from the bot's shared config cache."""
+        return await self.bot.server_configs.get(guild_id)
 
     async def handle_detection(self, member: discord.Member, risk_level: float, factors: list):
         """Handle detection of a potential scammer."""
@@ -250,6 +271,7 @@ class Detection(commands.Cog):
         
         # Store in database if risk is significant
         if risk_level >= config.get('min_detection_score', 0.7):
+            avatar_fingerprint = self.member_fingerprints.get(str(member.display_avatar.key))
             scammer_id = await store_scammer(
                 str(member.id),
                 member.name,
@@ -263,10 +285,13 @@ class Detection(commands.Cog):
                     "created_at": member.created_at.isoformat(),
                     "bot": member.bot,
                     "system": member.system
-                }
+                },
+                avatar_fingerprint=avatar_fingerprint
             )
             
             if scammer_id:
+                self.known_scammers.add(member.id)
+                self.scammer_avatars.add(str(member.id), avatar_fingerprint)
                 await log_detection(
                     scammer_id,
                     str(member.guild.id),
@@ -304,123 +329,98 @@ class Detection(commands.Cog):
                 except Exception as e:
                     logger.error(f"Error sending alert: {e}")
 
-    async def check_user(self, member: discord.Member) -> tuple:
-        """Check a user against known patterns and staff profiles."""
-        suspicious_factors = []
-        risk_level = 0
+    async def check_user(self, member: discord.Member, deep: bool = True, reuse: DetectionResult = None,
+                         rerun: Iterable[str] = (), only: Iterable[str] = None) -> DetectionResult:
+        """Check a user against known patterns and staff profiles.
+
+        The member is snapshotted and run through the detection engine with
+        the checks the server has enabled. With deep=False (raid mode) the
+        avatar analysis is skipped.
+
+        Results are cached by profile fingerprint, so checking an unchanged
+        member again (re-scans, rejoins) returns the previous verdict.
+        With `reuse`, the rule results of that earlier check are kept for
+        every rule not named in `rerun`. With `only`, just those rules run,
+        and the verdict cache is neither read nor written.
+        """
+        timings = {}
+        failed = set()
+        start = time.perf_counter()
 
         # Skip checks if user is the server owner
         if member.id == member.guild.owner_id:
-            return [], 0
-            
-        # Check if user is already marked as a scammer
-        existing_scammer = await check_existing_scammer(str(member.id))
-        if existing_scammer:
-            suspicious_factors.append(f"Previously detected as scammer with score: {existing_scammer['detection_score']:.1%}")
-            risk_level += 5  # High risk for previously detected scammers
-
-        # Check account age
-        account_age = datetime.datetime.now(datetime.timezone.utc) - member.created_at
-        if account_age.days < 7:
-            suspicious_factors.append(f"New account ({account_age.days} days old)")
-            risk_level += 2
-        elif account_age.days < 30:
-            suspicious_factors.append(f"Recent account ({account_age.days} days old)")
-            risk_level += 1
-
-        # Compare with server owner
-        owner = member.guild.owner
-        
-        # Username comparison
-        name_similarity, name_reasons = await self.compare_usernames(member.name, owner.name)
-        if name_similarity > 0.7:
-            suspicious_factors.append(f"Username similar to server owner ({name_similarity:.1%} match): {', '.join(name_reasons)}")
-            risk_level += 3
-            
-        # Also check nickname if present
-        if member.nick:
-            nick_similarity, nick_reasons = await self.compare_usernames(member.nick, owner.name)
-            if nick_similarity > 0.7:
-                suspicious_factors.append(f"Nickname similar to server owner ({nick_similarity:.1%} match): {', '.join(nick_reasons)}")
-                risk_level += 2
-
-        # Avatar comparison
-        member_avatar = await self.download_avatar(member.display_avatar.url)
-        owner_avatar = await self.download_avatar(owner.display_avatar.url)
-        if member_avatar and owner_avatar:
-            similarity, reasons = await self.compare_images(member_avatar, owner_avatar)
-            if similarity > 0.7:
-                suspicious_factors.append(
-                    f"Avatar similar to server owner ({similarity:.1%} match):\n" +
-                    "\n".join(f"• {r}" for r in reasons)
-                )
-                risk_level += len(reasons)  # More matching aspects = higher risk
-
-        # Bio/Status comparison
-        def get_user_text(user):
-            texts = []
-            # Get custom status
-            activities = [str(activity) for activity in user.activities if activity.type == discord.ActivityType.custom]
-            texts.extend(activities)
-            # Get roles as text
-            roles_text = ' '.join(role.name for role in user.roles)
-            texts.append(roles_text)
-            return texts
-
-        member_texts = get_user_text(member)
-        owner_texts = get_user_text(owner)
-        
-        for member_text in member_texts:
-            for owner_text in owner_texts:
-                if member_text and owner_text:  # Skip empty texts
-                    status_similarity = await self.compare_text(member_text, owner_text)
-                    if status_similarity > 0.6:
-                        suspicious_factors.append(
-                            f"Profile text similar to server owner ({status_similarity:.1%} match)\n" +
-                            f"Owner text: '{owner_text}'\n" +
-                            f"Member text: '{member_text}'"
-                        )
-                        risk_level += 2
+            return DetectionResult([], 0, timings, {})
 
-        # Check for suspicious patterns in all text fields
-        all_text = [member.name]
-        if member.nick:
-            all_text.append(member.nick)
-        all_text.extend(member_texts)
-        
-        for text in all_text:
-            patterns = await self.check_suspicious_patterns(text)
-            if patterns:
-                suspicious_factors.append(f"Suspicious patterns in {text}: {', '.join(patterns)}")
-                risk_level += len(patterns)
+        guild = member.guild
+        config = await run_stage(
+            'server_config', self.get_server_config(str(guild.id)), timings, STAGE_TIMEOUTS['server_config'], failed)
+        if config is not None:
+            matcher = self.patterns.matcher_for(str(guild.id), config.get('custom_patterns') or [])
+            enabled_checks = config.get('enabled_checks')
+            fingerprint = self.profile_fingerprint(member, matcher, enabled_checks)
+            # A partial check must not be answered with a full verdict
+            cached = self.verdicts.get(guild.id, member.id, fingerprint, deep) if only is None else None
+            if cached is not None:
+                timings['total'] = (time.perf_counter() - start) * 1000
+                return cached._replace(factors=list(cached.factors), timings=timings)
+        else:
+            matcher = self.patterns.global_matcher
+            enabled_checks = None
 
-        # Additional risk for combination of factors
-        if len(suspicious_factors) >= 3:
-            risk_level += 2  # Extra risk for multiple suspicious factors
+        owner = guild.owner
+        context = DetectionContext(
+            guild_id=guild.id,
+            protected_names=self.get_protected_names(guild),
+            matcher=matcher,
+            owner=profile_snapshot(owner) if owner else None,
+            describe_protected=lambda member_id: self.describe_protected(guild, member_id),
+            lookup_scammer=lambda: self.lookup_scammer(member.id),
+            avatar_fingerprint=lambda: self.get_avatar_fingerprint(member),
+            # Their fingerprints are cached until their avatars change
+            protected_avatars=lambda: self.get_protected_avatars(guild),
+            scammer_avatars=self.scammer_avatars
+        )
+        result = await self.engine.evaluate(
+            profile_snapshot(member), context, enabled_checks,
+            max_cost=None if deep else COST_IO, reuse=reuse, rerun=rerun, only=only
+        )
+        result.timings.update(timings)
+        result.timings['total'] = (time.perf_counter() - start) * 1000
+        logger.debug(f"Checked {member} ({member.id}): " + ', '.join(f"{k} {v:.1f}ms" for k, v in result.timings.items()))
+        if not failed and not result.failed and only is None:
+            if fingerprint[-1] is None:
+                # The avatar was fingerprinted by this check; key on what it matched
+                matches = self.scammer_avatar_matches(str(member.display_avatar.key), member.id)
+                fingerprint = fingerprint[:-1] + (matches,)
+            self.verdicts.put(guild.id, member.id, fingerprint, result, deep)
+        return result
 
-        return suspicious_factors, risk_level
+    def get_alert_channel(self, guild: discord.Guild, config: ServerConfig) -> discord.TextChannel:
+        """Get the configured alert channel, falling back to the system channel."""
+        alert_channel_id = config.get('alert_channel')
+        channel = None
+        
+        if alert_channel_id:
+            channel = guild.get_channel(int(alert_channel_id))
+        
+        if not channel:
+            channel = guild.system_channel or next(
+                (ch for ch in guild.text_channels if ch.permissions_for(guild.me).send_messages),
+                None
+            )
+        return channel
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member):
-        """Handle new member joins."""
-        factors, risk = await self.check_user(member)
+    async def report_join(self, member: discord.Member, result: DetectionResult):
+        """Alert about a risky join and apply auto-moderation."""
+        factors, risk = result.factors, result.risk_level
         
         if risk > 0:
+            ALERTS.inc()
             # Get server config
             config = await self.get_server_config(str(member.guild.id))
             
             # Send alert to configured channel or fallback to system channel
-            alert_channel_id = config.get('alert_channel')
-            channel = None
-            
-            if alert_channel_id:
-                channel = member.guild.get_channel(int(alert_channel_id))
-            
-            if not channel:
-                channel = member.guild.system_channel or next(
-                    (ch for ch in member.guild.text_channels if ch.permissions_for(member.guild.me).send_messages),
-                    None
-                )
+            channel = self.get_alert_channel(member.guild, config)
             
             if channel:
                 embed = discord.Embed(
@@ -435,6 +435,271 @@ class Detection(commands.Cog):
             # Handle detection (auto-moderation)
             await self.handle_detection(member, risk, factors)
 
+    async def process_join(self, member: discord.Member, deep: bool = True, quick_risk: int = None,
+                           received: float = None):
+        """Check a joining member and report the result.
+
+        Quick (raid mode) checks queue the member for a full check once the
+        raid is over; that follow-up only reports if it finds more risk.
+        Members deferred without a quick check (quick_risk None) are
+        reported on any risk. `received` is the perf_counter() time the
+        join event arrived.
+        """
+        result = await self.check_user(member, deep=deep)
+        if received is not None:
+            JOIN_VERDICT_SECONDS.observe(time.perf_counter() - received, 'full' if deep else 'quick')
+        if not deep:
+            self.deferred_checks.add(member.guild.id, member.id, result.risk_level)
+        if quick_risk is not None and result.risk_level <= quick_risk:
+            return
+        await self.report_join(member, result)
+
+    async def announce_raid(self, guild: discord.Guild, config: ServerConfig):
+        """Tell moderators the guild switched to raid mode."""
+        logger.warning(f"Raid mode enabled in guild {guild.id} ({self.raids.join_rate(guild.id)} recent joins)")
+        channel = self.get_alert_channel(guild, config)
+        if channel:
+            embed = discord.Embed(
+                title="🛡️ Raid Mode Enabled",
+                description=f"{self.raids.join_rate(guild.id)} members joined in the last "
+                            f"{config.get('raid_window_seconds')} seconds.\n"
+                            "New members get quick checks now; avatar checks run once the raid is over.",
+                color=discord.Color.red()
+            )
+            try:
+                await channel.send(embed=embed)
+            except Exception as e:
+                logger.error(f"Error sending raid alert: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Handle new member joins, switching to quick queued checks during a raid."""
+        received = time.perf_counter()
+        if member.guild.id in self.member_indexes:
+            self.member_indexes[member.guild.id].add(member)
+        config = await self.get_server_config(str(member.guild.id))
+        threshold = config.get('raid_join_threshold')
+        guild_id = member.guild.id
+
+        was_raid = self.raids.in_raid(guild_id)
+        raid = bool(threshold) and self.raids.record_join(
+            guild_id, threshold, config.get('raid_window_seconds'), config.get('raid_cooldown_seconds')
+        )
+        if not raid:
+            await self.process_join(member, received=received)
+            return
+
+        if not was_raid:
+            await self.announce_raid(member.guild, config)
+        if not self.join_queue.put_nowait(member, False, None, received):
+            # Queue full: check the member fully once the raid is over instead
+            RAID_OVERFLOW.inc()
+            self.deferred_checks.add(guild_id, member.id, None)
+
+    @tasks.loop(seconds=DEFERRED_CHECK_SECONDS)
+    async def run_deferred_checks(self):
+        """Run the full checks postponed during raids that have ended."""
+        for guild_id in self.deferred_checks.guilds():
+            if self.raids.in_raid(guild_id):
+                continue
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                self.deferred_checks.clear_guild(guild_id)
+                continue
+            for member_id, quick_risk in self.deferred_checks.pop(guild_id, DEFERRED_CHECK_BATCH):
+                member = guild.get_member(member_id)
+                if member:
+                    await self.join_queue.put(member, True, quick_risk)
+
+    async def reevaluate(self, member: discord.Member, before: Union[discord.Member, discord.User], rules: set):
+        """Re-check a member after a profile update, rerunning only the rules it affects.
+
+        The other rules come from the verdict cached for the profile as it
+        was before the update, and the member is reported only if a rerun
+        rule now finds more risk than it did then. Without a cached
+        verdict there is no baseline to compare with, so the member is
+        reported only if a full check reaches the server's detection
+        threshold; unless the avatar changed, that full check runs only
+        when the affected rules find something.
+        """
+        if member.id == member.guild.owner_id:
+            return
+        guild = member.guild
+        deep = not self.raids.in_raid(guild.id)
+        config = await self.get_server_config(str(guild.id))
+        matcher = self.patterns.matcher_for(str(guild.id), config.get('custom_patterns') or [])
+        enabled_checks = config.get('enabled_checks')
+        previous = self.verdicts.get(
+            guild.id, member.id, self.profile_fingerprint(member, matcher, enabled_checks, before))
+
+        if previous is not None:
+            result = await self.check_user(member, deep=deep, reuse=previous, rerun=rules)
+            raised = [rule for rule in rules if rule_risk(result, rule) > rule_risk(previous, rule)]
+            if not raised:
+                return
+            factors = [factor for rule in raised for factor in result.parts[rule][0]]
+        else:
+            if self.verdicts.get(guild.id, member.id, self.profile_fingerprint(member, matcher, enabled_checks), deep):
+                return  # Already checked as it is now
+            if 'avatar' not in rules:
+                partial = await self.check_user(member, deep=deep, only=rules)
+                if not partial.risk_level:
+                    return
+            result = await self.check_user(member, deep=deep)
+            if result.risk_level / 10 < config.get('min_detection_score', 0.7):
+                return
+            factors = result.factors
+
+        logger.info(f"Profile update of {member} ({member.id}) in guild {guild.id} raised: {', '.join(factors)}")
+        await self.report_join(member, result)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Update name lookups and drop cached identities when a member's server avatar, nickname or staff status changes.
+
+        Members whose nickname or server avatar changed are re-checked with
+        just the rules those fields feed.
+        """
+        if before.nick != after.nick and after.guild.id in self.member_indexes:
+            self.member_indexes[after.guild.id].update(after)
+        if before.guild_avatar != after.guild_avatar:
+            self.protected_fingerprints.invalidate(after.guild.id, after.id)
+            if self.is_protected(after.guild.id, after.id):
+                self.invalidate_protected(after.guild.id)
+        if before.nick != after.nick and self.is_protected(after.guild.id, after.id):
+            self.invalidate_protected(after.guild.id)
+        if before.roles != after.roles:
+            changed = set(before.roles).symmetric_difference(after.roles)
+            if any(is_staff_role(role) for role in changed):
+                self.staff.update_member(after)
+                self.invalidate_protected(after.guild.id)
+
+        rules = set()
+        if before.nick != after.nick:
+            rules |= {'names', 'patterns'}
+        if before.guild_avatar != after.guild_avatar:
+            rules.add('avatar')
+        if rules:
+            await self.reevaluate(after, before, rules)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Update name lookups and drop cached identities when a user's global avatar or names change.
+
+        The user is then re-checked in every shared server, rerunning only
+        the rules the changed fields feed.
+        """
+        if before.avatar != after.avatar:
+            self.protected_fingerprints.invalidate_user(after.id)
+        if (before.avatar, before.name, before.global_name) != (after.avatar, after.name, after.global_name):
+            for guild_id in set(self.protected_avatars) | set(self.protected_names):
+                if self.is_protected(guild_id, after.id):
+                    self.invalidate_protected(guild_id)
+        if (before.name, before.global_name) != (after.name, after.global_name):
+            for guild_id, index in self.member_indexes.items():
+                guild = self.bot.get_guild(guild_id)
+                member = guild.get_member(after.id) if guild else None
+                if member:
+                    index.update(member)
+
+        rules = set()
+        if (before.name, before.global_name) != (after.name, after.global_name):
+            rules |= {'names', 'patterns'}
+        avatar_changed = before.avatar != after.avatar
+        if not rules and not avatar_changed:
+            return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member is None:
+                continue
+            # A server avatar hides the global one
+            member_rules = rules | ({'avatar'} if avatar_changed and member.guild_avatar is None else set())
+            if member_rules:
+                try:
+                    await self.reevaluate(member, before, member_rules)
+                except Exception as e:
+                    logger.error(f"Error re-checking {after.id} in guild {guild.id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """Forget the member and rebuild protected identities when a staff member leaves."""
+        self.deferred_checks.discard(member.guild.id, member.id)
+        if member.guild.id in self.member_indexes:
+            self.member_indexes[member.guild.id].remove(member.id)
+        self.staff.remove_member(member.guild.id, member.id)
+        if self.is_protected(member.guild.id, member.id):
+            self.protected_fingerprints.invalidate(member.guild.id, member.id)
+            self.invalidate_protected(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        """Rebuild protected identities when a role gains or loses staff permissions."""
+        if is_staff_role(before) != is_staff_role(after):
+            self.staff.forget(after.guild.id)
+            self.invalidate_protected(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        """Rebuild protected identities when a staff role is deleted."""
+        if is_staff_role(role):
+            self.staff.forget(role.guild.id)
+            self.invalidate_protected(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        """Drop cached fingerprints, indexes, matchers and raid state for guilds the bot leaves."""
+        self.protected_fingerprints.clear_guild(guild.id)
+        self.invalidate_protected(guild.id)
+        self.staff.forget(guild.id)
+        self._protected_locks.pop(guild.id, None)
+        self.raids.forget(guild.id)
+        self.deferred_checks.clear_guild(guild.id)
+        self.member_indexes.pop(guild.id, None)
+        loading = self.member_index_loads.pop(guild.id, None)
+        if loading is not None:
+            loading.cancel()
+        self.verdicts.clear_guild(guild.id)
+        self.protected_versions.pop(guild.id, None)
+        self.patterns.forget(str(guild.id))
+
+    async def store_scan_result(self, member: discord.Member, risk: int, factors: list):
+        """Store a manual or bulk scan result as a scammer profile and detection event."""
+        # Get avatar key and fingerprint if available
+        avatar_hash = str(member.display_avatar.key) if member.display_avatar else None
+        avatar_fingerprint = self.member_fingerprints.get(avatar_hash)
+        
+        # Collect profile data
+        profile_data = {
+            "nick": member.nick,
+            "roles": [role.name for role in member.roles],
+            "joined_at": member.joined_at.isoformat() if member.joined_at else None,
+            "created_at": member.created_at.isoformat(),
+            "bot": member.bot,
+            "system": member.system
+        }
+        
+        # Store in database
+        scammer_id = await store_scammer(
+            str(member.id),
+            member.name,
+            risk / 10,  # Convert risk to 0-1 scale
+            factors,
+            avatar_hash,
+            profile_data,
+            avatar_fingerprint
+        )
+        
+        # Log the detection event
+        if scammer_id:
+            self.known_scammers.add(member.id)
+            self.scammer_avatars.add(str(member.id), avatar_fingerprint)
+            await log_detection(
+                scammer_id,
+                str(member.guild.id),
+                risk / 10,
+                factors
+            )
+
     @commands.command(name='scan')
     @commands.has_permissions(manage_messages=True)
     async def scan_user(self, ctx, *, member_name: str):
@@ -449,54 +714,31 @@ class Detection(commands.Cog):
         if member_name.isdigit():
             member = ctx.guild.get_member(int(member_name))
             
-        # If not found, try by name
+        # If not found, try by name; only an exact or unique match is scanned
         if not member:
-            member = discord.utils.find(
-                lambda m: m.name.lower() == member_name.lower() or 
-                         (m.nick and m.nick.lower() == member_name.lower()),
-                ctx.guild.members
-            )
+            index = await self.get_member_index(ctx.guild)
+            member_ids = index.find_exact(member_name) or index.find(member_name, limit=SCAN_CANDIDATES)
+            if len(member_ids) > 1:
+                candidates = [m for m in map(ctx.guild.get_member, member_ids[:SCAN_CANDIDATES]) if m]
+                await ctx.send(
+                    f"❓ Several members match {member_name}:\n" +
+                    '\n'.join(f"• {m} ({m.display_name}) - `{m.id}`" for m in candidates) +
+                    "\nRun the scan again with a member ID or mention."
+                )
+                return
+            member = ctx.guild.get_member(member_ids[0]) if member_ids else None
             
         if not member:
             await ctx.send(f"❌ Could not find member: {member_name}")
             return
             
         async with ctx.typing():
-            factors, risk = await self.check_user(member)
+            result = await self.check_user(member)
+            factors, risk = result.factors, result.risk_level
             
             # Store detection if risk is significant
             if risk >= 2:
-                # Get avatar hash if available
-                avatar_hash = str(member.display_avatar.key) if member.display_avatar else None
-                
-                # Collect profile data
-                profile_data = {
-                    "nick": member.nick,
-                    "roles": [role.name for role in member.roles],
-                    "joined_at": member.joined_at.isoformat() if member.joined_at else None,
-                    "created_at": member.created_at.isoformat(),
-                    "bot": member.bot,
-                    "system": member.system
-                }
-                
-                # Store in database
-                scammer_id = await store_scammer(
-                    str(member.id),
-                    member.name,
-                    risk / 10,  # Convert risk to 0-1 scale
-                    factors,
-                    avatar_hash,
-                    profile_data
-                )
-                
-                # Log the detection event
-                if scammer_id:
-                    await log_detection(
-                        scammer_id,
-                        str(ctx.guild.id),
-                        risk / 10,
-                        factors
-                    )
+                await self.store_scan_result(member, risk, factors)
             
             embed = discord.Embed(
                 title="🔍 Scan Results",
@@ -514,22 +756,205 @@ class Detection(commands.Cog):
                       f"Joined: {discord.utils.format_dt(member.joined_at, 'R')}",
                 inline=False
             )
-            embed.set_footer(text=f"User ID: {member.id}")
+            embed.set_footer(text=f"User ID: {member.id} • Checked in {result.timings.get('total', 0):.0f} ms")
             
             await ctx.send(embed=embed)
 
-    @commands.command(name='scampatterns')
+    def scan_progress_embed(self, guild: discord.Guild, state: dict, status: str) -> discord.Embed:
+        """Build the live progress embed of a bulk scan."""
+        total = state['total'] or 0
+        scanned = state['scanned']
+        fraction = scanned / total if total else 1.0
+        bar = '█' * int(fraction * 20) + '░' * (20 - int(fraction * 20))
+        embed = discord.Embed(
+            title="🔎 Server Scan",
+            description=f"{bar} {fraction:.0%}\n"
+                        f"Scanned: {scanned:,}/{total:,} members\n"
+                        f"Flagged: {state['flagged']:,}",
+            color=discord.Color.green() if status == "Finished" else discord.Color.blue()
+        )
+        top = sorted(state['top'], reverse=True)[:5]
+        if top:
+            embed.add_field(
+                name="Highest Risk",
+                value='\n'.join(f"• <@{member_id}>: {'🔴' * min(risk, 5)} ({risk}/10)" for risk, member_id in top),
+                inline=False
+            )
+        embed.set_footer(text=f"{status} • Guild ID: {guild.id}")
+        return embed
+
+    async def run_bulk_scan(self, guild: discord.Guild, message: discord.Message, state: dict):
+        """Scan every human member in ID order, checkpointing after each batch.
+
+        Checks run SCAN_CONCURRENCY at a time and reuse the cached staff
+        fingerprints; flagged members go through the batched database writes.
+        """
+        guild_id = str(guild.id)
+        members = sorted((m for m in guild.members if not m.bot), key=lambda m: m.id)
+        member_ids = [m.id for m in members]
+        position = bisect_right(member_ids, int(state['last_member_id'])) if state['last_member_id'] else 0
+        state['total'] = state['scanned'] + len(members) - position
+        semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+        last_edit = time.monotonic()
+
+        async def scan(member):
+            async with semaphore:
+                try:
+                    return member, await self.check_user(member)
+                except Exception as e:
+                    logger.error(f"Error scanning member {member.id}: {e}")
+                    return member, None
+
+        try:
+            for offset in range(position, len(members), SCAN_BATCH_SIZE):
+                batch = members[offset:offset + SCAN_BATCH_SIZE]
+                results = await asyncio.gather(*(scan(member) for member in batch))
+                flagged = [(member, result) for member, result in results if result and result.risk_level >= 2]
+                await asyncio.gather(*(
+                    self.store_scan_result(member, result.risk_level, result.factors)
+                    for member, result in flagged
+                ))
+
+                state['scanned'] += len(batch)
+                state['flagged'] += len(flagged)
+                state['last_member_id'] = str(batch[-1].id)
+                state['top'] = sorted(
+                    state['top'] + [(result.risk_level, member.id) for member, result in flagged],
+                    reverse=True
+                )[:5]
+                await save_scan_checkpoint(
+                    guild_id, last_member_id=state['last_member_id'],
+                    scanned=state['scanned'], flagged=state['flagged'], total=state['total']
+                )
+
+                if time.monotonic() - last_edit >= SCAN_PROGRESS_SECONDS:
+                    last_edit = time.monotonic()
+                    try:
+                        await message.edit(embed=self.scan_progress_embed(guild, state, "Scanning"))
+                    except discord.HTTPException as e:
+                        logger.warning(f"Could not update scan progress: {e}")
+
+            await save_scan_checkpoint(guild_id, finished_at=datetime.datetime.utcnow())
+            await message.edit(embed=self.scan_progress_embed(guild, state, "Finished"))
+        except asyncio.CancelledError:
+            try:
+                await message.edit(embed=self.scan_progress_embed(guild, state, "Paused - run scanall to resume"))
+            except discord.HTTPException:
+                pass
+            raise
+        finally:
+            self.bulk_scans.pop(guild.id, None)
+
+    async def start_bulk_scan(self, ctx, resume: bool):
+        """Start a bulk scan, resuming from the guild's checkpoint if asked and available."""
+        guild = ctx.guild
+        task = self.bulk_scans.get(guild.id)
+        if task and not task.done():
+            await ctx.send("❌ A scan of this server is already running. Use `!dsd scanall cancel` to stop it.")
+            return
+
+        checkpoint = await get_scan_checkpoint(str(guild.id)) if resume else None
+        if checkpoint and not checkpoint.get('finished_at') and checkpoint.get('last_member_id'):
+            state = {
+                'last_member_id': checkpoint['last_member_id'],
+                'scanned': checkpoint.get('scanned') or 0,
+                'flagged': checkpoint.get('flagged') or 0,
+                'total': checkpoint.get('total'),
+                'top': []
+            }
+            status = f"Resuming after {state['scanned']:,} members"
+        else:
+            total = sum(1 for member in guild.members if not member.bot)
+            state = {'last_member_id': None, 'scanned': 0, 'flagged': 0, 'total': total, 'top': []}
+            status = "Starting"
+
+        message = await ctx.send(embed=self.scan_progress_embed(guild, state, status))
+        await save_scan_checkpoint(
+            str(guild.id), last_member_id=state['last_member_id'], scanned=state['scanned'],
+            flagged=state['flagged'], channel_id=str(ctx.channel.id), message_id=str(message.id),
+            finished_at=None, **({} if state['last_member_id'] else {'started_at': datetime.datetime.utcnow()})
+        )
+        self.bulk_scans[guild.id] = asyncio.create_task(self.run_bulk_scan(guild, message, state))
+
+    @commands.group(name='scanall', invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def scan_all(self, ctx):
+        """Scan every member of the server, resuming an interrupted scan."""
+        await self.start_bulk_scan(ctx, resume=True)
+
+    @scan_all.command(name='restart')
+    @commands.has_permissions(administrator=True)
+    async def restart_scan(self, ctx):
+        """Scan every member of the server from the beginning."""
+        await self.start_bulk_scan(ctx, resume=False)
+
+    @scan_all.command(name='cancel')
+    @commands.has_permissions(administrator=True)
+    async def cancel_scan(self, ctx):
+        """Stop a running scan; it can be resumed later."""
+        task = self.bulk_scans.get(ctx.guild.id)
+        if not task or task.done():
+            await ctx.send("❌ No scan is running in this server")
+            return
+        task.cancel()
+        await ctx.send("✅ Scan stopped. Run `!dsd scanall` to resume it.")
+
+    @commands.group(name='scampatterns', invoke_without_command=True)
     @commands.has_permissions(manage_messages=True)
     async def show_patterns(self, ctx):
         """Show the current list of suspicious patterns."""
-        patterns = '\n'.join(f"• {p}" for p in self.suspicious_patterns)
+        config = await self.get_server_config(str(ctx.guild.id))
+        custom = config.get('custom_patterns') or []
+        global_patterns = self.patterns.global_patterns
+
+        def format_list(patterns, limit=25):
+            lines = [f"• {p}" for p in patterns[:limit]]
+            if len(patterns) > limit:
+                lines.append(f"…and {len(patterns) - limit} more")
+            return '\n'.join(lines) or "None"
+
         embed = discord.Embed(
             title="📋 Suspicious Patterns",
-            description=f"Current patterns being monitored:\n{patterns}",
+            description=f"Current patterns being monitored:\n{format_list(global_patterns)}",
             color=discord.Color.blue()
         )
+        embed.add_field(name="Server Patterns", value=format_list(custom), inline=False)
         await ctx.send(embed=embed)
 
+    @show_patterns.command(name='add')
+    @commands.has_permissions(manage_guild=True)
+    async def add_pattern(self, ctx, *, phrase: str):
+        """Add a suspicious phrase for this server."""
+        phrase = phrase.strip().lower()
+        config = await self.get_server_config(str(ctx.guild.id))
+        patterns = list(config.get('custom_patterns') or [])
+
+        if phrase in patterns:
+            await ctx.send(f"❌ `{phrase}` is already a server pattern")
+            return
+
+        patterns.append(phrase)
+        config.set('custom_patterns', patterns)
+        await config.save()
+        await ctx.send(f"✅ Added `{phrase}` to server patterns")
+
+    @show_patterns.command(name='remove')
+    @commands.has_permissions(manage_guild=True)
+    async def remove_pattern(self, ctx, *, phrase: str):
+        """Remove a suspicious phrase for this server."""
+        phrase = phrase.strip().lower()
+        config = await self.get_server_config(str(ctx.guild.id))
+        patterns = list(config.get('custom_patterns') or [])
+
+        if phrase not in patterns:
+            await ctx.send(f"❌ `{phrase}` is not a server pattern")
+            return
+
+        patterns.remove(phrase)
+        config.set('custom_patterns', patterns)
+        await config.save()
+        await ctx.send(f"✅ Removed `{phrase}` from server patterns")
+
 async def setup(bot):
     await bot.add_cog(Detection(bot))
     logger.info('Detection cog loaded')
\ No newline at end of file
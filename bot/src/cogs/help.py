@@ -33,7 +33,10 @@ class Help(commands.Cog):
             # Show all commands
             commands_list = [
                 ("scan @user", "Scan a user for suspicious activity"),
+                ("scanall [restart/cancel]", "Scan every member of the server (resumes an interrupted scan)"),
                 ("scampatterns", "Show the list of suspicious patterns"),
+                ("scampatterns add/remove <phrase>", "Manage this server's suspicious patterns"),
+                ("profile [seconds]", "Bot owner: sample the running bot and attach a profile"),
                 ("help [command]", "Show this help message or get help for a specific command")
             ]
             
@@ -0,0 +1,288 @@
+from typing import Dict, Optional
+import json
+import logging
+import os
+import sys
+import unicodedata
+
+logger = logging.getLogger('dsd_bot.confusables')
+
+# Skeleton table precompiled from the Unicode confusables data (UTS #39
+# confusables.txt); regenerate it with bot/scripts/build_skeleton_table.py
+SKELETON_TABLE_FILE = os.path.join(os.path.dirname(__file__), 'data', 'skeleton_table.json')
+
+# Lookalikes that have no compatibility decomposition, mapped to the
+# lowercase ASCII character they imitate. NFKD already folds mathematical,
+# fullwidth, circled and accented letters, so they are not listed here.
+# They take precedence over the Unicode data, whose prototypes are often
+# lookalikes from another script (e.g. Cyrillic в -> Latin small capital B).
+CONFUSABLES = {
+    # Cyrillic
+    'а': 'a',  # Cyrillic Small Letter A
+    'в': 'b',  # Cyrillic Small Letter Ve
+    'с': 'c',  # Cyrillic Small Letter Es
+    'ԁ': 'd',  # Cyrillic Small Letter Komi De
+    'ғ': 'f',  # Cyrillic Small Letter Ghe With Stroke
+    'е': 'e',  # Cyrillic Small Letter Ie
+    'һ': 'h',  # Cyrillic Small Letter Shha
+    'і': 'i',  # Cyrillic Small Letter Byelorussian-Ukrainian I
+    'ј': 'j',  # Cyrillic Small Letter Je
+    'к': 'k',  # Cyrillic Small Letter Ka
+    'ӏ': 'l',  # Cyrillic Small Letter Palochka
+    'м': 'm',  # Cyrillic Small Letter Em
+    'п': 'n',  # Cyrillic Small Letter Pe
+    'о': 'o',  # Cyrillic Small Letter O
+    'р': 'p',  # Cyrillic Small Letter Er
+    'ԛ': 'q',  # Cyrillic Small Letter Qa
+    'г': 'r',  # Cyrillic Small Letter Ghe
+    'ѕ': 's',  # Cyrillic Small Letter Dze
+    'т': 't',  # Cyrillic Small Letter Te
+    'ѵ': 'v',  # Cyrillic Small Letter Izhitsa
+    'ԝ': 'w',  # Cyrillic Small Letter We
+    'х': 'x',  # Cyrillic Small Letter Ha
+    'у': 'y',  # Cyrillic Small Letter U
+    'є': 'e',  # Cyrillic Small Letter Ukrainian Ie
+    'ї': 'i',  # Cyrillic Small Letter Yi
+    'ґ': 'r',  # Cyrillic Small Letter Ghe With Upturn
+    'ү': 'y',  # Cyrillic Small Letter Straight U
+    'ѡ': 'w',  # Cyrillic Small Letter Omega
+    'Н': 'h',  # Cyrillic Capital Letter En
+    # Greek
+    'α': 'a',  # Greek Small Letter Alpha
+    'β': 'b',  # Greek Small Letter Beta
+    'ε': 'e',  # Greek Small Letter Epsilon
+    'ι': 'i',  # Greek Small Letter Iota
+    'κ': 'k',  # Greek Small Letter Kappa
+    'ν': 'v',  # Greek Small Letter Nu
+    'ο': 'o',  # Greek Small Letter Omicron
+    'ρ': 'p',  # Greek Small Letter Rho
+    'τ': 't',  # Greek Small Letter Tau
+    'υ': 'u',  # Greek Small Letter Upsilon
+    'χ': 'x',  # Greek Small Letter Chi
+    'γ': 'y',  # Greek Small Letter Gamma
+    'ω': 'w',  # Greek Small Letter Omega
+    'η': 'n',  # Greek Small Letter Eta
+    'μ': 'u',  # Greek Small Letter Mu
+    'ϲ': 'c',  # Greek Lunate Sigma Symbol
+    'ϳ': 'j',  # Greek Letter Yot
+    'Η': 'h',  # Greek Capital Letter Eta
+    'Μ': 'm',  # Greek Capital Letter Mu
+    'Ν': 'n',  # Greek Capital Letter Nu
+    'Υ': 'y',  # Greek Capital Letter Upsilon
+    'Ζ': 'z',  # Greek Capital Letter Zeta
+    # Armenian
+    'հ': 'h',  # Armenian Small Letter Ho
+    'ո': 'n',  # Armenian Small Letter Vo
+    'ս': 'u',  # Armenian Small Letter Seh
+    'օ': 'o',  # Armenian Small Letter Oh
+    'ց': 'g',  # Armenian Small Letter Co
+    'զ': 'q',  # Armenian Small Letter Za
+    'յ': 'j',  # Armenian Small Letter Yi
+    # Cherokee
+    'Ꭰ': 'd',  # Cherokee Letter A
+    'Ꭱ': 'r',  # Cherokee Letter E
+    'Ꭲ': 't',  # Cherokee Letter I
+    'Ꭵ': 'i',  # Cherokee Letter V
+    'Ꭹ': 'y',  # Cherokee Letter Gi
+    'Ꭺ': 'a',  # Cherokee Letter Go
+    'Ꭻ': 'j',  # Cherokee Letter Gu
+    'Ꭼ': 'e',  # Cherokee Letter Gv
+    'Ꮃ': 'w',  # Cherokee Letter La
+    'Ꮇ': 'm',  # Cherokee Letter Lu
+    'Ꮋ': 'h',  # Cherokee Letter Mi
+    'Ꮍ': 'y',  # Cherokee Letter Mu
+    'Ꮐ': 'g',  # Cherokee Letter Nah
+    'Ꮒ': 'h',  # Cherokee Letter Ni
+    'Ꮓ': 'z',  # Cherokee Letter No
+    'Ꮞ': 'b',  # Cherokee Letter Se
+    'Ꮢ': 'r',  # Cherokee Letter Sv
+    'Ꮪ': 's',  # Cherokee Letter Du
+    'Ꮮ': 'l',  # Cherokee Letter Tle
+    'Ꮯ': 'c',  # Cherokee Letter Tli
+    'Ꮲ': 'p',  # Cherokee Letter Tlv
+    'Ꮶ': 'k',  # Cherokee Letter Tso
+    'Ᏼ': 'b',  # Cherokee Letter Yv
+    'Ꮩ': 'v',  # Cherokee Letter Do
+    # Latin
+    'ı': 'i',  # Latin Small Letter Dotless I
+    'ȷ': 'j',  # Latin Small Letter Dotless J
+    'ɑ': 'a',  # Latin Small Letter Alpha
+    'ɡ': 'g',  # Latin Small Letter Script G
+    'ɩ': 'i',  # Latin Small Letter Iota
+    'ɪ': 'i',  # Latin Letter Small Capital I
+    'ɴ': 'n',  # Latin Letter Small Capital N
+    'ʀ': 'r',  # Latin Letter Small Capital R
+    'ʏ': 'y',  # Latin Letter Small Capital Y
+    'ʙ': 'b',  # Latin Letter Small Capital B
+    'ʜ': 'h',  # Latin Letter Small Capital H
+    'ʟ': 'l',  # Latin Letter Small Capital L
+    'ᴀ': 'a',  # Latin Letter Small Capital A
+    'ᴄ': 'c',  # Latin Letter Small Capital C
+    'ᴅ': 'd',  # Latin Letter Small Capital D
+    'ᴇ': 'e',  # Latin Letter Small Capital E
+    'ᴊ': 'j',  # Latin Letter Small Capital J
+    'ᴋ': 'k',  # Latin Letter Small Capital K
+    'ᴍ': 'm',  # Latin Letter Small Capital M
+    'ᴏ': 'o',  # Latin Letter Small Capital O
+    'ᴘ': 'p',  # Latin Letter Small Capital P
+    'ᴛ': 't',  # Latin Letter Small Capital T
+    'ᴜ': 'u',  # Latin Letter Small Capital U
+    'ᴠ': 'v',  # Latin Letter Small Capital V
+    'ᴡ': 'w',  # Latin Letter Small Capital W
+    'ᴢ': 'z',  # Latin Letter Small Capital Z
+    'ꜱ': 's',  # Latin Letter Small Capital S
+    'đ': 'd',  # Latin Small Letter D With Stroke
+    'ħ': 'h',  # Latin Small Letter H With Stroke
+    'ł': 'l',  # Latin Small Letter L With Stroke
+    'ø': 'o',  # Latin Small Letter O With Stroke
+    'ŧ': 't',  # Latin Small Letter T With Stroke
+    'ƀ': 'b',  # Latin Small Letter B With Stroke
+    'ǥ': 'g',  # Latin Small Letter G With Stroke
+    'ɨ': 'i',  # Latin Small Letter I With Stroke
+    'ʉ': 'u',  # Latin Small Letter U Bar
+    'ɍ': 'r',  # Latin Small Letter R With Stroke
+    'ƒ': 'f',  # Latin Small Letter F With Hook
+    'ɔ': 'c',  # Latin Small Letter Open O
+    'ɘ': 'e',  # Latin Small Letter Reversed E
+    'ɛ': 'e',  # Latin Small Letter Open E
+    'ɣ': 'y',  # Latin Small Letter Gamma
+    'ɦ': 'h',  # Latin Small Letter H With Hook
+    'ɯ': 'w',  # Latin Small Letter Turned M
+    'ɵ': 'o',  # Latin Small Letter Barred O
+    'ʂ': 's',  # Latin Small Letter S With Hook
+    'ʋ': 'u',  # Latin Small Letter V With Hook
+    'ʐ': 'z',  # Latin Small Letter Z With Retroflex Hook
+    'ß': 'ss',  # Latin Small Letter Sharp S
+    'æ': 'ae',  # Latin Small Letter Ae
+    'œ': 'oe',  # Latin Small Ligature Oe
+    'ǀ': 'l',  # Latin Letter Dental Click
+    # Other
+    'ℓ': 'l',  # Script Small L
+    '∣': 'l',  # Divides
+}
+
+# Invisible characters that are not Unicode format (Cf) characters
+INVISIBLE = {
+    '\u115f',  # Hangul Choseong Filler
+    '\u1160',  # Hangul Jungseong Filler
+    '\u2800',  # Braille Pattern Blank
+    '\u3164',  # Hangul Filler
+    '\uffa0',  # Halfwidth Hangul Filler
+}
+
+
+def _is_invisible(char: str) -> bool:
+    """Check if a character renders as nothing (format characters, marks and fillers)."""
+    return unicodedata.category(char) in ('Cf', 'Mn', 'Me') or char in INVISIBLE
+
+
+def _fold(text: str, confusables: Dict[str, str]) -> str:
+    """Fold text to its skeleton: NFKD, drop invisible characters, lowercase and map lookalikes."""
+    folded = []
+    for char in unicodedata.normalize('NFKD', text):
+        if _is_invisible(char):
+            continue
+        char = char.lower()
+        folded.append(confusables.get(char, char))
+    return ''.join(folded)
+
+
+def load_confusables(path: str) -> Dict[str, str]:
+    """Load single-character, non-ASCII mappings from a UTS #39 confusables.txt file."""
+    confusables = {}
+    with open(path, encoding='utf-8-sig') as data:
+        for line in data:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = [field.strip() for field in line.split(';')]
+            source = fields[0].split()
+            if len(source) != 1:
+                continue
+            char = chr(int(source[0], 16))
+            if char.isascii():
+                continue  # Digit/letter lookalikes are handled by leetspeak checks
+            confusables[char] = ''.join(chr(int(cp, 16)) for cp in fields[1].split())
+    # Targets are prototypes; fold them so they compare like everything else
+    return {char: _fold(target, {}) for char, target in confusables.items()}
+
+
+def combine_confusables(unicode_confusables: Dict[str, str]) -> Dict[str, str]:
+    """Overlay the built-in ASCII mappings on Unicode confusables data.
+
+    Characters that already fold to ASCII through NFKD and lowercasing
+    keep that folding (the data maps fullwidth I to l, for instance).
+    Unicode prototypes are folded through the built-in mappings, and
+    lookalikes sharing a non-ASCII prototype with a built-in entry map to
+    its ASCII character, so a whole class of lookalikes ends up as ASCII.
+    """
+    ascii_prototypes = {
+        unicode_confusables[char]: target for char, target in CONFUSABLES.items()
+        if char in unicode_confusables and not unicode_confusables[char].isascii()
+    }
+    combined = {}
+    for char, prototype in unicode_confusables.items():
+        if _fold(char, CONFUSABLES).isascii():
+            continue
+        combined[char] = ascii_prototypes.get(prototype) or _fold(prototype, CONFUSABLES)
+    combined.update(CONFUSABLES)
+    return combined
+
+
+def build_skeleton_table(confusables: Dict[str, str]) -> Dict[int, Optional[str]]:
+    """Build a str.translate table mapping every assigned code point to its skeleton."""
+    table = {}
+    for codepoint in range(sys.maxunicode + 1):
+        if 0xAC00 <= codepoint <= 0xD7A3:
+            continue  # Hangul syllables only decompose into their own jamo
+        char = chr(codepoint)
+        category = unicodedata.category(char)
+        if category in ('Cn', 'Cs', 'Co'):
+            continue
+        if char in confusables:
+            table[codepoint] = confusables[char] or None
+        elif (category in ('Cf', 'Mn', 'Me') or char in INVISIBLE or char.lower() != char or
+              unicodedata.normalize('NFKD', char) != char):
+            skeleton = _fold(char, confusables)
+            if skeleton != char:
+                table[codepoint] = skeleton or None
+    return table
+
+
+def save_skeleton_table(path: str, table: Dict[int, Optional[str]], source: str) -> None:
+    """Write a skeleton table as JSON, with hex code points as keys."""
+    with open(path, 'w', encoding='utf-8') as data:
+        json.dump({
+            'source': source,
+            'unicode_version': unicodedata.unidata_version,
+            'mappings': {format(codepoint, 'x'): skeleton for codepoint, skeleton in sorted(table.items())}
+        }, data, ensure_ascii=False, indent=0)
+        data.write('\n')
+
+
+def load_skeleton_table(path: str) -> Dict[int, Optional[str]]:
+    """Read a skeleton table written by save_skeleton_table."""
+    with open(path, encoding='utf-8') as data:
+        mappings = json.load(data)['mappings']
+    return {int(codepoint, 16): skeleton for codepoint, skeleton in mappings.items()}
+
+
+def _load_table() -> Dict[int, Optional[str]]:
+    """Load the precompiled skeleton table, falling back to the built-in lookalikes."""
+    try:
+        table = load_skeleton_table(SKELETON_TABLE_FILE)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load skeleton table from {SKELETON_TABLE_FILE}, "
+                     f"using built-in lookalikes only: {e}")
+        table = build_skeleton_table(CONFUSABLES)
+    logger.info(f"Loaded skeleton table with {len(table)} mappings")
+    return table
+
+
+# Loaded once at import; normalize with text.translate(SKELETON_TABLE)
+SKELETON_TABLE = _load_table()
+
+
+def skeleton(text: str) -> str:
+    """Fold text to lowercase ASCII lookalikes with invisible characters removed, in one pass."""
+    return text.translate(SKELETON_TABLE)
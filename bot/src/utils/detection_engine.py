@@ -0,0 +1,368 @@
+from datetime import datetime, timezone
+from typing import (Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set,
+                    Tuple)
+import asyncio
+import logging
+import time
+from Levenshtein import ratio
+from .fingerprint import AvatarFingerprint
+from .fingerprint_matrix import FingerprintMatrix
+from .hash_index import ScammerAvatarIndex
+from .metrics import counter, histogram
+from .name_index import ProtectedNameIndex
+from .patterns import PatternMatcher
+
+logger = logging.getLogger('dsd_bot.detection_engine')
+
+RULE_SECONDS = histogram('dsd_rule_seconds', 'Time spent in each detection rule', ['rule'])
+STAGE_SECONDS = histogram('dsd_stage_seconds', 'Time spent in each I/O stage of a check', ['stage'])
+STAGE_FAILURES = counter('dsd_stage_failures_total', 'Detection stages that failed or timed out', ['stage'])
+
+# Seconds each I/O stage of a check may take before it is skipped
+STAGE_TIMEOUTS = {
+    'existing_scammer': 3.0,
+    'member_avatar': 5.0,
+    'protected_avatars': 10.0,
+    'server_config': 3.0
+}
+
+# Rule cost hints. Rules at COST_IO or above start as concurrent tasks before
+# the CPU rules run; quick (raid mode) checks skip rules above COST_IO.
+COST_CHEAP = 1
+COST_CPU = 2
+COST_IO = 10
+COST_HEAVY = 20
+
+
+class ProfileSnapshot(NamedTuple):
+    """Plain snapshot of a member profile, independent of the Discord client."""
+    id: int
+    name: str
+    nick: Optional[str]
+    global_name: Optional[str]
+    created_at: datetime
+    avatar_key: Optional[str]
+    statuses: Tuple[str, ...] = ()    # Custom status texts
+    role_names: Tuple[str, ...] = ()
+
+    def texts(self) -> List[str]:
+        """Free-text fields of the profile: custom statuses and the role names as one text."""
+        return list(self.statuses) + [' '.join(self.role_names)]
+
+
+class DetectionContext(NamedTuple):
+    """Guild-side inputs a profile is checked against.
+
+    The lookups are zero-argument callables returning awaitables, so the
+    bot can wire them to the database and CDN while benchmarks and batch
+    replays pass stored values.
+    """
+    guild_id: int
+    protected_names: ProtectedNameIndex
+    matcher: PatternMatcher
+    owner: Optional[ProfileSnapshot] = None
+    describe_protected: Callable[[int], str] = lambda member_id: "a staff member"
+    lookup_scammer: Callable[[], Awaitable[Optional[dict]]] = None
+    avatar_fingerprint: Callable[[], Awaitable[Optional[AvatarFingerprint]]] = None
+    protected_avatars: Callable[[], Awaitable[Optional[FingerprintMatrix]]] = None
+    scammer_avatars: Optional[ScammerAvatarIndex] = None
+
+
+class DetectionResult(NamedTuple):
+    """Outcome of checking a member."""
+    factors: List[str]
+    risk_level: int
+    timings: Dict[str, float]  # Rule or stage name -> milliseconds
+    parts: Dict[str, Tuple[List[str], int]]  # Rule -> (factors, risk) before the combination bonus
+    failed: Tuple[str, ...] = ()  # Stages that failed or timed out; the result is partial
+
+
+async def run_stage(stage: str, awaitable: Awaitable, timings: Dict[str, float], timeout: float = None,
+                    failed: Set[str] = None) -> Any:
+    """Await one I/O stage, recording its latency; a failed or slow stage yields None.
+
+    Failed stages are added to `failed` so partial results are not cached.
+    """
+    start = time.perf_counter()
+    try:
+        if timeout is None:
+            return await awaitable
+        # Shielded so a slow download still finishes and lands in the caches
+        return await asyncio.wait_for(asyncio.shield(awaitable), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Detection stage {stage} timed out after {timeout}s")
+    except Exception as e:
+        logger.error(f"Detection stage {stage} failed: {e}")
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[stage] = elapsed * 1000
+        STAGE_SECONDS.observe(elapsed, stage)
+    STAGE_FAILURES.inc(stage)
+    if failed is not None:
+        failed.add(stage)
+    return None
+
+
+class Evaluation:
+    """State of one profile check, handed to every rule."""
+
+    def __init__(self, profile: ProfileSnapshot, context: DetectionContext):
+        self.profile = profile
+        self.context = context
+        self.timings: Dict[str, float] = {}
+        self.failed: Set[str] = set()
+
+    async def stage(self, stage: str, awaitable: Awaitable, timeout: float = None) -> Any:
+        """Await one I/O stage of this check (see run_stage)."""
+        return await run_stage(stage, awaitable, self.timings, timeout, self.failed)
+
+
+RuleCheck = Callable[[Evaluation], Awaitable[Tuple[List[str], int]]]
+
+
+class Rule(NamedTuple):
+    """A registered detection rule."""
+    name: str
+    check: RuleCheck
+    cost: int = COST_CPU
+    check_name: Optional[str] = None  # enabled_checks entry that turns it on; None = always on
+
+
+async def check_existing(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """Stored scammer profile for this user."""
+    lookup = evaluation.context.lookup_scammer
+    if lookup is None:
+        return [], 0
+    existing_scammer = await evaluation.stage(
+        'existing_scammer', lookup(), STAGE_TIMEOUTS['existing_scammer'])
+    if existing_scammer:
+        return [f"Previously detected as scammer with score: {existing_scammer['detection_score']:.1%}"], 5
+    return [], 0
+
+
+async def check_account_age(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """New and recent accounts."""
+    account_age = datetime.now(timezone.utc) - evaluation.profile.created_at
+    if account_age.days < 7:
+        return [f"New account ({account_age.days} days old)"], 2
+    if account_age.days < 30:
+        return [f"Recent account ({account_age.days} days old)"], 1
+    return [], 0
+
+
+async def check_names(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """Username and nickname similarity to the owner and staff."""
+    profile, context = evaluation.profile, evaluation.context
+    factors, risk = [], 0
+
+    name_matches = [m for m in context.protected_names.match(profile.name) if m[0] != profile.id]
+    if name_matches:
+        target_id, name_similarity, name_reasons = name_matches[0]
+        target = context.describe_protected(target_id)
+        factors.append(f"Username similar to {target} ({name_similarity:.1%} match): {', '.join(name_reasons)}")
+        risk += 3
+
+    # Also check nickname if present
+    if profile.nick:
+        nick_matches = [m for m in context.protected_names.match(profile.nick) if m[0] != profile.id]
+        if nick_matches:
+            target_id, nick_similarity, nick_reasons = nick_matches[0]
+            target = context.describe_protected(target_id)
+            factors.append(f"Nickname similar to {target} ({nick_similarity:.1%} match): {', '.join(nick_reasons)}")
+            risk += 2
+    return factors, risk
+
+
+async def check_avatar(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """Avatar similarity to the owner and staff, and reuse of a known scammer's avatar."""
+    profile, context = evaluation.profile, evaluation.context
+    factors, risk = [], 0
+    if context.avatar_fingerprint is None:
+        return factors, risk
+
+    # Start the staff avatars while the member's own avatar is analysed
+    protected_task = None
+    if context.protected_avatars is not None:
+        protected_task = asyncio.ensure_future(context.protected_avatars())
+        protected_task.add_done_callback(_consume_result)
+    member_fingerprint = await evaluation.stage(
+        'member_avatar', context.avatar_fingerprint(), STAGE_TIMEOUTS['member_avatar'])
+    if not member_fingerprint:
+        evaluation.failed.add('member_avatar')
+        return factors, risk
+
+    # Avatar reused from a known scammer (matched by content, not CDN key)
+    scammer_matches = []
+    if context.scammer_avatars is not None:
+        stage_start = time.perf_counter()
+        scammer_matches = context.scammer_avatars.search(member_fingerprint, exclude_id=str(profile.id))
+        evaluation.timings['scammer_avatar_match'] = (time.perf_counter() - stage_start) * 1000
+
+    # Avatar comparison against owner and staff in one batch
+    if protected_task is not None:
+        protected_avatars = await evaluation.stage(
+            'protected_avatars', protected_task, STAGE_TIMEOUTS['protected_avatars'])
+        if protected_avatars is not None:
+            stage_start = time.perf_counter()
+            avatar_matches = [
+                match for match in protected_avatars.compare(member_fingerprint)
+                if match[0] != profile.id
+            ]
+            evaluation.timings['avatar_match'] = (time.perf_counter() - stage_start) * 1000
+            if avatar_matches:
+                target_id, similarity, reasons = avatar_matches[0]
+                target = context.describe_protected(target_id)
+                factors.append(
+                    f"Avatar similar to {target} ({similarity:.1%} match):\n" +
+                    "\n".join(f"• {r}" for r in reasons)
+                )
+                risk += len(reasons)  # More matching aspects = higher risk
+
+    if scammer_matches:
+        scammer_id, distance = scammer_matches[0]
+        factors.append(
+            f"Avatar matches a known scammer's avatar (user {scammer_id}, {distance} bits apart)"
+        )
+        risk += 3
+    return factors, risk
+
+
+async def check_profile_text(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """Custom status and role text similar to the server owner's."""
+    owner = evaluation.context.owner
+    if owner is None:
+        return [], 0
+    factors, risk = [], 0
+    owner_texts = owner.texts()
+    for member_text in evaluation.profile.texts():
+        for owner_text in owner_texts:
+            if member_text and owner_text:  # Skip empty texts
+                status_similarity = ratio(member_text.lower(), owner_text.lower())
+                if status_similarity > 0.6:
+                    factors.append(
+                        f"Profile text similar to server owner ({status_similarity:.1%} match)\n" +
+                        f"Owner text: '{owner_text}'\n" +
+                        f"Member text: '{member_text}'"
+                    )
+                    risk += 2
+    return factors, risk
+
+
+async def check_patterns(evaluation: Evaluation) -> Tuple[List[str], int]:
+    """Suspicious phrases in the name, nickname, statuses and roles."""
+    profile = evaluation.profile
+    all_text = [profile.name]
+    if profile.nick:
+        all_text.append(profile.nick)
+    all_text.extend(profile.texts())
+
+    factors, risk = [], 0
+    for text in all_text:
+        patterns = evaluation.context.matcher.find(text)
+        if patterns:
+            factors.append(f"Suspicious patterns in {text}: {', '.join(patterns)}")
+            risk += len(patterns)
+    return factors, risk
+
+
+# Built-in rules, in the order their factors are reported.
+# check_name ties a rule to the server's enabled_checks list.
+DEFAULT_RULES = (
+    Rule('existing', check_existing, COST_IO),
+    Rule('age', check_account_age, COST_CHEAP, 'profile'),
+    Rule('names', check_names, COST_CPU, 'username'),
+    Rule('avatar', check_avatar, COST_HEAVY, 'avatar'),
+    Rule('text', check_profile_text, COST_CPU, 'profile'),
+    Rule('patterns', check_patterns, COST_CPU),
+)
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    """Retrieve a background task's exception so it is not reported as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+class DetectionEngine:
+    """Runs registered detection rules over profile snapshots.
+
+    Rules at or above COST_IO start together as tasks, then the CPU rules
+    run cheapest first while those lookups are in flight. Factors are
+    reported in registration order, and each rule's wall time is recorded
+    under its name in the result timings.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = DEFAULT_RULES):
+        self.rules: Dict[str, Rule] = {}
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: Rule) -> None:
+        """Add a rule, or replace the rule of the same name in place."""
+        self.rules[rule.name] = rule
+
+    def unregister(self, name: str) -> None:
+        self.rules.pop(name, None)
+
+    def active_rules(self, enabled_checks: Iterable[str] = None, max_cost: int = None) -> List[Rule]:
+        """Rules that run under a server's enabled_checks and a cost ceiling."""
+        enabled = None if enabled_checks is None else set(enabled_checks)
+        return [
+            rule for rule in self.rules.values()
+            if (rule.check_name is None or enabled is None or rule.check_name in enabled)
+            and (max_cost is None or rule.cost <= max_cost)
+        ]
+
+    async def evaluate(self, profile: ProfileSnapshot, context: DetectionContext,
+                       enabled_checks: Iterable[str] = None, max_cost: int = None,
+                       reuse: DetectionResult = None, rerun: Iterable[str] = (),
+                       only: Iterable[str] = None) -> DetectionResult:
+        """Check a profile.
+
+        With `reuse`, the rule results of that earlier check are kept for
+        every active rule not named in `rerun`. With `only`, just the named
+        rules run and the result covers nothing else.
+        """
+        start = time.perf_counter()
+        evaluation = Evaluation(profile, context)
+        rules = self.active_rules(enabled_checks, max_cost)
+        if only is not None:
+            rules = [rule for rule in rules if rule.name in only]
+        parts = {}
+        if reuse is not None:
+            active = {rule.name for rule in rules}
+            parts = {name: part for name, part in reuse.parts.items() if name in active and name not in rerun}
+        pending = [rule for rule in rules if rule.name not in parts]
+
+        async def run(rule: Rule) -> Tuple[List[str], int]:
+            rule_start = time.perf_counter()
+            try:
+                return await rule.check(evaluation)
+            except Exception as e:
+                logger.error(f"Detection rule {rule.name} failed: {e}")
+                evaluation.failed.add(rule.name)
+                return [], 0
+            finally:
+                elapsed = time.perf_counter() - rule_start
+                evaluation.timings[rule.name] = elapsed * 1000
+                RULE_SECONDS.observe(elapsed, rule.name)
+
+        loop = asyncio.get_running_loop()
+        tasks = {rule.name: loop.create_task(run(rule)) for rule in pending if rule.cost >= COST_IO}
+        for rule in sorted((rule for rule in pending if rule.cost < COST_IO), key=lambda rule: rule.cost):
+            parts[rule.name] = await run(rule)
+        parts.update(zip(tasks, await asyncio.gather(*tasks.values())))
+
+        suspicious_factors, risk_level = [], 0
+        for rule in rules:
+            factors, risk = parts.get(rule.name, ([], 0))
+            suspicious_factors += factors
+            risk_level += risk
+
+        # Additional risk for combination of factors
+        if len(suspicious_factors) >= 3:
+            risk_level += 2  # Extra risk for multiple suspicious factors
+
+        evaluation.timings['total'] = (time.perf_counter() - start) * 1000
+        return DetectionResult(suspicious_factors, risk_level, evaluation.timings, parts,
+                               tuple(sorted(evaluation.failed)))
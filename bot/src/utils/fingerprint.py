@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+from PIL import Image
+import imagehash
+
+logger = logging.getLogger('dsd_bot.fingerprint')
+
+# Number of bits in each imagehash (8x8 hash grid)
+HASH_BITS = 64
+
+# Side length images are resized to before hashing
+FINGERPRINT_SIZE = 128
+
+
+class AvatarFingerprint(NamedTuple):
+    """Precomputed image hashes and color signature of an avatar."""
+    ahash: int
+    phash: int
+    dhash: int
+    colors: Tuple[Tuple[int, Tuple[int, int, int]], ...]
+
+
+try:
+    _popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def _popcount(value: int) -> int:
+        return bin(value).count('1')
+
+
+def hamming(hash1: int, hash2: int) -> int:
+    """Count the differing bits between two integer hashes."""
+    return _popcount(hash1 ^ hash2)
+
+
+def _hash_to_int(image_hash: imagehash.ImageHash) -> int:
+    """Convert an imagehash result to a plain integer."""
+    return int(str(image_hash), 16)
+
+
+def hash_to_hex(value: int) -> str:
+    """Format an integer hash as fixed-width hex for storage."""
+    return format(value, '016x')
+
+
+def fingerprint_from_hex(ahash: str, phash: str, dhash: str) -> Optional[AvatarFingerprint]:
+    """Rebuild a stored fingerprint (without colors) from hex hashes."""
+    if not (ahash and phash and dhash):
+        return None
+    return AvatarFingerprint(int(ahash, 16), int(phash, 16), int(dhash, 16), ())
+
+
+def get_dominant_colors(img: Image.Image) -> Tuple[Tuple[int, Tuple[int, int, int]], ...]:
+    """Return the three most common colors of an RGB image."""
+    img = img.resize((50, 50))  # Reduce size for faster processing
+    colors = img.getcolors(2500)  # Get all colors
+    if colors:
+        return tuple(sorted(colors, reverse=True)[:3])  # Top 3 colors
+    return ()
+
+
+def fingerprint_image(img: Image.Image) -> Optional[AvatarFingerprint]:
+    """Compute the hashes and color signature used for avatar comparison."""
+    if not img:
+        return None
+
+    # Convert to a fixed size and mode so fingerprints are comparable
+    resized = img.resize((FINGERPRINT_SIZE, FINGERPRINT_SIZE)).convert('RGB')
+    return AvatarFingerprint(
+        ahash=_hash_to_int(imagehash.average_hash(resized)),
+        phash=_hash_to_int(imagehash.phash(resized)),
+        dhash=_hash_to_int(imagehash.dhash(resized)),
+        colors=get_dominant_colors(resized)
+    )
+
+
+def compare_fingerprints(fp1: AvatarFingerprint, fp2: AvatarFingerprint) -> Tuple[float, List[str]]:
+    """Compare two avatar fingerprints and return score and reasons."""
+    if not fp1 or not fp2:
+        return 0.0, []
+
+    reasons = []
+    max_similarity = 0.0
+
+    # 1. Average Hash (overall similarity)
+    avg_similarity = 1 - hamming(fp1.ahash, fp2.ahash) / HASH_BITS
+
+    # 2. Perceptual Hash (resistant to minor modifications)
+    phash_similarity = 1 - hamming(fp1.phash, fp2.phash) / HASH_BITS
+
+    # 3. Difference Hash (edge detection based)
+    dhash_similarity = 1 - hamming(fp1.dhash, fp2.dhash) / HASH_BITS
+
+    # 4. Color analysis
+    color_similarity = 0
+    if fp1.colors and fp2.colors:
+        matches = sum(1 for c1 in fp1.colors for c2 in fp2.colors
+                      if abs(c1[1][0] - c2[1][0]) < 30 and  # R
+                         abs(c1[1][1] - c2[1][1]) < 30 and  # G
+                         abs(c1[1][2] - c2[1][2]) < 30)     # B
+        color_similarity = matches / max(len(fp1.colors), len(fp2.colors))
+
+    # Analyze results
+    if avg_similarity > 0.8:
+        reasons.append("very similar overall appearance")
+        max_similarity = max(max_similarity, avg_similarity)
+
+    if phash_similarity > 0.8:
+        reasons.append("similar after minor modifications")
+        max_similarity = max(max_similarity, phash_similarity)
+
+    if dhash_similarity > 0.8:
+        reasons.append("similar edge patterns")
+        max_similarity = max(max_similarity, dhash_similarity)
+
+    if color_similarity > 0.7:
+        reasons.append("similar color scheme")
+        max_similarity = max(max_similarity, color_similarity)
+
+    return max_similarity, reasons
+
+
+class FingerprintCache:
+    """Size-bounded LRU of avatar fingerprints keyed by avatar key."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, AvatarFingerprint]' = OrderedDict()
+
+    def get(self, avatar_key: str) -> Optional[AvatarFingerprint]:
+        """Get a cached fingerprint and mark it as recently used."""
+        fingerprint = self._entries.get(avatar_key)
+        if fingerprint is not None:
+            self._entries.move_to_end(avatar_key)
+        return fingerprint
+
+    def set(self, avatar_key: str, fingerprint: AvatarFingerprint) -> None:
+        """Store a fingerprint, evicting the least recently used entry."""
+        self._entries[avatar_key] = fingerprint
+        self._entries.move_to_end(avatar_key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ProtectedFingerprintCache:
+    """Per-guild cache of avatar fingerprints for protected members (owner and staff).
+
+    Entries are keyed by the member's avatar key, so a changed avatar never
+    returns a stale fingerprint. Listeners drop entries when an avatar changes.
+    """
+
+    def __init__(self):
+        # guild_id -> member_id -> (avatar_key, fingerprint)
+        self._guilds: Dict[int, Dict[int, Tuple[str, AvatarFingerprint]]] = {}
+
+    def get(self, guild_id: int, member_id: int, avatar_key: str) -> Optional[AvatarFingerprint]:
+        """Get a cached fingerprint if the member's avatar is unchanged."""
+        entry = self._guilds.get(guild_id, {}).get(member_id)
+        if entry and entry[0] == avatar_key:
+            return entry[1]
+        return None
+
+    def set(self, guild_id: int, member_id: int, avatar_key: str, fingerprint: AvatarFingerprint) -> None:
+        """Store a fingerprint for a protected member."""
+        self._guilds.setdefault(guild_id, {})[member_id] = (avatar_key, fingerprint)
+
+    def invalidate(self, guild_id: int, member_id: int) -> None:
+        """Drop a protected member's fingerprint in one guild."""
+        members = self._guilds.get(guild_id)
+        if members and members.pop(member_id, None):
+            logger.debug(f"Invalidated avatar fingerprint for {member_id} in guild {guild_id}")
+
+    def invalidate_user(self, member_id: int) -> None:
+        """Drop a user's fingerprint in every guild (global avatar change)."""
+        for guild_id in list(self._guilds):
+            self.invalidate(guild_id, member_id)
+
+    def clear_guild(self, guild_id: int) -> None:
+        """Drop all fingerprints for a guild."""
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,88 @@
+from typing import Hashable, Iterable, List, Tuple
+import numpy as np
+from .fingerprint import HASH_BITS, AvatarFingerprint
+
+# Per-method thresholds, in the order (ahash, phash, dhash, colors)
+_THRESHOLDS = np.array([0.8, 0.8, 0.8, 0.7])
+_REASONS = (
+    "very similar overall appearance",
+    "similar after minor modifications",
+    "similar edge patterns",
+    "similar color scheme"
+)
+
+# Placeholder for missing dominant colors; never within 30 of a real channel value
+_NO_COLOR = -1000
+
+if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        counts = _POPCOUNT_TABLE[values.view(np.uint8)]
+        return counts.reshape(values.shape + (8,)).sum(axis=-1)
+
+
+class FingerprintMatrix:
+    """Packed avatar fingerprints for comparing one avatar against many targets at once.
+
+    Hashes are stored as a uint64 matrix and dominant colors as an int16
+    array, so a comparison is a handful of vectorized operations no matter
+    how many targets there are. Scores and reasons match compare_fingerprints.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Hashable, AvatarFingerprint]]):
+        entries = [(key, fingerprint) for key, fingerprint in entries if fingerprint]
+        self.keys = [key for key, _ in entries]
+        self._key_set = set(self.keys)
+
+        self.hashes = np.array(
+            [[fp.ahash, fp.phash, fp.dhash] for _, fp in entries], dtype=np.uint64
+        ).reshape(-1, 3)
+        self.colors = np.full((len(entries), 3, 3), _NO_COLOR, dtype=np.int16)
+        self.color_counts = np.zeros(len(entries), dtype=np.int16)
+        for row, (_, fp) in enumerate(entries):
+            for column, (_, rgb) in enumerate(fp.colors[:3]):
+                self.colors[row, column] = rgb[:3]
+            self.color_counts[row] = len(fp.colors[:3])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._key_set
+
+    def similarities(self, fingerprint: AvatarFingerprint) -> np.ndarray:
+        """Per-target similarity for each method, shaped (targets, 4)."""
+        query = np.array([fingerprint.ahash, fingerprint.phash, fingerprint.dhash], dtype=np.uint64)
+        hash_similarity = 1 - _popcount(self.hashes ^ query) / HASH_BITS
+
+        color_similarity = np.zeros(len(self.keys))
+        if fingerprint.colors:
+            query_colors = np.array([rgb[:3] for _, rgb in fingerprint.colors[:3]], dtype=np.int16)
+            # (targets, target colors, query colors, channels)
+            diff = np.abs(self.colors[:, :, None, :] - query_colors[None, None, :, :])
+            matches = (diff < 30).all(axis=3).sum(axis=(1, 2))
+            denominator = np.maximum(self.color_counts, len(query_colors))
+            color_similarity = np.where(self.color_counts > 0, matches / denominator, 0.0)
+
+        return np.column_stack([hash_similarity, color_similarity])
+
+    def compare(self, fingerprint: AvatarFingerprint, threshold: float = 0.7,
+                limit: int = 5) -> List[Tuple[Hashable, float, List[str]]]:
+        """Return the best matching targets above threshold as (key, score, reasons)."""
+        if not fingerprint or not self.keys:
+            return []
+
+        similarities = self.similarities(fingerprint)
+        flags = similarities > _THRESHOLDS
+        scores = np.where(flags, similarities, 0.0).max(axis=1)
+
+        candidates = np.flatnonzero(scores > threshold)
+        best = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+        return [
+            (self.keys[row], float(scores[row]), [reason for reason, hit in zip(_REASONS, flags[row]) if hit])
+            for row in best
+        ]
@@ -0,0 +1,129 @@
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+from .fingerprint import AvatarFingerprint, hamming
+
+logger = logging.getLogger('dsd_bot.hash_index')
+
+# Max differing phash bits for an avatar to count as the same image.
+# Matches the 0.8 similarity threshold used by compare_fingerprints.
+DEFAULT_RADIUS = 12
+
+
+def _chunk_masks(bits: int, max_flips: int) -> List[int]:
+    """All masks of `bits` width with at most `max_flips` bits set."""
+    masks = [0]
+    for flips in range(1, max_flips + 1):
+        masks.extend(sum(1 << bit for bit in combo) for combo in combinations(range(bits), flips))
+    return masks
+
+
+class MultiIndexHashTable:
+    """Multi-index hash table over 64-bit hashes for Hamming radius search.
+
+    Each hash is split into CHUNKS 16-bit substrings with one table per
+    substring. Two hashes within radius r must agree to within r // CHUNKS
+    bits on at least one substring (pigeonhole), so a search probes each
+    table with every nearby substring value and only verifies those candidates.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, radius: int):
+        self.radius = radius
+        self._masks = _chunk_masks(self.CHUNK_BITS, radius // self.CHUNKS)
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(self.CHUNKS)]
+        self._ids: Dict[int, Set[str]] = {}
+
+    def _chunks(self, value: int) -> List[int]:
+        """Split a hash into its 16-bit substrings."""
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+
+    def add(self, value: int, item_id: str) -> None:
+        """Add a hash with an associated item id."""
+        ids = self._ids.get(value)
+        if ids is None:
+            ids = self._ids[value] = set()
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                table.setdefault(chunk, set()).add(value)
+        ids.add(item_id)
+
+    def discard(self, value: int, item_id: str) -> None:
+        """Remove an item id from a hash, dropping the hash once unused."""
+        ids = self._ids.get(value)
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if not ids:
+            del self._ids[value]
+            for table, chunk in zip(self._tables, self._chunks(value)):
+                bucket = table.get(chunk)
+                bucket.discard(value)
+                if not bucket:
+                    del table[chunk]
+
+    def search(self, value: int, radius: int = None) -> List[Tuple[int, int, Set[str]]]:
+        """Find all hashes within radius, as (distance, hash, ids) tuples."""
+        radius = self.radius if radius is None else min(radius, self.radius)
+
+        candidates = set()
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            probes = map(chunk.__xor__, self._masks)
+            candidates.update(*filter(None, map(table.get, probes)))
+
+        results = []
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance <= radius:
+                results.append((distance, candidate, self._ids[candidate]))
+        return results
+
+
+class ScammerAvatarIndex:
+    """In-memory index of known scammer avatar fingerprints.
+
+    Candidates are found through a multi-index hash table over perceptual
+    hashes, so a lookup costs a few thousand dict probes regardless of how
+    many scammers are known.
+    """
+
+    def __init__(self, radius: int = DEFAULT_RADIUS):
+        self.radius = radius
+        self._table = MultiIndexHashTable(radius)
+        self._fingerprints: Dict[str, AvatarFingerprint] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, discord_id: str, fingerprint: AvatarFingerprint) -> None:
+        """Add or replace a scammer's avatar fingerprint."""
+        if not fingerprint:
+            return
+        previous = self._fingerprints.get(discord_id)
+        if previous is not None:
+            self._table.discard(previous.phash, discord_id)
+        self._fingerprints[discord_id] = fingerprint
+        self._table.add(fingerprint.phash, discord_id)
+
+    def load(self, rows: Iterable[Tuple[str, AvatarFingerprint]]) -> None:
+        """Bulk add (discord_id, fingerprint) pairs."""
+        for discord_id, fingerprint in rows:
+            self.add(discord_id, fingerprint)
+        logger.info(f"Indexed {len(self._fingerprints)} known scammer avatars")
+
+    def search(self, fingerprint: AvatarFingerprint, radius: Optional[int] = None,
+               exclude_id: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Find scammers whose avatar is within radius bits, closest first."""
+        if not fingerprint:
+            return []
+        radius = self.radius if radius is None else radius
+
+        matches = [
+            (discord_id, distance)
+            for distance, _, ids in self._table.search(fingerprint.phash, radius)
+            for discord_id in ids
+            if discord_id != exclude_id
+        ]
+        return sorted(matches, key=lambda match: match[1])
@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+import asyncio
+import logging
+import os
+import time
+import aiohttp
+from .metrics import RATE_LIMIT_HITS, SIZE_BUCKETS, counter, histogram
+
+logger = logging.getLogger('dsd_bot.http')
+
+# Tunables (overridable from the environment)
+AVATAR_CACHE_MAX_BYTES = int(os.getenv('AVATAR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+AVATAR_CACHE_MAX_ENTRIES = int(os.getenv('AVATAR_CACHE_MAX_ENTRIES', 10000))
+AVATAR_FETCH_TIMEOUT = float(os.getenv('AVATAR_FETCH_TIMEOUT', 5))
+AVATAR_FETCH_SIZE = int(os.getenv('AVATAR_FETCH_SIZE', 128))  # Power of 2 between 16 and 4096
+AVATAR_MAX_DOWNLOAD = int(os.getenv('AVATAR_MAX_DOWNLOAD', 1024 * 1024))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 50))
+
+AVATAR_FETCH_SECONDS = histogram('dsd_avatar_fetch_seconds', 'Avatar download time', ['result'])
+AVATAR_FETCH_BYTES = histogram('dsd_avatar_fetch_bytes', 'Downloaded avatar size', buckets=SIZE_BUCKETS)
+AVATAR_CACHE_REQUESTS = counter('dsd_avatar_cache_requests_total', 'Avatar byte cache lookups', ['result'])
+
+
+class AvatarFetcher:
+    """Shared HTTP client for avatar downloads with a size-bounded LRU of avatar bytes.
+
+    One instance lives on the bot so every cog reuses the same pooled
+    connections. Cached entries are keyed by the Discord asset key, which
+    changes whenever the image does.
+    """
+
+    def __init__(self, max_bytes: int = AVATAR_CACHE_MAX_BYTES,
+                 max_entries: int = AVATAR_CACHE_MAX_ENTRIES,
+                 timeout: float = AVATAR_FETCH_TIMEOUT,
+                 pool_size: int = HTTP_POOL_SIZE,
+                 max_download: int = AVATAR_MAX_DOWNLOAD):
+        self.max_bytes = max_bytes
+        self.max_download = max_download
+        self.max_entries = max_entries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        """Get cached bytes and mark them as recently used."""
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+        return data
+
+    def _cache_put(self, key: str, data: bytes) -> None:
+        """Add bytes to the cache, evicting least recently used entries."""
+        if len(data) > self.max_bytes:
+            return
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_bytes -= len(old)
+        self._cache[key] = data
+        self._cache_bytes += len(data)
+        while self._cache_bytes > self.max_bytes or len(self._cache) > self.max_entries:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    async def _download(self, url: str) -> Optional[bytes]:
+        """Download raw bytes from a URL, giving up past max_download bytes."""
+        start = time.perf_counter()
+        result = 'error'
+        try:
+            async with self.session.get(url) as response:
+                if response.status != 200:
+                    if response.status == 429:
+                        RATE_LIMIT_HITS.inc('cdn')
+                    logger.warning(f"Avatar download returned HTTP {response.status}: {url}")
+                    return None
+                if response.content_length and response.content_length > self.max_download:
+                    logger.warning(f"Avatar too large ({response.content_length} bytes): {url}")
+                    return None
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > self.max_download:
+                        logger.warning(f"Avatar exceeded {self.max_download} bytes: {url}")
+                        return None
+                result = 'ok'
+                AVATAR_FETCH_BYTES.observe(len(data))
+                return bytes(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Avatar download failed for {url}: {e}")
+        finally:
+            AVATAR_FETCH_SECONDS.observe(time.perf_counter() - start, result)
+        return None
+
+    async def fetch(self, url: str, key: Optional[str] = None) -> Optional[bytes]:
+        """Fetch avatar bytes, serving repeated keys from the cache."""
+        if not url:
+            return None
+        url = str(url)
+        key = key or url
+
+        data = self._cache_get(key)
+        if data is not None:
+            self.hits += 1
+            AVATAR_CACHE_REQUESTS.inc('hit')
+            return data
+        self.misses += 1
+        AVATAR_CACHE_REQUESTS.inc('miss')
+
+        # Coalesce concurrent downloads of the same avatar
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            data = await self._download(url)
+            if data is not None:
+                self._cache_put(key, data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def fetch_avatar(self, asset, size: int = AVATAR_FETCH_SIZE) -> Optional[bytes]:
+        """Fetch a small static rendition of a Discord avatar asset."""
+        try:
+            # PNG of an animated avatar is its first frame
+            small = asset.replace(size=size, format='png')
+        except ValueError:
+            small = asset
+        return await self.fetch(small.url, f'{asset.key}:{size}')
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._cache),
+            'bytes': self._cache_bytes
+        }
+
+    async def close(self) -> None:
+        """Close the shared session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,106 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Optional
+import asyncio
+import logging
+import os
+from PIL import Image
+from .fingerprint import FINGERPRINT_SIZE, AvatarFingerprint, fingerprint_image
+
+logger = logging.getLogger('dsd_bot.image_analysis')
+
+# Tunables (overridable from the environment)
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+IMAGE_QUEUE_DEPTH = int(os.getenv('IMAGE_QUEUE_DEPTH', 64))
+
+
+def decode_avatar(data: bytes, size: int = FINGERPRINT_SIZE) -> Image.Image:
+    """Decode only as much of an avatar as fingerprinting needs.
+
+    JPEGs are decoded in draft mode at reduced scale, animated images only
+    decode their first frame, and large images are shrunk by an integer
+    factor that keeps them at least twice the fingerprint size.
+    """
+    img = Image.open(BytesIO(data))
+    img.draft('RGB', (size * 2, size * 2))  # No-op for formats other than JPEG
+    if getattr(img, 'is_animated', False):
+        img.seek(0)
+    factor = min(img.size) // (size * 2)
+    if factor > 1 and img.mode in ('L', 'RGB', 'RGBA'):  # Palette images can't be reduced
+        return img.reduce(factor)
+    img.load()
+    return img
+
+
+def analyze_avatar(data: bytes) -> Optional[AvatarFingerprint]:
+    """Decode raw avatar bytes and return their fingerprint (runs in a worker process)."""
+    if not data:
+        return None
+    try:
+        with decode_avatar(data) as img:
+            return fingerprint_image(img)
+    except Exception as e:
+        logger.warning(f"Could not analyze avatar: {e}")
+        return None
+
+
+class ImageAnalyzer:
+    """Runs avatar decoding and hashing outside the event loop.
+
+    Work goes to a process pool so PIL and imagehash never block gateway
+    heartbeats. At most ``max_pending`` jobs are queued on the pool; further
+    callers wait for a slot. Only with ``workers=0`` do jobs run in the
+    default thread executor.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS, max_pending: int = IMAGE_QUEUE_DEPTH):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_pending)
+
+    @property
+    def pool(self) -> Optional[ProcessPoolExecutor]:
+        """Get the process pool, starting it on first use."""
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    @property
+    def saturated(self) -> bool:
+        """Whether the pool already has a full backlog."""
+        return self._slots.locked()
+
+    async def fingerprint(self, data: bytes) -> Optional[AvatarFingerprint]:
+        """Fingerprint raw avatar bytes without blocking the event loop.
+
+        Waits while the pool's backlog is full.
+        """
+        if not data:
+            return None
+        loop = asyncio.get_running_loop()
+
+        if self.pool is None:
+            return await loop.run_in_executor(None, analyze_avatar, data)
+
+        async with self._slots:
+            pool = self.pool
+            try:
+                return await loop.run_in_executor(pool, analyze_avatar, data)
+            except BrokenProcessPool:
+                logger.error("Image analysis pool crashed, restarting it")
+                self._restart_pool(pool)
+                return await loop.run_in_executor(self.pool, analyze_avatar, data)
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a broken process pool (unless another job already did)."""
+        if self._pool is broken:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -2,7 +2,7 @@ import discord
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
-from .db import get_db
+from .db import get_db, log_mod_action
 from sqlalchemy import text
 
 logger = logging.getLogger('dsd_bot.logging')
@@ -74,27 +74,10 @@ class ActionLogger:
             await self.log_to_channel(guild, log_channel_id, embed)
 
             # Log to database
-            with get_db() as db:
-                query = text("""
-                    INSERT INTO mod_logs 
-                        (guild_id, target_id, moderator_id, action, reason, metadata)
-                    VALUES 
-                        (:guild_id, :target_id, :mod_id, :action, :reason, :metadata)
-                    RETURNING id;
-                """)
-                
-                result = db.execute(
-                    query,
-                    {
-                        'guild_id': str(guild.id),
-                        'target_id': str(target.id),
-                        'mod_id': str(moderator.id),
-                        'action': action_type,
-                        'reason': reason,
-                        'metadata': metadata
-                    }
-                )
-                return result.fetchone()[0]
+            return await log_mod_action(
+                str(guild.id), str(target.id), str(moderator.id),
+                action_type, reason, metadata=metadata
+            )
         except Exception as e:
             logger.error(f"Error logging moderation action: {e}")
             return None
@@ -141,7 +124,7 @@ class ActionLogger:
                              limit: int = 10) -> list:
         """Get a user's moderation history in a guild."""
         try:
-            with get_db() as db:
+            async with get_db() as db:
                 query = text("""
                     SELECT * FROM mod_logs 
                     WHERE guild_id = :guild_id AND target_id = :user_id 
@@ -149,7 +132,7 @@ class ActionLogger:
                     LIMIT :limit
                 """)
                 
-                result = db.execute(
+                result = await db.execute(
                     query,
                     {
                         'guild_id': guild_id,
@@ -157,7 +140,7 @@ class ActionLogger:
                         'limit': limit
                     }
                 )
-                return [dict(row) for row in result.fetchall()]
+                return [dict(row._mapping) for row in result.fetchall()]
         except Exception as e:
             logger.error(f"Error getting user history: {e}")
             return []
\ No newline at end of file
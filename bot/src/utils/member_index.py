@@ -0,0 +1,188 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import discord
+from Levenshtein import ratio
+from .name_index import qgrams
+from .names import normalize_unicode
+
+# Candidates scored per fuzzy lookup, and the minimum similarity reported
+FUZZY_CANDIDATES = 200
+FUZZY_THRESHOLD = 0.6
+MEMBER_INDEX_CHUNK = 500  # Members indexed between event loop yields by load()
+
+
+def member_name_keys(member: discord.Member) -> Set[str]:
+    """Lookup keys for a member: lowercased and normalized name, nick and global name."""
+    keys = set()
+    for value in (member.name, member.nick, member.global_name):
+        if value:
+            keys.add(value.lower())
+            keys.add(normalize_unicode(value).strip())
+    keys.discard('')
+    return keys
+
+
+class MemberNameIndex:
+    """Name lookup index for one guild's members.
+
+    Keys are kept in a sorted list for prefix search, and in a q-gram
+    index for fuzzy search that is only built on the first fuzzy lookup.
+    Keys no member uses any more stay in the q-gram postings until a
+    compaction, and are skipped when looked up.
+    """
+
+    def __init__(self, members: Iterable[discord.Member] = ()):
+        self._keys: List[Optional[str]] = []  # Key id -> key, None once unused
+        self._key_ids: Dict[str, int] = {}
+        self._key_members: Dict[int, Set[int]] = {}
+        self._member_keys: Dict[int, Tuple[int, ...]] = {}
+        self._sorted: List[str] = []
+        self._grams: Optional[Dict[str, List[int]]] = None
+        self._dead = 0
+        self._bulk = True  # Sort once after the initial load instead of per key
+        for member in members:
+            self.add(member)
+        self._sorted.sort()
+        self._bulk = False
+
+    async def load(self, members: Iterable[discord.Member], present: Callable[[int], bool] = None,
+                   chunk_size: int = MEMBER_INDEX_CHUNK) -> None:
+        """Index many members, yielding to the event loop every `chunk_size` members.
+
+        The index can be updated meanwhile, but must not be searched until
+        this returns. Members for which `present` returns False (they left
+        mid-load) are skipped.
+        """
+        self._bulk = True
+        try:
+            for position, member in enumerate(members, 1):
+                if present is None or present(member.id):
+                    self.add(member)
+                if position % chunk_size == 0:
+                    # Merging the new keys into the sorted ones is cheap; one sort at the end is not
+                    self._sorted.sort()
+                    await asyncio.sleep(0)
+        finally:
+            self._sorted.sort()
+            self._bulk = False
+
+    def __len__(self) -> int:
+        return len(self._member_keys)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._member_keys
+
+    def _key_id(self, key: str) -> int:
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self._keys)
+            self._keys.append(key)
+            self._key_ids[key] = key_id
+            self._key_members[key_id] = set()
+            if self._bulk:
+                self._sorted.append(key)
+            else:
+                insort(self._sorted, key)
+            if self._grams is not None:
+                for gram in qgrams(key):
+                    self._grams.setdefault(gram, []).append(key_id)
+        return key_id
+
+    def add(self, member: discord.Member) -> None:
+        """Index a member, replacing any previous entry for them."""
+        if member.id in self._member_keys:
+            self.remove(member.id)
+        key_ids = tuple(self._key_id(key) for key in member_name_keys(member))
+        for key_id in key_ids:
+            self._key_members[key_id].add(member.id)
+        self._member_keys[member.id] = key_ids
+
+    def update(self, member: discord.Member) -> None:
+        """Re-index a member whose names may have changed."""
+        if set(self._member_keys.get(member.id, ())) != {self._key_ids.get(k) for k in member_name_keys(member)}:
+            self.add(member)
+
+    def remove(self, member_id: int) -> None:
+        """Drop a member from the index."""
+        for key_id in self._member_keys.pop(member_id, ()):
+            members = self._key_members[key_id]
+            members.discard(member_id)
+            if not members:
+                key = self._keys[key_id]
+                del self._key_members[key_id]
+                del self._key_ids[key]
+                if self._bulk:
+                    self._sorted.remove(key)  # Not sorted yet
+                else:
+                    del self._sorted[bisect_left(self._sorted, key)]
+                self._keys[key_id] = None
+                self._dead += 1
+        if self._grams is not None and self._dead > 1000 and self._dead > len(self._key_ids):
+            self._build_grams()
+
+    def _build_grams(self) -> None:
+        """(Re)build the q-gram postings from the keys in use."""
+        self._grams = {}
+        for key, key_id in self._key_ids.items():
+            for gram in qgrams(key):
+                self._grams.setdefault(gram, []).append(key_id)
+        self._dead = 0
+
+    def _exact(self, key: str) -> Set[int]:
+        key_id = self._key_ids.get(key)
+        return self._key_members.get(key_id, set()) if key_id is not None else set()
+
+    def _prefixed(self, prefix: str, limit: int) -> List[str]:
+        keys = []
+        position = bisect_left(self._sorted, prefix)
+        while position < len(self._sorted) and len(keys) < limit and self._sorted[position].startswith(prefix):
+            keys.append(self._sorted[position])
+            position += 1
+        return keys
+
+    def _fuzzy(self, query: str) -> List[Tuple[float, str]]:
+        if self._grams is None:
+            self._build_grams()
+        counts = Counter()
+        for gram in qgrams(query):
+            counts.update(self._grams.get(gram, ()))
+        scored = []
+        for key_id, _ in counts.most_common(FUZZY_CANDIDATES):
+            key = self._keys[key_id]
+            if key is not None:
+                score = ratio(query, key)
+                if score >= FUZZY_THRESHOLD:
+                    scored.append((score, key))
+        return sorted(scored, reverse=True)
+
+    def find_exact(self, query: str) -> List[int]:
+        """Find member IDs whose name, nick or global name equals the query (case and accents aside)."""
+        return sorted(self._exact(query.strip().lower()) | self._exact(normalize_unicode(query).strip()))
+
+    def find(self, query: str, limit: int = 5) -> List[int]:
+        """Find member IDs by name: exact matches first, then prefix matches, then fuzzy matches."""
+        lowered = query.strip().lower()
+        normalized = normalize_unicode(query).strip()
+        if not lowered and not normalized:
+            return []
+
+        found: List[int] = []
+
+        def take(member_ids: Iterable[int]) -> bool:
+            for member_id in sorted(member_ids):
+                if member_id not in found:
+                    found.append(member_id)
+            return len(found) >= limit
+
+        if take(self._exact(lowered)) or take(self._exact(normalized)):
+            return found[:limit]
+        for prefix in dict.fromkeys((lowered, normalized)):
+            for key in self._prefixed(prefix, limit):
+                if take(self._key_members[self._key_ids[key]]):
+                    return found[:limit]
+        for _, key in self._fuzzy(normalized or lowered):
+            if take(self._key_members[self._key_ids[key]]):
+                break
+        return found[:limit]
@@ -1,9 +1,12 @@
 from typing import Optional, List, Dict
 import discord
 from datetime import datetime, timedelta
-from .db import get_db
+from .db import get_db, log_mod_action
+from .metrics import histogram, timed
 from sqlalchemy import text
 
+MOD_ACTION_SECONDS = histogram('dsd_moderation_action_seconds', 'Moderation action latency, DM and logging included', ['action'])
+
 class ModerationActions:
     def __init__(self, bot):
         self.bot = bot
@@ -12,32 +15,11 @@ class ModerationActions:
                         action: str, reason: str, duration: Optional[int] = None,
                         metadata: Optional[Dict] = None) -> bool:
         """Log a moderation action to the database."""
-        try:
-            with get_db() as db:
-                query = text("""
-                    INSERT INTO mod_logs 
-                        (guild_id, target_id, moderator_id, action, reason, duration, metadata)
-                    VALUES 
-                        (:guild_id, :target_id, :mod_id, :action, :reason, :duration, :metadata)
-                    RETURNING id;
-                """)
-                result = db.execute(
-                    query,
-                    {
-                        'guild_id': guild_id,
-                        'target_id': target_id,
-                        'mod_id': moderator_id,
-                        'action': action,
-                        'reason': reason,
-                        'duration': duration,
-                        'metadata': metadata
-                    }
-                )
-                return bool(result.fetchone())
-        except Exception as e:
-            print(f"Error logging moderation action: {e}")
-            return False
+        return bool(await log_mod_action(
+            guild_id, target_id, moderator_id, action, reason, duration, metadata
+        ))
 
+    @timed(MOD_ACTION_SECONDS, 'warn')
     async def warn_user(self, member: discord.Member, reason: str, 
                        moderator: Optional[discord.Member] = None) -> bool:
         """Warn a user and log the action."""
@@ -66,6 +48,7 @@ class ModerationActions:
             print(f"Error warning user: {e}")
             return False
 
+    @timed(MOD_ACTION_SECONDS, 'kick')
     async def kick_user(self, member: discord.Member, reason: str,
                        moderator: Optional[discord.Member] = None) -> bool:
         """Kick a user and log the action."""
@@ -97,6 +80,7 @@ class ModerationActions:
             print(f"Error kicking user: {e}")
             return False
 
+    @timed(MOD_ACTION_SECONDS, 'ban')
     async def ban_user(self, member: discord.Member, reason: str,
                       moderator: Optional[discord.Member] = None,
                       delete_message_days: int = 1) -> bool:
@@ -129,6 +113,7 @@ class ModerationActions:
             print(f"Error banning user: {e}")
             return False
 
+    @timed(MOD_ACTION_SECONDS, 'mute')
     async def mute_user(self, member: discord.Member, duration: int, reason: str,
                        moderator: Optional[discord.Member] = None) -> bool:
         """Timeout (mute) a user and log the action."""
@@ -168,15 +153,15 @@ class ModerationActions:
     async def get_recent_actions(self, guild_id: str, limit: int = 10) -> List[Dict]:
         """Get recent moderation actions for a guild."""
         try:
-            with get_db() as db:
+            async with get_db() as db:
                 query = text("""
                     SELECT * FROM mod_logs 
                     WHERE guild_id = :guild_id 
                     ORDER BY timestamp DESC 
                     LIMIT :limit
                 """)
-                result = db.execute(query, {'guild_id': guild_id, 'limit': limit})
-                return [dict(row) for row in result.fetchall()]
+                result = await db.execute(query, {'guild_id': guild_id, 'limit': limit})
+                return [dict(row._mapping) for row in result.fetchall()]
         except Exception as e:
             print(f"Error getting recent actions: {e}")
             return []
\ No newline at end of file
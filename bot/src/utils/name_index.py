@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, List, Set, Tuple
+from .names import NameVariants, name_variants, score_variants
+
+# Length of the substrings used to find fuzzy candidates
+QGRAM_SIZE = 3
+
+
+def qgrams(text: str, q: int = QGRAM_SIZE) -> Set[str]:
+    """Get the padded q-grams of a string (short names still get grams)."""
+    padded = '^' * (q - 1) + text + '$' * (q - 1)
+    return {padded[i:i + q] for i in range(len(padded) - q + 1)}
+
+
+class ProtectedNameIndex:
+    """Index of a guild's protected names (owner and staff) for impersonation checks.
+
+    Every protected name is stored with its precomputed variants. Exact hits
+    on the normalized, clean, leetspeak and deduplicated forms come from
+    hash maps; fuzzy candidates come from a q-gram inverted index over the
+    clean form. Only those candidates are scored, so a lookup costs the same
+    whether a guild has one moderator or hundreds.
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, str]] = ()):
+        self._entries: List[Tuple[int, NameVariants]] = []
+        self._member_ids: Set[int] = set()
+        self._exact: Dict[str, Dict[str, Set[int]]] = {
+            'normalized': {}, 'clean': {}, 'leet': {}, 'dedup': {}
+        }
+        self._grams: Dict[str, Set[int]] = {}
+        # Containment checks for names shorter than a q-gram
+        self._short_substrings: Dict[str, Set[int]] = {}
+        self._short_entries: Set[int] = set()
+        for member_id, name in names:
+            self.add(member_id, name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, member_id: int) -> bool:
+        return member_id in self._member_ids
+
+    def add(self, member_id: int, name: str) -> None:
+        """Add a protected name."""
+        if not name:
+            return
+        variants = name_variants(name)
+        position = len(self._entries)
+        self._entries.append((member_id, variants))
+        self._member_ids.add(member_id)
+        for field, table in self._exact.items():
+            table.setdefault(getattr(variants, field), set()).add(position)
+        clean = variants.clean
+        if clean:
+            for gram in qgrams(clean):
+                self._grams.setdefault(gram, set()).add(position)
+            for size in range(1, QGRAM_SIZE):
+                for i in range(len(clean) - size + 1):
+                    self._short_substrings.setdefault(clean[i:i + size], set()).add(position)
+            if len(clean) < QGRAM_SIZE:
+                self._short_entries.add(position)
+
+    def _candidates(self, variants: NameVariants) -> Set[int]:
+        """Find entry positions that could be similar to a name."""
+        candidates = set()
+        for field, table in self._exact.items():
+            candidates.update(table.get(getattr(variants, field), ()))
+        clean = variants.clean
+        if clean:
+            for gram in qgrams(clean):
+                candidates.update(self._grams.get(gram, ()))
+            # Short names share no full q-gram with names that contain them
+            if len(clean) < QGRAM_SIZE:
+                candidates.update(self._short_substrings.get(clean, ()))
+            candidates.update(
+                position for position in self._short_entries
+                if self._entries[position][1].clean in clean
+            )
+        return candidates
+
+    def match(self, name: str, threshold: float = 0.7) -> List[Tuple[int, float, List[str]]]:
+        """Find protected members whose names are similar, best first, as (member_id, score, reasons)."""
+        if not name or not self._entries:
+            return []
+        variants = name_variants(name)
+
+        best: Dict[int, Tuple[float, List[str]]] = {}
+        for position in self._candidates(variants):
+            member_id, protected = self._entries[position]
+            score, reasons = score_variants(variants, protected)
+            if score > threshold and score > best.get(member_id, (0.0,))[0]:
+                best[member_id] = (score, reasons)
+
+        return sorted(
+            ((member_id, score, reasons) for member_id, (score, reasons) in best.items()),
+            key=lambda match: -match[1]
+        )
@@ -0,0 +1,102 @@
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+import os
+import re
+from Levenshtein import ratio
+from .confusables import skeleton
+
+# Number/letter substitutions (0/O, l/I, etc.)
+CHAR_REPLACEMENTS = {
+    'o': '0',
+    'l': '1',
+    'i': '1',
+    'e': '3',
+    'a': '4',
+    's': '5',
+    't': '7',
+    'b': '8',
+    'g': '9'
+}
+LEET_TABLE = str.maketrans(CHAR_REPLACEMENTS)
+
+NON_ALNUM = re.compile(r'[^a-zA-Z0-9]')
+REPEATED_CHARS = re.compile(r'(.)\1+')
+
+# Distinct names whose variants are kept (overridable from the environment)
+NAME_CACHE_SIZE = int(os.getenv('NAME_CACHE_SIZE', 50000))
+
+
+def normalize_unicode(text: str) -> str:
+    """Normalize Unicode characters to their closest ASCII representation.
+
+    Uses the precompiled confusables skeleton table, which lowercases,
+    applies NFKD folding, maps lookalike letters and strips invisible
+    characters and combining marks in a single str.translate pass.
+    """
+    return skeleton(text)
+
+
+class NameVariants(NamedTuple):
+    """Precomputed forms of a name used for impersonation checks."""
+    lower: str       # Lowercased original
+    normalized: str  # Unicode tricks folded to ASCII
+    clean: str       # Normalized with only letters and digits kept
+    leet: str        # Clean with letters replaced by lookalike digits
+    dedup: str       # Clean with repeated characters collapsed
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def name_variants(name: str) -> NameVariants:
+    """Compute all comparison variants of a name.
+
+    Results are memoized, so protected names and each joiner's name are
+    only processed once however many comparisons they take part in.
+    """
+    normalized = normalize_unicode(name)
+    clean = NON_ALNUM.sub('', normalized)
+    leet = clean.translate(LEET_TABLE)
+    dedup = REPEATED_CHARS.sub(r'\1', clean)
+    return NameVariants(name.lower(), normalized, clean, leet, dedup)
+
+
+def score_variants(v1: NameVariants, v2: NameVariants) -> Tuple[float, List[str]]:
+    """Compare two precomputed names for similarity and return score and reasons."""
+    reasons = []
+
+    # Check for Unicode tricks
+    if v1.normalized != v1.lower or v2.normalized != v2.lower:
+        reasons.append("using special Unicode characters")
+        if v1.normalized == v2.normalized:
+            return 1.0, reasons
+
+    # Return 0 if one of the names is empty after cleaning
+    if not v1.clean or not v2.clean:
+        return 0.0, reasons
+
+    # Check for exact match after cleaning
+    if v1.clean == v2.clean:
+        reasons.append("identical after removing special characters")
+        return 1.0, reasons
+
+    # Check for character replacement (0/O, l/I, etc.)
+    if v1.leet == v2.leet:
+        reasons.append("identical after checking number/letter substitutions")
+        return 0.95, reasons
+
+    # Check for repeated characters (e.g., Hobo vs Hoboo)
+    if v1.dedup == v2.dedup:
+        reasons.append("identical after removing repeated characters")
+        return 0.9, reasons
+
+    # Calculate basic similarity
+    basic_ratio = ratio(v1.clean, v2.clean)
+
+    # Check for substring relationship
+    if v1.clean in v2.clean or v2.clean in v1.clean:
+        reasons.append("one name contains the other")
+        return max(basic_ratio, 0.8), reasons
+
+    if basic_ratio > 0.7:
+        reasons.append("general text similarity")
+
+    return basic_ratio, reasons
@@ -0,0 +1,124 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+from .names import normalize_unicode
+
+# Phrases checked in every guild
+DEFAULT_PATTERNS = [
+    "free nitro",
+    "steam gift",
+    "giveaway",
+    "claim your",
+    "discord staff",
+    "moderator application"
+]
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton over normalized suspicious phrases.
+
+    Finds every phrase contained in a text in a single pass over its
+    normalized form, so matching cost depends on the text length rather
+    than on how many phrases are loaded.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for pattern in patterns:
+            normalized = normalize_unicode(pattern).strip()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                self._insert(normalized, len(self.patterns))
+                self.patterns.append(pattern)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _insert(self, pattern: str, index: int) -> None:
+        """Add a normalized pattern to the trie."""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (index,)
+
+    def _link(self) -> None:
+        """Compute failure links and merged outputs breadth-first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> List[str]:
+        """Return every pattern found in the text, in pattern order."""
+        if not text or not self.patterns:
+            return []
+        goto, fail, output = self._goto, self._fail, self._output
+
+        found = set()
+        state = 0
+        for char in normalize_unicode(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return [self.patterns[index] for index in sorted(found)]
+
+
+class PatternRegistry:
+    """Compiled matchers for the global phrase list plus each guild's custom phrases.
+
+    Guilds without custom phrases share the global matcher. A guild's
+    matcher is rebuilt only when its phrase list (or the global list) changes.
+    """
+
+    def __init__(self, patterns: Iterable[str] = DEFAULT_PATTERNS):
+        self.global_matcher = PatternMatcher(patterns)
+        self._guilds: Dict[str, Tuple[Tuple[str, ...], PatternMatcher]] = {}
+
+    @property
+    def global_patterns(self) -> List[str]:
+        return self.global_matcher.patterns
+
+    def set_global_patterns(self, patterns: Iterable[str]) -> None:
+        """Replace the global phrase list and drop combined guild matchers."""
+        self.global_matcher = PatternMatcher(patterns)
+        self._guilds.clear()
+
+    def matcher_for(self, guild_id: str, custom_patterns: Iterable[str] = ()) -> PatternMatcher:
+        """Get the matcher for a guild, rebuilding it if its phrases changed."""
+        custom = tuple(custom_patterns or ())
+        if not custom:
+            self._guilds.pop(guild_id, None)
+            return self.global_matcher
+
+        cached = self._guilds.get(guild_id)
+        if cached and cached[0] == custom:
+            return cached[1]
+
+        matcher = PatternMatcher(self.global_matcher.patterns + list(custom))
+        self._guilds[guild_id] = (custom, matcher)
+        return matcher
+
+    def forget(self, guild_id: str) -> None:
+        """Drop a guild's combined matcher."""
+        self._guilds.pop(guild_id, None)
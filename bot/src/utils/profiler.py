@@ -0,0 +1,219 @@
+from collections import Counter, defaultdict
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import io
+import marshal
+import os
+import signal
+import threading
+import time
+
+# Seconds of CPU time between stack samples, and the longest profile a command may request
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+PROFILE_TASK_INTERVAL = 0.25  # Seconds between asyncio task snapshots
+PROFILE_MAX_SECONDS = 300
+
+FunctionKey = Tuple[str, int, str]  # (file, first line, name), as pstats keys functions
+ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+
+
+def _function_key(code: CodeType) -> FunctionKey:
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def _is_idle(stack: Tuple[CodeType, ...]) -> bool:
+    """Whether the loop thread was waiting in the selector for I/O."""
+    return bool(stack) and stack[-1].co_name == 'select' and stack[-1].co_filename.endswith('selectors.py')
+
+
+def _task_name(task: Optional[asyncio.Task]) -> str:
+    if task is None:
+        return '(no task)'
+    coro = task.get_coro()
+    return getattr(coro, '__qualname__', None) or repr(coro)
+
+
+def _await_point(task: asyncio.Task) -> Optional[str]:
+    """Where a suspended task is waiting: its innermost coroutine frame outside asyncio itself."""
+    coro = task.get_coro()
+    location = None
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        if not frame.f_code.co_filename.startswith(ASYNCIO_DIR):
+            location = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return location
+
+
+class SamplingProfiler:
+    """Statistical profiler for the running event loop.
+
+    A CPU-time interval timer (SIGPROF) interrupts the loop thread every
+    `interval` seconds of CPU used and records its Python stack and current
+    task; a loop callback snapshots the live asyncio tasks a few times a
+    second. Nothing is instrumented, so the cost is bounded by the sample
+    rate rather than growing with the work being done, and an idle bot is
+    hardly sampled at all. The timer fires wherever the loop happens to be,
+    so unlike a sampling thread it is not biased towards points where the
+    GIL is released.
+
+    Must be started on the main thread, which is where signal handlers run.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.loop = loop or asyncio.get_running_loop()
+        self.interval = interval
+        self._task_handle: Optional[asyncio.TimerHandle] = None
+        self._previous_handler = None
+        self._running = False
+
+        self.stacks: Counter = Counter()        # Tuple of code objects (outermost first) -> samples
+        self.running_tasks: Counter = Counter()  # Task coroutine -> samples it was running in
+        self.task_alive: Counter = Counter()     # Task coroutine -> snapshots it was alive in
+        self.await_points: Counter = Counter()   # Suspended task location -> snapshots
+        self.samples = 0
+        self.idle_samples = 0  # Loop waiting for I/O while other threads used the CPU
+        self.task_snapshots = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self._started = 0.0
+        self._cpu_started = 0.0
+
+    def start(self) -> None:
+        if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("Profiling needs the event loop on the main thread of a Unix process")
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._running = True
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self._task_handle = self.loop.call_soon(self._snapshot_tasks)
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self._running = False
+        if self._task_handle is not None:
+            self._task_handle.cancel()
+        self.wall_time = time.perf_counter() - self._started
+        self.cpu_time = time.process_time() - self._cpu_started
+
+    async def run(self, seconds: float) -> None:
+        """Profile for `seconds`, then stop."""
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack = tuple(reversed(stack))
+        self.samples += 1
+        if _is_idle(stack):
+            self.idle_samples += 1
+        else:
+            self.stacks[stack] += 1
+            self.running_tasks[_task_name(asyncio.current_task(self.loop))] += 1
+
+    def _snapshot_tasks(self) -> None:
+        self.task_snapshots += 1
+        for task in asyncio.all_tasks(self.loop):
+            self.task_alive[_task_name(task)] += 1
+            point = _await_point(task)
+            if point:
+                self.await_points[point] += 1
+        if self._running:
+            self._task_handle = self.loop.call_later(PROFILE_TASK_INTERVAL, self._snapshot_tasks)
+
+    def function_stats(self) -> Tuple[Counter, Counter, Dict[FunctionKey, Counter]]:
+        """Per-function self samples, inclusive samples and caller -> samples edges."""
+        self_samples, total_samples = Counter(), Counter()
+        callers: Dict[FunctionKey, Counter] = defaultdict(Counter)
+        for stack, count in self.stacks.items():
+            keys = [_function_key(code) for code in stack]
+            self_samples[keys[-1]] += count
+            for key in set(keys):
+                total_samples[key] += count
+            for caller, callee in zip(keys, keys[1:]):
+                callers[callee][caller] += count
+        return self_samples, total_samples, callers
+
+    def pstats_bytes(self) -> bytes:
+        """Samples in the marshal format pstats.Stats loads (times are samples x interval)."""
+        self_samples, total_samples, callers = self.function_stats()
+        stats = {}
+        for key, total in total_samples.items():
+            own = self_samples.get(key, 0)
+            edges = {
+                caller: (count, count, count * self.interval, count * self.interval)
+                for caller, count in callers.get(key, {}).items()
+            }
+            stats[key] = (total, total, own * self.interval, total * self.interval, edges)
+        return marshal.dumps(stats)
+
+    def collapsed_stacks(self) -> str:
+        """Samples as folded stacks, one 'outer;...;inner count' line each (flamegraph input)."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = ';'.join(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                              for code in stack)
+            lines.append(f"{frames} {count}")
+        return '\n'.join(lines)
+
+    def summary(self, limit: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        """Top entries of each table as (label, percent) pairs."""
+        busy = max(self.samples - self.idle_samples, 1)
+        self_samples, total_samples, _ = self.function_stats()
+
+        def label(key: FunctionKey) -> str:
+            file, line, name = key
+            return f"{name} ({os.path.basename(file)}:{line})"
+
+        snapshots = max(self.task_snapshots, 1)
+        return {
+            'self': [(label(k), 100 * n / busy) for k, n in self_samples.most_common(limit)],
+            'total': [(label(k), 100 * n / busy) for k, n in total_samples.most_common(limit)],
+            'running_tasks': [(name, 100 * n / busy) for name, n in self.running_tasks.most_common(limit)],
+            # Average number of live tasks of each kind
+            'live_tasks': [(name, n / snapshots) for name, n in self.task_alive.most_common(limit)],
+            'await_points': [(point, n / snapshots) for point, n in self.await_points.most_common(limit)],
+        }
+
+    def loop_busy(self) -> float:
+        """Estimated share of wall time the loop thread spent running code."""
+        if not self.wall_time:
+            return 0.0
+        return min(1.0, (self.samples - self.idle_samples) * self.interval / self.wall_time)
+
+    def report(self) -> str:
+        """Full text report: every table untruncated, then the folded stacks."""
+        out = io.StringIO()
+        out.write(f"Wall time: {self.wall_time:.1f}s  CPU time: {self.cpu_time:.1f}s "
+                  f"({100 * self.cpu_time / max(self.wall_time, 1e-9):.0f}% of one core)\n")
+        out.write(f"Samples: {self.samples} every {self.interval * 1000:.1f}ms of CPU, "
+                  f"loop busy {100 * self.loop_busy():.1f}% of wall time\n")
+        tables = self.summary(limit=None)
+        titles = {
+            'self': 'Functions by own time (% of busy samples)',
+            'total': 'Functions by inclusive time (% of busy samples)',
+            'running_tasks': 'Tasks by time running on the loop (% of busy samples)',
+            'live_tasks': 'Live tasks (average count)',
+            'await_points': 'Where live tasks are waiting (average count)',
+        }
+        for name, title in titles.items():
+            out.write(f"\n{title}\n")
+            for entry, value in tables[name]:
+                out.write(f"{value:10.2f}  {entry}\n")
+        out.write("\nFolded stacks\n")
+        out.write(self.collapsed_stacks())
+        out.write('\n')
+        return out.getvalue()
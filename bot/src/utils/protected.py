@@ -0,0 +1,65 @@
+from typing import Dict, List, Set
+import discord
+
+# Permissions that make a member a likely impersonation target
+STAFF_PERMISSIONS = ('administrator', 'manage_guild', 'ban_members', 'kick_members', 'manage_messages')
+
+# Upper bound on protected members per guild, owner first
+MAX_PROTECTED_MEMBERS = 200
+
+
+def is_staff_role(role: discord.Role) -> bool:
+    """Check if a role grants any staff permission."""
+    permissions = role.permissions
+    return any(getattr(permissions, name) for name in STAFF_PERMISSIONS)
+
+
+def has_staff_role(member: discord.Member) -> bool:
+    """Check if a human member holds a staff role other than @everyone."""
+    return not member.bot and any(is_staff_role(role) for role in member.roles if not role.is_default())
+
+
+class StaffDirectory:
+    """Staff member IDs per guild, kept current from member and role events.
+
+    The first lookup in a guild scans its members once. After that, role
+    changes update the set directly, so listing a guild's staff costs
+    O(staff) rather than O(members). A role gaining or losing staff
+    permissions drops the guild's set, to be rescanned on next use.
+    """
+
+    def __init__(self):
+        self._staff: Dict[int, Set[int]] = {}
+
+    def members(self, guild: discord.Guild) -> List[discord.Member]:
+        """Get the guild owner and every human member holding a staff role."""
+        staff = self._staff.get(guild.id)
+        if staff is None:
+            staff = self._staff[guild.id] = {member.id for member in guild.members if has_staff_role(member)}
+        members = [guild.owner] if guild.owner else []
+        for member_id in sorted(staff):
+            if len(members) >= MAX_PROTECTED_MEMBERS:
+                break
+            member = guild.get_member(member_id)
+            if member is not None and member.id != guild.owner_id:
+                members.append(member)
+        return members
+
+    def update_member(self, member: discord.Member) -> None:
+        """Record a member's staff status after their roles changed."""
+        staff = self._staff.get(member.guild.id)
+        if staff is None:
+            return
+        if has_staff_role(member):
+            staff.add(member.id)
+        else:
+            staff.discard(member.id)
+
+    def remove_member(self, guild_id: int, member_id: int) -> None:
+        staff = self._staff.get(guild_id)
+        if staff is not None:
+            staff.discard(member_id)
+
+    def forget(self, guild_id: int) -> None:
+        """Drop a guild's staff set; it is rescanned on next use."""
+        self._staff.pop(guild_id, None)
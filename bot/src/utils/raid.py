@@ -0,0 +1,150 @@
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger('dsd_bot.raid')
+
+# Tunables (overridable from the environment)
+RAID_WORKERS = int(os.getenv('RAID_WORKERS', 4))
+RAID_QUEUE_SIZE = int(os.getenv('RAID_QUEUE_SIZE', 500))
+RAID_MAX_DEFERRED = int(os.getenv('RAID_MAX_DEFERRED', 5000))  # Per guild
+
+
+class RaidMonitor:
+    """Per-guild join-rate detector.
+
+    A guild enters raid mode when `threshold` joins arrive within `window`
+    seconds, and stays in it until the rate has been below the threshold
+    for `cooldown` seconds.
+    """
+
+    def __init__(self):
+        self._joins: Dict[int, Deque[float]] = {}
+        self._raid_until: Dict[int, float] = {}
+
+    def record_join(self, guild_id: int, threshold: int, window: float, cooldown: float,
+                    now: float = None) -> bool:
+        """Record a join and return whether the guild is in raid mode."""
+        now = time.monotonic() if now is None else now
+        joins = self._joins.setdefault(guild_id, deque())
+        joins.append(now)
+        while joins and joins[0] <= now - window:
+            joins.popleft()
+        if len(joins) >= threshold:
+            self._raid_until[guild_id] = now + cooldown
+        return self.in_raid(guild_id, now)
+
+    def in_raid(self, guild_id: int, now: float = None) -> bool:
+        """Check if a guild is currently in raid mode."""
+        until = self._raid_until.get(guild_id)
+        if until is None:
+            return False
+        if (time.monotonic() if now is None else now) < until:
+            return True
+        del self._raid_until[guild_id]
+        return False
+
+    def join_rate(self, guild_id: int) -> int:
+        """Number of joins in the guild's current window."""
+        return len(self._joins.get(guild_id, ()))
+
+    def forget(self, guild_id: int) -> None:
+        self._joins.pop(guild_id, None)
+        self._raid_until.pop(guild_id, None)
+
+
+class JoinQueue:
+    """Bounded queue of join checks processed by a fixed number of workers.
+
+    A raid cannot spawn more concurrent checks, avatar downloads or
+    database sessions than there are workers. Event listeners use
+    put_nowait() and deal with a full queue themselves, since discord.py
+    runs every event in its own task and waiting would only park those;
+    put() waits for room and suits a single producer such as a loop task.
+    """
+
+    def __init__(self, handler: Callable[..., Awaitable[Any]], workers: int = RAID_WORKERS,
+                 maxsize: int = RAID_QUEUE_SIZE):
+        self._handler = handler
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._tasks: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def put(self, *args) -> None:
+        """Queue a check, waiting for room if the queue is full."""
+        self.start()
+        await self._queue.put(args)
+
+    def put_nowait(self, *args) -> bool:
+        """Queue a check if there is room; returns False if the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait(args)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            args = await self._queue.get()
+            try:
+                await self._handler(*args)
+            except Exception as e:
+                logger.error(f"Error processing queued join: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued checks are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+class DeferredChecks:
+    """Members whose full check was postponed during a raid, oldest first per guild."""
+
+    def __init__(self, max_per_guild: int = RAID_MAX_DEFERRED):
+        self.max_per_guild = max_per_guild
+        self._guilds: Dict[int, 'OrderedDict[int, int]'] = {}
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self._guilds.values())
+
+    def add(self, guild_id: int, member_id: int, risk_level: Optional[int]) -> None:
+        """Remember a member and the risk level found by the quick check (None if not checked yet)."""
+        members = self._guilds.setdefault(guild_id, OrderedDict())
+        members[member_id] = risk_level
+        if len(members) > self.max_per_guild:
+            dropped, _ = members.popitem(last=False)
+            logger.warning(f"Deferred check queue full in guild {guild_id}, dropped member {dropped}")
+
+    def discard(self, guild_id: int, member_id: int) -> None:
+        self._guilds.get(guild_id, {}).pop(member_id, None)
+
+    def guilds(self) -> List[int]:
+        return [guild_id for guild_id, members in self._guilds.items() if members]
+
+    def pop(self, guild_id: int, limit: int) -> List[tuple]:
+        """Take up to limit (member_id, quick risk level or None) pairs for a guild."""
+        members = self._guilds.get(guild_id)
+        taken = []
+        while members and len(taken) < limit:
+            taken.append(members.popitem(last=False))
+        if not members:
+            self._guilds.pop(guild_id, None)
+        return taken
+
+    def clear_guild(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+
+# Pending additions merged into the sorted array once there are this many
+MERGE_THRESHOLD = 1024
+
+
+class KnownScammerSet:
+    """Exact membership set of known scammer Discord IDs.
+
+    IDs live in a sorted int64 array (8 bytes each) searched with binary
+    search, plus a small set of recent additions that is merged in once it
+    grows. last_updated tracks the newest profile timestamp seen, so a
+    refresh only has to fetch profiles changed since the previous one.
+    """
+
+    def __init__(self):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._recent = set()
+        self.last_updated: Optional[datetime] = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._recent)
+
+    def __contains__(self, discord_id: Union[int, str]) -> bool:
+        discord_id = int(discord_id)
+        if discord_id in self._recent:
+            return True
+        position = np.searchsorted(self._ids, discord_id)
+        return position < len(self._ids) and self._ids[position] == discord_id
+
+    def add(self, discord_id: Union[int, str]) -> None:
+        """Add a single ID, e.g. right after storing a new detection."""
+        discord_id = int(discord_id)
+        if discord_id not in self:
+            self._recent.add(discord_id)
+            if len(self._recent) >= MERGE_THRESHOLD:
+                self._merge()
+
+    def _merge(self) -> None:
+        """Fold recent additions into the sorted array."""
+        if self._recent:
+            recent = np.fromiter(self._recent, dtype=np.int64, count=len(self._recent))
+            self._ids = np.union1d(self._ids, recent)
+            self._recent.clear()
+
+    def _note_updated(self, updated: Optional[datetime]) -> None:
+        if updated is not None and (self.last_updated is None or updated > self.last_updated):
+            self.last_updated = updated
+
+    def load(self, rows: Iterable[Tuple[str, Optional[datetime]]]) -> None:
+        """Replace the set with (discord_id, last_updated) rows."""
+        ids = []
+        self.last_updated = None
+        for discord_id, updated in rows:
+            ids.append(int(discord_id))
+            self._note_updated(updated)
+        self._ids = np.unique(np.array(ids, dtype=np.int64))
+        self._recent.clear()
+        self.loaded = True
+
+    def update(self, rows: Iterable[Tuple[str, Optional[datetime]]]) -> int:
+        """Add (discord_id, last_updated) rows from an incremental refresh; returns how many were new."""
+        before = len(self)
+        for discord_id, updated in rows:
+            self.add(discord_id)
+            self._note_updated(updated)
+        self._merge()
+        return len(self) - before
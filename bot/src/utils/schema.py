@@ -0,0 +1,78 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, JSON, MetaData, String, Table
+
+# Tables the bot reads and writes, mirroring the API's models.
+# Used for bulk writes and to create the schema on the SQLite stand-in.
+metadata = MetaData()
+
+scammer_profiles = Table(
+    'scammer_profiles', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('discord_id', String, unique=True, nullable=False),
+    Column('first_detected', DateTime),
+    Column('last_updated', DateTime),
+    Column('username', String),
+    Column('avatar_hash', String),
+    Column('avatar_ahash', String),
+    Column('avatar_phash', String),
+    Column('avatar_dhash', String),
+    Column('profile_data', JSON(none_as_null=True)),  # Empty profiles are stored as SQL NULL
+    Column('detection_score', Float),
+    Column('detection_reasons', JSON)
+)
+
+detection_events = Table(
+    'detection_events', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('scammer_id', Integer, ForeignKey('scammer_profiles.id')),
+    Column('guild_id', String, nullable=False),
+    Column('detected_at', DateTime),
+    Column('similarity_score', Float),
+    Column('matched_features', JSON),
+    Column('action_taken', String)
+)
+
+server_configs = Table(
+    'server_configs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('guild_id', String, unique=True, nullable=False),
+    Column('min_detection_score', Float, default=0.7),
+    Column('enabled_checks', JSON),
+    Column('custom_patterns', JSON),
+    Column('raid_join_threshold', Integer),
+    Column('raid_window_seconds', Integer),
+    Column('raid_cooldown_seconds', Integer),
+    Column('auto_actions', JSON),
+    Column('alert_channel', String),
+    Column('trusted_roles', JSON),
+    Column('immune_roles', JSON),
+    Column('log_channel', String),
+    Column('log_level', String, server_default='INFO')
+)
+
+mod_logs = Table(
+    'mod_logs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('guild_id', String, nullable=False),
+    Column('target_id', String, nullable=False),
+    Column('moderator_id', String, nullable=False),
+    Column('action', String, nullable=False),
+    Column('reason', String),
+    Column('timestamp', DateTime),
+    Column('duration', Integer),
+    Column('metadata', JSON)
+)
+
+scan_checkpoints = Table(
+    'scan_checkpoints', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('guild_id', String, unique=True, nullable=False),
+    Column('last_member_id', String),
+    Column('scanned', Integer, default=0),
+    Column('flagged', Integer, default=0),
+    Column('total', Integer),
+    Column('channel_id', String),
+    Column('message_id', String),
+    Column('started_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('finished_at', DateTime)
+)
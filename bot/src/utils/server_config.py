@@ -1,11 +1,37 @@
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
 import json
-from .db import get_db
-from sqlalchemy import text
+import logging
+import os
+import time
+from .db import conflict_insert, get_db
+from .schema import server_configs
+from sqlalchemy import bindparam, text
+
+logger = logging.getLogger('dsd_bot.server_config')
+
+# Shared config cache tunables (overridable from the environment)
+CONFIG_CACHE_TTL = float(os.getenv('CONFIG_CACHE_TTL', 300))
+CONFIG_CACHE_MAX_ENTRIES = int(os.getenv('CONFIG_CACHE_MAX_ENTRIES', 10000))
+CONFIG_RETRY_TTL = 30  # Seconds to keep defaults after a failed load
+CONFIG_PRELOAD_CHUNK = 5000  # Guild IDs per bulk query
+
+# Columns stored as JSON; drivers return them as text for raw queries
+JSON_FIELDS = ('enabled_checks', 'auto_actions', 'trusted_roles', 'immune_roles', 'custom_patterns')
+
+def _decode_row(row) -> Dict:
+    """Turn a server_configs row into a config dict with JSON fields decoded and NULLs dropped."""
+    config = {key: value for key, value in row._mapping.items() if value is not None}
+    for key in JSON_FIELDS:
+        if isinstance(config.get(key), str):
+            config[key] = json.loads(config[key])
+    return config
 
 class ServerConfig:
-    def __init__(self, guild_id: str):
+    def __init__(self, guild_id: str, cache: 'ServerConfigCache' = None):
         self.guild_id = guild_id
+        self.cache = cache  # Shared cache to refresh on save
         self.default_config = {
             'min_detection_score': 0.7,
             'enabled_checks': ['username', 'avatar', 'profile'],
@@ -18,19 +44,30 @@ class ServerConfig:
             'trusted_roles': [],
             'immune_roles': [],
             'log_channel': None,
-            'log_level': 'INFO'
+            'log_level': 'INFO',
+            'custom_patterns': [],
+            'raid_join_threshold': 10,     # Joins within the window that start raid mode (0 disables)
+            'raid_window_seconds': 10,
+            'raid_cooldown_seconds': 120   # Quiet time before raid mode ends
         }
         self._config = None
 
+    @classmethod
+    def from_row(cls, guild_id: str, row, cache: 'ServerConfigCache' = None) -> 'ServerConfig':
+        """Build a config from a server_configs row loaded elsewhere."""
+        config = cls(guild_id, cache)
+        config._config = {**config.default_config, **_decode_row(row)}
+        return config
+
     async def load(self) -> Dict:
         """Load server configuration from database."""
         try:
-            with get_db() as db:
+            async with get_db() as db:
                 query = text("""
                     SELECT * FROM server_configs 
                     WHERE guild_id = :guild_id
                 """)
-                result = db.execute(query, {'guild_id': self.guild_id})
+                result = await db.execute(query, {'guild_id': self.guild_id})
                 config = result.fetchone()
                 
                 if not config:
@@ -42,7 +79,7 @@ class ServerConfig:
                             (:guild_id, :score, :checks, :actions)
                         RETURNING *;
                     """)
-                    result = db.execute(
+                    result = await db.execute(
                         query,
                         {
                             'guild_id': self.guild_id,
@@ -53,7 +90,7 @@ class ServerConfig:
                     )
                     config = result.fetchone()
                 
-                self._config = dict(config)
+                self._config = {**self.default_config, **_decode_row(config)}
                 return self._config
         except Exception as e:
             print(f"Error loading config: {e}")
@@ -62,7 +99,7 @@ class ServerConfig:
     async def save(self) -> bool:
         """Save current configuration to database."""
         try:
-            with get_db() as db:
+            async with get_db() as db:
                 query = text("""
                     UPDATE server_configs 
                     SET 
@@ -73,10 +110,14 @@ class ServerConfig:
                         trusted_roles = :trusted,
                         immune_roles = :immune,
                         log_channel = :log_ch,
-                        log_level = :log_lvl
+                        log_level = :log_lvl,
+                        custom_patterns = :patterns,
+                        raid_join_threshold = :raid_joins,
+                        raid_window_seconds = :raid_window,
+                        raid_cooldown_seconds = :raid_cooldown
                     WHERE guild_id = :guild_id
                 """)
-                db.execute(
+                await db.execute(
                     query,
                     {
                         'guild_id': self.guild_id,
@@ -87,14 +128,28 @@ class ServerConfig:
                         'trusted': json.dumps(self._config['trusted_roles']),
                         'immune': json.dumps(self._config['immune_roles']),
                         'log_ch': self._config['log_channel'],
-                        'log_lvl': self._config['log_level']
+                        'log_lvl': self._config['log_level'],
+                        'patterns': json.dumps(self._config.get('custom_patterns') or []),
+                        'raid_joins': self.get('raid_join_threshold'),
+                        'raid_window': self.get('raid_window_seconds'),
+                        'raid_cooldown': self.get('raid_cooldown_seconds')
                     }
                 )
-                return True
+            # Write through so every cog sees the saved settings
+            if self.cache is not None:
+                self.cache.put(self)
+            return True
         except Exception as e:
             print(f"Error saving config: {e}")
+            if self.cache is not None:
+                self.cache.invalidate(self.guild_id)
             return False
 
+    @property
+    def loaded(self) -> bool:
+        """Whether settings came from the database rather than defaults."""
+        return self._config is not None
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value."""
         if self._config is None:
@@ -129,4 +184,140 @@ class ServerConfig:
     def is_trusted(self, member_roles: List[int]) -> bool:
         """Check if a member has trusted role."""
         trusted_roles = self.get('trusted_roles', [])
-        return any(role.id in trusted_roles for role in member_roles)
\ No newline at end of file
+        return any(role.id in trusted_roles for role in member_roles)
+
+
+async def load_server_configs(guild_ids: List[str], cache: 'ServerConfigCache' = None) -> Dict[str, ServerConfig]:
+    """Load many guilds' configs at once, creating missing defaults in one bulk insert."""
+    select_query = text("SELECT * FROM server_configs WHERE guild_id IN :guild_ids").bindparams(
+        bindparam('guild_ids', expanding=True)
+    )
+    defaults = ServerConfig('').default_config
+    configs = {}
+    async with get_db() as db:
+        for start in range(0, len(guild_ids), CONFIG_PRELOAD_CHUNK):
+            chunk = guild_ids[start:start + CONFIG_PRELOAD_CHUNK]
+            rows = (await db.execute(select_query, {'guild_ids': chunk})).fetchall()
+            found = {row.guild_id: row for row in rows}
+
+            missing = [guild_id for guild_id in chunk if guild_id not in found]
+            if missing:
+                insert = conflict_insert(server_configs).values([
+                    {
+                        'guild_id': guild_id,
+                        'min_detection_score': defaults['min_detection_score'],
+                        'enabled_checks': defaults['enabled_checks'],
+                        'auto_actions': defaults['auto_actions']
+                    }
+                    for guild_id in missing
+                ]).on_conflict_do_nothing(index_elements=[server_configs.c.guild_id])
+                await db.execute(insert)
+                # Re-read so rows created concurrently by another process are picked up too
+                rows = (await db.execute(select_query, {'guild_ids': missing})).fetchall()
+                found.update((row.guild_id, row) for row in rows)
+
+            for guild_id, row in found.items():
+                configs[guild_id] = ServerConfig.from_row(guild_id, row, cache)
+    return configs
+
+
+class ServerConfigCache:
+    """Server configs shared by every cog, with TTL, LRU size bound and single-flight loads.
+
+    Concurrent requests for a guild that is not cached wait for one load
+    instead of each querying the database. ServerConfig.save() writes its
+    object back here, so a change made by one cog is seen by all of them.
+    """
+
+    def __init__(self, ttl: float = CONFIG_CACHE_TTL, max_entries: int = CONFIG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, ServerConfig]]' = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, guild_id: str) -> bool:
+        entry = self._entries.get(guild_id)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, config: ServerConfig, ttl: float = None) -> None:
+        """Cache a config, evicting the least recently used ones past the size bound."""
+        config.cache = self
+        self._entries[config.guild_id] = (time.monotonic() + (self.ttl if ttl is None else ttl), config)
+        self._entries.move_to_end(config.guild_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, guild_id: str) -> None:
+        """Drop a guild's config so the next get reloads it."""
+        self._entries.pop(guild_id, None)
+
+    async def get(self, guild_id: str) -> ServerConfig:
+        """Get a guild's config, loading it once if missing or expired."""
+        entry = self._entries.get(guild_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(guild_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+
+        loading = self._loading.get(guild_id)
+        if loading is not None:
+            config = await asyncio.shield(loading)
+            if config is not None:
+                return config
+            # A failed preload leaves the guild to be loaded on its own
+            loading = self._loading.get(guild_id)
+            if loading is not None:
+                return await asyncio.shield(loading)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[guild_id] = future
+        try:
+            config = ServerConfig(guild_id, cache=self)
+            await config.load()
+            # Retry soon if the database was unavailable
+            self.put(config, None if config.loaded else min(self.ttl, CONFIG_RETRY_TTL))
+            future.set_result(config)
+            return config
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't report it as unretrieved
+            raise
+        finally:
+            del self._loading[guild_id]
+
+    async def preload(self, guild_ids: List[str]) -> int:
+        """Fill the cache for many guilds with one bulk load.
+
+        Gets for these guilds that arrive meanwhile wait for the bulk load
+        instead of querying on their own. Returns how many configs were loaded.
+        """
+        pending = {}
+        for guild_id in guild_ids:
+            if guild_id not in self and guild_id not in self._loading and guild_id not in pending:
+                pending[guild_id] = asyncio.get_running_loop().create_future()
+        self._loading.update(pending)
+        try:
+            configs = await load_server_configs(list(pending), self) if pending else {}
+            for guild_id, config in configs.items():
+                self.put(config)
+                pending[guild_id].set_result(config)
+            logger.info(f"Preloaded {len(configs)} server configs")
+            return len(configs)
+        except Exception as e:
+            logger.error(f"Error preloading server configs: {e}")
+            return 0
+        finally:
+            for guild_id, future in pending.items():
+                del self._loading[guild_id]
+                if not future.done():
+                    # Fall back to loading these one at a time
+                    future.set_result(None)
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import os
+import time
+from .metrics import counter
+
+# Verdict cache tunables (overridable from the environment)
+VERDICT_CACHE_TTL = float(os.getenv('VERDICT_CACHE_TTL', 600))
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv('VERDICT_CACHE_MAX_ENTRIES', 50000))
+
+VERDICT_CACHE_REQUESTS = counter('dsd_verdict_cache_requests_total', 'Verdict cache lookups', ['result'])
+
+
+class VerdictCache:
+    """Recent detection results per (guild, member), with TTL and LRU size bound.
+
+    Each entry stores the fingerprint of the inputs it was computed from
+    (names, avatar, status, the guild's protected identities, ...); a
+    lookup with a different fingerprint is a miss. Results of deep checks
+    also answer quick checks, but not the other way round.
+    """
+
+    def __init__(self, ttl: float = VERDICT_CACHE_TTL, max_entries: int = VERDICT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[int, int], Tuple[float, Hashable, bool, object]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, guild_id: int, member_id: int, fingerprint: Hashable, deep: bool = True) -> Optional[object]:
+        """Get the cached result for a member if their profile is unchanged."""
+        key = (guild_id, member_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, cached_fingerprint, cached_deep, result = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+            elif cached_fingerprint == fingerprint and (cached_deep or not deep):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                VERDICT_CACHE_REQUESTS.inc('hit')
+                return result
+        self.misses += 1
+        VERDICT_CACHE_REQUESTS.inc('miss')
+        return None
+
+    def put(self, guild_id: int, member_id: int, fingerprint: Hashable, result: object, deep: bool = True) -> None:
+        """Cache a member's result, evicting the least recently used ones past the size bound."""
+        key = (guild_id, member_id)
+        self._entries[key] = (time.monotonic() + self.ttl, fingerprint, deep, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, guild_id: int, member_id: int) -> None:
+        self._entries.pop((guild_id, member_id), None)
+
+    def clear_guild(self, guild_id: int) -> None:
+        for key in [key for key in self._entries if key[0] == guild_id]:
+            del self._entries[key]
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger('dsd_bot.write_behind')
+
+
+class WriteBehindQueue:
+    """Queue of pending writes that are flushed to the database in bulk.
+
+    Records are written by a single background task once max_batch records
+    are waiting or max_delay seconds after the first one arrived, whichever
+    comes first. Each submit returns a future for that record's result
+    (e.g. its row id). When max_pending records are queued, submit waits
+    for a flush to free space. A failed batch is retried one record at a
+    time so a single bad row does not lose the rest.
+    """
+
+    def __init__(self, name: str, flush: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+                 max_batch: int = 200, max_delay: float = 0.25, max_pending: int = 5000):
+        self.name = name
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._space = asyncio.Semaphore(max_pending)
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, record: Any) -> asyncio.Future:
+        """Queue a record, waiting for space if the queue is full."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} write queue is closed")
+        await self._space.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return future
+
+    async def write(self, record: Any) -> Any:
+        """Queue a record and wait until it has been written."""
+        return await (await self.submit(record))
+
+    async def _run(self) -> None:
+        """Flush batches until the queue is closed and drained."""
+        while True:
+            await self._has_items.wait()
+            if not self._full.is_set() and not self._closed:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_batch()
+            if self._closed and not self._pending:
+                return
+
+    async def _flush_batch(self) -> None:
+        """Write up to max_batch pending records."""
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        if len(self._pending) < self.max_batch:
+            self._full.clear()
+        if not self._pending:
+            self._has_items.clear()
+        if not batch:
+            return
+
+        try:
+            results = await self._write([record for record, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.written += len(batch)
+            self.batches += 1
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+                self._space.release()
+
+    async def _write(self, records: List[Any]) -> Sequence[Any]:
+        """Write records in one call, falling back to one call per record on error."""
+        try:
+            return await self._flush(records)
+        except Exception as e:
+            if len(records) == 1:
+                logger.error(f"Error writing {self.name} record: {e}")
+                return [None]
+            logger.warning(f"Error writing {self.name} batch of {len(records)}, retrying individually: {e}")
+        results = []
+        for record in records:
+            results.extend(await self._write([record]))
+        return results
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+        while self._pending:
+            await self._flush_batch()
+
+    async def close(self) -> None:
+        """Stop accepting records and write everything still queued."""
+        self._closed = True
+        self._has_items.set()
+        self._full.set()
+        if self._worker is not None and not self._worker.done():
+            await self._worker
+        await self.flush()
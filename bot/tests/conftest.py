@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run against the in-process SQLite stand-in; must be set before utils.db is imported
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
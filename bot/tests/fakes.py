@@ -0,0 +1,88 @@
+"""Minimal stand-ins for the discord.py objects the bot reads."""
+import datetime
+from types import SimpleNamespace
+from utils.protected import STAFF_PERMISSIONS
+
+
+class Role:
+    def __init__(self, role_id: int, name: str, default: bool = False, **permissions):
+        self.id = role_id
+        self.name = name
+        self.permissions = SimpleNamespace(**{**dict.fromkeys(STAFF_PERMISSIONS, False), **permissions})
+        self._default = default
+
+    def is_default(self) -> bool:
+        return self._default
+
+    def __eq__(self, other):
+        return isinstance(other, Role) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class Asset:
+    def __init__(self, key: str):
+        self.key = key
+
+
+class Guild:
+    def __init__(self, guild_id: int = 1):
+        self.id = guild_id
+        self.default_role = Role(guild_id, '@everyone', default=True)
+        self.members = []
+        self.owner = None
+        self.owner_id = None
+
+    def get_member(self, member_id: int):
+        return next((member for member in self.members if member.id == member_id), None)
+
+    def add(self, member_id: int, name: str, roles=(), owner: bool = False, **attributes) -> 'Member':
+        member = Member(member_id, name, self, roles, **attributes)
+        self.members.append(member)
+        if owner:
+            self.owner, self.owner_id = member, member_id
+        return member
+
+
+class Member:
+    def __init__(self, member_id: int, name: str, guild: Guild, roles=(), nick: str = None,
+                 global_name: str = None, age_days: int = 365, bot: bool = False):
+        self.id = member_id
+        self.name = name
+        self.nick = nick
+        self.global_name = global_name
+        self.guild = guild
+        self.bot = bot
+        self.roles = [guild.default_role, *roles]
+        self.activities = []
+        self.avatar = Asset(f'avatar{member_id}')
+        self.guild_avatar = None
+        self.created_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=age_days)
+
+    @property
+    def display_avatar(self) -> Asset:
+        return self.guild_avatar or self.avatar
+
+    @property
+    def display_name(self) -> str:
+        return self.nick or self.global_name or self.name
+
+
+def detection_cog(guild: Guild, fingerprints: dict):
+    """A Detection cog for one guild, with avatars fingerprinted from `fingerprints` by asset key."""
+    from cogs.detection import Detection
+    from utils.server_config import ServerConfig, ServerConfigCache
+
+    configs = ServerConfigCache()
+    configs.put(ServerConfig(str(guild.id)))
+    cog = Detection(SimpleNamespace(server_configs=configs))
+    cog.known_scammers.load([])  # No stored scammers; skips the database
+    cog.avatar_requests = []
+
+    async def fingerprint_avatar(asset):
+        cog.avatar_requests.append(asset.key)
+        return fingerprints.get(asset.key)
+
+    cog.fingerprint_avatar = fingerprint_avatar
+    return cog
@@ -0,0 +1,62 @@
+from utils.confusables import (build_skeleton_table, combine_confusables, load_confusables, load_skeleton_table,
+                               save_skeleton_table, skeleton)
+
+
+def test_lookalikes_fold_to_ascii():
+    assert skeleton('Ηοbο') == 'hobo'  # Greek
+    assert skeleton('раураl') == 'paypal'  # Cyrillic
+    assert skeleton('Ꭺdmin') == 'admin'  # Cherokee
+    assert skeleton('𝓗𝓸𝓫𝓸') == 'hobo'  # Mathematical script
+
+
+def test_unicode_confusables_data_is_shipped():
+    assert skeleton('ⲟⲣⲉn') == 'open'  # Coptic, with ⲉ sharing a prototype with Cyrillic є
+    assert skeleton('ꓓiscord') == 'discord'  # Lisu
+    assert skeleton('ΙΝΙΤΙΑL') == 'initial'  # Capitals that look like I fold to i, not l
+
+
+def test_width_case_and_accents_are_folded():
+    assert skeleton('ＦＲＥＥ ＮＩＴＲＯ') == 'free nitro'
+    assert skeleton('Ådmïn') == 'admin'
+
+
+def test_invisible_characters_are_removed():
+    assert skeleton('mo​d') == 'mod'
+    assert skeleton('a‍b﻿c') == 'abc'
+
+
+def test_plain_ascii_is_only_lowercased():
+    assert skeleton('Hello World 123!') == 'hello world 123!'
+
+
+def test_confusables_file_is_loaded(tmp_path):
+    data = tmp_path / 'confusables.txt'
+    data.write_text(
+        '# comment\n'
+        '2C9F ;\t006F ;\tMA\t# Ⲟ → o\n'
+        '0030 ;\t004F ;\tMA\t# ASCII sources are skipped\n'
+        '0041 0042 ;\t0078 ;\tMA\t# multi-character sources are skipped\n',
+        encoding='utf-8'
+    )
+    confusables = load_confusables(str(data))
+    assert confusables == {'ⲟ': 'o'}
+    assert 'zⲟz'.translate(build_skeleton_table(confusables)) == 'zoz'
+
+
+def test_built_in_lookalikes_take_precedence():
+    combined = combine_confusables({
+        'є': 'ꞓ',  # Built in as e
+        'ⲉ': 'ꞓ',  # Same prototype as є
+        'Ｉ': 'l',  # Already folds to i
+        'ⲟ': 'o',
+    })
+    assert combined['є'] == combined['ⲉ'] == 'e'
+    assert combined['ⲟ'] == 'o'
+    assert 'Ｉ' not in combined
+
+
+def test_skeleton_table_round_trips(tmp_path):
+    table = {ord('ⲟ'): 'o', ord('Ａ'): 'a', 0x200b: None}
+    path = tmp_path / 'skeleton_table.json'
+    save_skeleton_table(str(path), table, 'test')
+    assert load_skeleton_table(str(path)) == table
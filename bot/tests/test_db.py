@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+from sqlalchemy import select, text
+from utils import db
+from utils.fingerprint import fingerprint_from_hex
+from utils.schema import detection_events, scammer_profiles
+
+
+def run_db(scenario):
+    """Run a scenario against a fresh in-memory database."""
+    async def wrapper():
+        await db.init_db()
+        try:
+            return await scenario()
+        finally:
+            await db.engine.dispose()  # Drops the in-memory database
+    return asyncio.run(wrapper())
+
+
+def scammer(discord_id: str, score: float = 0.9, **fields) -> dict:
+    record = {
+        'discord_id': discord_id,
+        'username': f'user{discord_id}',
+        'detection_score': score,
+        'detection_reasons': ['reason'],
+        'avatar_hash': None,
+        'avatar_ahash': None,
+        'avatar_phash': None,
+        'avatar_dhash': None,
+        'profile_data': None,
+        'first_detected': datetime.utcnow(),
+        'last_updated': datetime.utcnow()
+    }
+    record.update(fields)
+    return record
+
+
+async def fetch_scammers():
+    async with db.get_db() as session:
+        rows = (await session.execute(select(scammer_profiles))).fetchall()
+    return {row.discord_id: row for row in rows}
+
+
+def test_scammer_upsert_returns_ids_in_record_order():
+    async def scenario():
+        ids = await db._write_scammers([scammer('3'), scammer('1'), scammer('2')])
+        rows = await fetch_scammers()
+        assert ids == [rows['3'].id, rows['1'].id, rows['2'].id]
+
+        # Duplicates in one batch are written once, latest record winning
+        again = await db._write_scammers([scammer('1', 0.5), scammer('4'), scammer('1', 0.7)])
+        rows = await fetch_scammers()
+        assert again == [rows['1'].id, rows['4'].id, rows['1'].id]
+        assert rows['1'].detection_score == 0.7
+        assert len(rows) == 4
+    run_db(scenario)
+
+
+def test_scammer_upsert_keeps_avatar_hashes_without_fingerprint():
+    async def scenario():
+        fingerprint = fingerprint_from_hex('a' * 16, 'b' * 16, 'c' * 16)
+        await db._write_scammers([scammer('1', avatar_hash='key', avatar_ahash='a' * 16,
+                                          avatar_phash='b' * 16, avatar_dhash='c' * 16)])
+        await db._write_scammers([scammer('1', 0.5)])
+
+        row = (await fetch_scammers())['1']
+        assert (row.avatar_hash, row.avatar_phash, row.detection_score) == ('key', 'b' * 16, 0.5)
+        assert await db.load_scammer_avatar_hashes() == [('1', fingerprint)]
+    run_db(scenario)
+
+
+def test_empty_profile_data_is_stored_as_null():
+    async def scenario():
+        await db._write_scammers([scammer('1', profile_data=None)])
+        async with db.get_db() as session:
+            stored = (await session.execute(text("SELECT typeof(profile_data) FROM scammer_profiles"))).scalar()
+        assert stored == 'null'
+    run_db(scenario)
+
+
+def test_bulk_insert_returns_ids_in_record_order():
+    async def scenario():
+        records = [
+            {'scammer_id': 1, 'guild_id': str(guild_id), 'similarity_score': 0.9,
+             'matched_features': [], 'detected_at': datetime.utcnow()}
+            for guild_id in (30, 10, 20)
+        ]
+        ids = await db._write_detections(records)
+        async with db.get_db() as session:
+            rows = (await session.execute(select(detection_events))).fetchall()
+        guilds = {row.id: row.guild_id for row in rows}
+        assert [guilds[event_id] for event_id in ids] == ['30', '10', '20']
+    run_db(scenario)
+
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+from utils.detection_engine import (COST_CHEAP, COST_IO, STAGE_TIMEOUTS, DetectionContext, DetectionEngine,
+                                    ProfileSnapshot, Rule, run_stage)
+from utils.name_index import ProtectedNameIndex
+from utils.patterns import PatternMatcher
+
+
+def test_stage_result_and_latency_are_recorded():
+    async def scenario():
+        async def lookup():
+            return 'found'
+
+        timings, failed = {}, set()
+        assert await run_stage('lookup', lookup(), timings, 1.0, failed) == 'found'
+        assert 'lookup' in timings and not failed
+    asyncio.run(scenario())
+
+
+def test_slow_stage_times_out_but_still_finishes():
+    async def scenario():
+        finished = asyncio.Event()
+
+        async def download():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return b'avatar'
+
+        timings, failed = {}, set()
+        assert await run_stage('member_avatar', download(), timings, 0.01, failed) is None
+        assert failed == {'member_avatar'}
+        assert timings['member_avatar'] < 50
+        # Shielded, so the download still lands in the caches for the next check
+        await asyncio.wait_for(finished.wait(), 1)
+    asyncio.run(scenario())
+
+
+def test_failed_stage_yields_none():
+    async def scenario():
+        async def lookup():
+            raise ConnectionError('database is down')
+
+        failed = set()
+        assert await run_stage('existing_scammer', lookup(), {}, 1.0, failed) is None
+        assert failed == {'existing_scammer'}
+    asyncio.run(scenario())
+
+
+def snapshot(name: str = 'SomeoneNice', age_days: int = 365, **fields) -> ProfileSnapshot:
+    created_at = datetime.now(timezone.utc) - timedelta(days=age_days)
+    return ProfileSnapshot(id=1, name=name, nick=None, global_name=None, created_at=created_at,
+                           avatar_key='avatar1', **fields)
+
+
+def context(**fields) -> DetectionContext:
+    return DetectionContext(
+        guild_id=1,
+        protected_names=ProtectedNameIndex([(10, 'HoboStank')]),
+        matcher=PatternMatcher(['free nitro']),
+        describe_protected=lambda member_id: 'server owner',
+        **fields
+    )
+
+
+def evaluate(profile, ctx, **options):
+    return asyncio.run(DetectionEngine().evaluate(profile, ctx, **options))
+
+
+def test_rules_combine_in_registration_order():
+    result = evaluate(snapshot('H0boStank', age_days=2, statuses=('free nitro',)), context())
+    assert [factor.split(' ')[0] for factor in result.factors] == ['New', 'Username', 'Suspicious']
+    assert result.risk_level == 2 + 3 + 1 + 2  # Age, name, one phrase, combination bonus
+    assert set(result.parts) == {'existing', 'age', 'names', 'avatar', 'text', 'patterns'}
+    assert not result.failed
+
+
+def test_clean_profile_has_no_risk():
+    result = evaluate(snapshot(), context())
+    assert result.factors == [] and result.risk_level == 0
+
+
+def test_enabled_checks_turn_rules_off():
+    result = evaluate(snapshot('H0boStank', age_days=2), context(), enabled_checks=['avatar'])
+    assert result.factors == []
+    assert set(result.parts) == {'existing', 'avatar', 'patterns'}
+
+
+def test_quick_checks_skip_avatar_analysis():
+    async def fingerprint():
+        raise AssertionError('quick checks should not analyse avatars')
+
+    result = evaluate(snapshot(), context(avatar_fingerprint=fingerprint), max_cost=COST_IO)
+    assert 'avatar' not in result.parts and not result.failed
+
+
+def test_lookups_run_concurrently():
+    async def scenario():
+        avatar_started = asyncio.Event()
+
+        async def lookup_scammer():
+            # Only finishes if the avatar rule is already running
+            await asyncio.wait_for(avatar_started.wait(), 1)
+            return {'detection_score': 0.9}
+
+        async def avatar_fingerprint():
+            avatar_started.set()
+            return None
+
+        ctx = context(lookup_scammer=lookup_scammer, avatar_fingerprint=avatar_fingerprint)
+        return await DetectionEngine().evaluate(snapshot(), ctx)
+
+    result = asyncio.run(scenario())
+    assert result.factors == ['Previously detected as scammer with score: 90.0%']
+    assert result.failed == ('member_avatar',)  # No fingerprint; the result is partial
+
+
+def test_slow_lookup_is_skipped(monkeypatch):
+    monkeypatch.setitem(STAGE_TIMEOUTS, 'existing_scammer', 0.01)
+
+    async def lookup_scammer():
+        await asyncio.sleep(1)
+
+    result = evaluate(snapshot(age_days=2), context(lookup_scammer=lookup_scammer))
+    assert result.factors == ['New account (2 days old)']
+    assert result.failed == ('existing_scammer',)
+
+
+def test_failing_rule_does_not_stop_the_others():
+    async def broken(evaluation):
+        raise ValueError('broken rule')
+
+    engine = DetectionEngine()
+    engine.register(Rule('names', broken))
+    result = asyncio.run(engine.evaluate(snapshot('H0boStank', age_days=2), context()))
+    assert result.factors == ['New account (2 days old)']
+    assert result.failed == ('names',)
+
+
+def test_custom_rules_can_be_registered():
+    async def vanity(evaluation):
+        return (["Vanity name"], 4) if evaluation.profile.name.startswith('VIP') else ([], 0)
+
+    engine = DetectionEngine()
+    engine.register(Rule('vanity', vanity, COST_CHEAP))
+    engine.unregister('age')
+    result = asyncio.run(engine.evaluate(snapshot('VIP Member', age_days=2), context()))
+    assert result.factors == ['Vanity name'] and result.risk_level == 4
+
+
+def test_reuse_reruns_only_the_named_rules():
+    calls = []
+
+    async def counted(evaluation):
+        calls.append(evaluation.profile.name)
+        return [], 0
+
+    engine = DetectionEngine()
+    engine.register(Rule('age', counted, COST_CHEAP, 'profile'))
+    previous = asyncio.run(engine.evaluate(snapshot('SomeoneNice'), context()))
+    renamed = asyncio.run(engine.evaluate(snapshot('H0boStank'), context(), reuse=previous, rerun={'names'}))
+    assert calls == ['SomeoneNice']  # Age was reused
+    assert renamed.factors[0].startswith('Username similar to server owner')
+    assert renamed.parts['age'] is previous.parts['age']
+
+
+def test_only_runs_just_the_named_rules():
+    result = evaluate(snapshot('H0boStank', age_days=2, statuses=('free nitro',)), context(), only={'names'})
+    assert set(result.parts) == {'names'}
+    assert result.risk_level == 3
@@ -0,0 +1,66 @@
+import random
+import pytest
+from utils.fingerprint import AvatarFingerprint, compare_fingerprints
+from utils.fingerprint_matrix import FingerprintMatrix
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def random_colors(rng: random.Random, base=None):
+    colors = []
+    for _ in range(rng.randint(0, 3)):
+        if base and rng.random() < 0.8:
+            rgb = tuple(max(0, min(255, c + rng.randint(-25, 25))) for c in rng.choice(base)[1])
+        else:
+            rgb = tuple(rng.randrange(256) for _ in range(3))
+        colors.append((rng.randint(1, 2500), rgb))
+    return tuple(colors)
+
+
+def near(fingerprint: AvatarFingerprint, rng: random.Random) -> AvatarFingerprint:
+    """A lightly edited copy of a fingerprint."""
+    return AvatarFingerprint(
+        *(flip_bits(value, rng.randint(0, 20), rng) for value in fingerprint[:3]),
+        random_colors(rng, fingerprint.colors)
+    )
+
+
+def test_compare_matches_pairwise_comparison():
+    rng = random.Random(3)
+    bases = [AvatarFingerprint(*(rng.getrandbits(64) for _ in range(3)), random_colors(rng)) for _ in range(10)]
+    targets = [(n, near(rng.choice(bases), rng)) for n in range(300)]
+    matrix = FingerprintMatrix(targets)
+
+    for _ in range(50):
+        query = near(rng.choice(bases), rng)
+        expected = {}
+        for key, fingerprint in targets:
+            score, reasons = compare_fingerprints(query, fingerprint)
+            if score > 0.7:
+                expected[key] = (score, reasons)
+
+        found = matrix.compare(query, limit=len(targets))
+        assert {key: (pytest.approx(score), reasons) for key, score, reasons in found} == expected
+        assert [score for _, score, _ in found] == sorted((score for _, score, _ in found), reverse=True)
+
+
+def test_limit_keeps_the_best_matches():
+    base = AvatarFingerprint(0, 0, 0, ((10, (200, 10, 10)),))
+    matrix = FingerprintMatrix([
+        ('far', AvatarFingerprint(2 ** 64 - 1, 2 ** 64 - 1, 2 ** 64 - 1, ())),
+        ('close', AvatarFingerprint(0b1, 0b1, 0b1, ())),
+        ('same', base),
+    ])
+    assert [key for key, _, _ in matrix.compare(base, limit=1)] == ['same']
+    assert [key for key, _, _ in matrix.compare(base)] == ['same', 'close']
+
+
+def test_missing_fingerprints_are_skipped():
+    matrix = FingerprintMatrix([('none', None), ('a', AvatarFingerprint(1, 2, 3, ()))])
+    assert len(matrix) == 1 and 'a' in matrix and 'none' not in matrix
+    assert matrix.compare(None) == []
+    assert FingerprintMatrix([]).compare(AvatarFingerprint(1, 2, 3, ())) == []
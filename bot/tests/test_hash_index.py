@@ -0,0 +1,45 @@
+import random
+from utils.fingerprint import hamming
+from utils.hash_index import MultiIndexHashTable
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+def test_radius_search_matches_brute_force():
+    rng = random.Random(7)
+    table = MultiIndexHashTable(radius=12)
+    stored = {}
+    bases = [rng.getrandbits(64) for _ in range(50)]
+    for n in range(2000):
+        # Clusters of near-duplicates plus unrelated hashes
+        value = flip_bits(rng.choice(bases), rng.randint(0, 20), rng) if n % 2 else rng.getrandbits(64)
+        stored.setdefault(value, set()).add(str(n))
+        table.add(value, str(n))
+
+    for _ in range(100):
+        query = flip_bits(rng.choice(bases), rng.randint(0, 8), rng)
+        expected = sorted((hamming(query, value), value) for value in stored if hamming(query, value) <= 12)
+        found = sorted((distance, value) for distance, value, _ in table.search(query))
+        assert found == expected
+
+
+def test_search_radius_can_be_narrowed():
+    table = MultiIndexHashTable(radius=12)
+    table.add(0, 'exact')
+    table.add(0b111, 'three bits')
+    assert {value for _, value, _ in table.search(0, radius=2)} == {0}
+    assert {value for _, value, _ in table.search(0)} == {0, 0b111}
+
+
+def test_discard_drops_unused_hashes():
+    table = MultiIndexHashTable(radius=12)
+    table.add(42, 'a')
+    table.add(42, 'b')
+    table.discard(42, 'a')
+    assert table.search(42) == [(0, 42, {'b'})]
+    table.discard(42, 'b')
+    assert table.search(42) == []
@@ -0,0 +1,93 @@
+import asyncio
+import random
+import string
+from fakes import Guild
+from utils.member_index import MemberNameIndex
+
+
+def members():
+    guild = Guild()
+    guild.add(1, 'alice')
+    guild.add(2, 'alicia', nick='Ally')
+    guild.add(3, 'bob', global_name='Robert')
+    guild.add(4, 'Ηοbο')  # Greek lookalikes
+    guild.add(5, 'alice_fan')
+    return guild
+
+
+def assert_consistent(index: MemberNameIndex):
+    assert index._sorted == sorted(index._key_ids)
+
+
+def test_exact_then_prefix_then_fuzzy():
+    index = MemberNameIndex(members().members)
+    assert index.find('alice') == [1, 5, 2]  # Exact, then prefix, then fuzzy
+    assert index.find('alice', limit=2) == [1, 5]
+    assert index.find('ALLY') == [2]
+    assert index.find('robert') == [3]
+    assert index.find('hobo') == [4]
+    assert index.find('alise')[0] == 1  # Fuzzy only
+    assert index.find('') == []
+
+
+def test_find_exact_ignores_case_and_lookalikes():
+    index = MemberNameIndex(members().members)
+    assert index.find_exact('Alice') == [1]
+    assert index.find_exact('HOBO') == [4]
+    assert index.find_exact('ali') == []
+
+
+def test_updates_and_removals_keep_the_index_consistent():
+    guild = members()
+    index = MemberNameIndex(guild.members)
+    index.find('fuzzy')  # Builds the q-gram postings
+
+    alice = guild.get_member(1)
+    alice.nick = 'Wonderland'
+    index.update(alice)
+    assert index.find_exact('wonderland') == [1]
+    index.remove(5)
+    assert index.find('alice') == [1, 2]
+    assert 5 not in index and len(index) == 4
+    assert_consistent(index)
+
+
+def test_compaction_keeps_fuzzy_search_working():
+    guild = Guild()
+    rng = random.Random(1)
+    for member_id in range(3000):
+        guild.add(member_id, ''.join(rng.choices(string.ascii_lowercase, k=8)))
+    index = MemberNameIndex(guild.members)
+    index.find('zzzzzzzz')
+    for member_id in range(2500):
+        index.remove(member_id)
+    assert index._dead < 1000  # Postings were rebuilt
+    survivor = guild.get_member(2999)
+    assert index.find(survivor.name[:-1] + '#')[0] == 2999
+    assert_consistent(index)
+
+
+def test_load_yields_and_accepts_updates_meanwhile():
+    async def scenario():
+        guild = Guild()
+        for member_id in range(2000):
+            guild.add(member_id, f'member{member_id:04d}')
+        left = {7, 1500}
+        index = MemberNameIndex()
+        loading = asyncio.ensure_future(
+            index.load(list(guild.members), lambda member_id: member_id not in left, chunk_size=100))
+        await asyncio.sleep(0)  # First chunk indexed; the load is waiting to continue
+        assert not loading.done()
+
+        renamed = guild.get_member(3)
+        renamed.nick = 'Renamed'
+        index.update(renamed)
+        index.remove(4)
+        await loading
+
+        assert len(index) == 2000 - len(left) - 1
+        assert index.find_exact('renamed') == [3]
+        assert index.find_exact('member1500') == []
+        assert index.find('member19') == [1900, 1901, 1902, 1903, 1904]
+        assert_consistent(index)
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+from utils.name_index import ProtectedNameIndex
+from utils.names import name_variants, score_variants
+
+PROTECTED = [
+    (1, 'HoboStank'), (1, 'Hobo'), (2, 'ModAlice'), (3, 'Al'), (4, 'x'),
+    (5, 'Support Team'), (6, 'Ｄｉｓｃｏｒｄ'), (7, 'bigboss99')
+]
+QUERIES = [
+    'HoboStank', 'H0b0Stank', 'Ηοbο_stank', 'hobostankk', 'mod alice', 'M0dAIice', 'al', 'xal', 'x',
+    'Official Support Team', 'discord', 'Dіscord Mod', 'bigboss', 'b1gb0ss99', 'Completely Different', ''
+]
+
+
+def brute_force(name: str, threshold: float = 0.7):
+    """Score every protected name, keeping each member's best match."""
+    best = {}
+    for member_id, protected in PROTECTED:
+        score, reasons = score_variants(name_variants(name), name_variants(protected))
+        if score > threshold and score > best.get(member_id, (0.0,))[0]:
+            best[member_id] = (score, reasons)
+    return best
+
+
+def test_match_agrees_with_scoring_every_name():
+    index = ProtectedNameIndex(PROTECTED)
+    for query in QUERIES:
+        found = index.match(query)
+        assert {member_id: (score, reasons) for member_id, score, reasons in found} == brute_force(query), query
+        assert [score for _, score, _ in found] == sorted((score for _, score, _ in found), reverse=True)
+
+
+def test_membership_and_empty_names():
+    index = ProtectedNameIndex([(1, 'Owner'), (2, None), (3, '')])
+    assert len(index) == 1
+    assert 1 in index and 2 not in index
+    assert index.match('') == []
+    assert ProtectedNameIndex().match('Owner') == []
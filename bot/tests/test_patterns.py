@@ -0,0 +1,41 @@
+from utils.patterns import PatternMatcher, PatternRegistry
+
+
+def test_finds_overlapping_patterns():
+    matcher = PatternMatcher(['he', 'she', 'his', 'hers'])
+    assert matcher.find('ushers') == ['he', 'she', 'hers']
+    assert matcher.find('nothing here') == ['he']
+    assert matcher.find('') == []
+
+
+def test_matches_normalized_text():
+    matcher = PatternMatcher(['free nitro', 'discord staff'])
+    assert matcher.find('ＦＲＥＥ ＮＩＴＲＯ for everyone') == ['free nitro']
+    assert matcher.find('Dіscord Ѕtaff here') == ['discord staff']  # Cyrillic lookalikes
+    assert matcher.find('free nit ro') == []
+
+
+def test_duplicate_patterns_are_compiled_once():
+    matcher = PatternMatcher(['Free Nitro', 'free nitro', ''])
+    assert matcher.patterns == ['Free Nitro']
+
+
+def test_registry_combines_and_reuses_guild_matchers():
+    registry = PatternRegistry(['free nitro'])
+    assert registry.matcher_for('1') is registry.global_matcher
+
+    matcher = registry.matcher_for('1', ['crypto airdrop'])
+    assert matcher.find('free nitro and a crypto airdrop') == ['free nitro', 'crypto airdrop']
+    assert registry.matcher_for('1', ['crypto airdrop']) is matcher
+    assert registry.matcher_for('2').find('crypto airdrop') == []
+
+    registry.forget('1')
+    assert registry.matcher_for('1', ['crypto airdrop']) is not matcher
+
+
+def test_new_global_patterns_rebuild_guild_matchers():
+    registry = PatternRegistry(['free nitro'])
+    registry.matcher_for('1', ['crypto airdrop'])
+    registry.set_global_patterns(['steam gift'])
+    assert registry.matcher_for('1', ['crypto airdrop']).find('free nitro steam gift crypto airdrop') == [
+        'steam gift', 'crypto airdrop']
@@ -0,0 +1,58 @@
+from fakes import Guild, Role
+from utils.protected import StaffDirectory, has_staff_role
+
+
+def staff_guild():
+    guild = Guild()
+    moderator = Role(2, 'Moderator', manage_messages=True)
+    guild.add(10, 'Owner', owner=True)
+    guild.add(11, 'Alice', [moderator])
+    guild.add(12, 'Bob')
+    guild.add(13, 'ModBot', [moderator], bot=True)
+    return guild, moderator
+
+
+def test_staff_roles_exclude_bots_and_everyone():
+    guild, moderator = staff_guild()
+    assert [has_staff_role(member) for member in guild.members] == [False, True, False, False]
+    guild.default_role.permissions.administrator = True
+    assert has_staff_role(guild.get_member(12)) is False
+
+
+def test_members_lists_owner_then_staff():
+    guild, _ = staff_guild()
+    assert [member.id for member in StaffDirectory().members(guild)] == [10, 11]
+
+
+def test_role_changes_update_the_directory_without_rescanning():
+    guild, moderator = staff_guild()
+    directory = StaffDirectory()
+    directory.members(guild)
+
+    bob = guild.get_member(12)
+    bob.roles.append(moderator)
+    assert [member.id for member in directory.members(guild)] == [10, 11]  # Not rescanned
+    directory.update_member(bob)
+    assert [member.id for member in directory.members(guild)] == [10, 11, 12]
+
+    bob.roles.remove(moderator)
+    directory.update_member(bob)
+    directory.remove_member(guild.id, 11)
+    assert [member.id for member in directory.members(guild)] == [10]
+
+
+def test_forget_rescans_on_next_use():
+    guild, moderator = staff_guild()
+    directory = StaffDirectory()
+    directory.members(guild)
+    moderator.permissions.manage_messages = False
+    directory.forget(guild.id)
+    assert [member.id for member in directory.members(guild)] == [10]
+
+
+def test_members_that_left_are_skipped():
+    guild, _ = staff_guild()
+    directory = StaffDirectory()
+    directory.members(guild)
+    guild.members.remove(guild.get_member(11))
+    assert [member.id for member in directory.members(guild)] == [10]
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+import asyncio
+from fakes import Guild
+from cogs.detection import Detection
+from utils.raid import DeferredChecks, JoinQueue, RaidMonitor
+from utils.server_config import ServerConfig, ServerConfigCache
+
+
+def test_raid_mode_starts_at_the_threshold_and_cools_down():
+    raids = RaidMonitor()
+    assert not raids.record_join(1, threshold=3, window=10, cooldown=60, now=0)
+    assert not raids.record_join(1, threshold=3, window=10, cooldown=60, now=1)
+    assert raids.record_join(1, threshold=3, window=10, cooldown=60, now=2)
+    assert not raids.in_raid(2, now=2)  # Per guild
+    assert raids.in_raid(1, now=61)
+    assert not raids.in_raid(1, now=62)
+
+
+def test_joins_outside_the_window_do_not_count():
+    raids = RaidMonitor()
+    for now in (0, 6, 12, 18):
+        assert not raids.record_join(1, threshold=3, window=10, cooldown=60, now=now)
+    assert raids.join_rate(1) == 2
+
+
+def test_workers_bound_concurrent_checks():
+    async def scenario():
+        running, peak = 0, 0
+        done = []
+
+        async def handler(n):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if n == 3:
+                raise ValueError('bad join')  # Logged; the worker carries on
+            done.append(n)
+
+        queue = JoinQueue(handler, workers=2, maxsize=100)
+        for n in range(10):
+            assert queue.put_nowait(n)
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        assert peak == 2
+        assert sorted(done) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    asyncio.run(scenario())
+
+
+def test_put_nowait_refuses_when_full():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def handler(n):
+            await release.wait()
+
+        queue = JoinQueue(handler, workers=1, maxsize=2)
+        assert queue.put_nowait(1) and queue.put_nowait(2)
+        assert not queue.put_nowait(3)
+        release.set()
+        await asyncio.wait_for(queue._queue.join(), 1)
+        assert queue.put_nowait(4)
+        await queue.stop()
+    asyncio.run(scenario())
+
+
+def test_deferred_checks_keep_the_newest_members_per_guild():
+    deferred = DeferredChecks(max_per_guild=3)
+    for member_id in range(5):
+        deferred.add(1, member_id, member_id % 2)
+    deferred.add(2, 10, None)
+    deferred.discard(1, 3)
+    assert len(deferred) == 3
+    assert deferred.pop(1, 10) == [(2, 0), (4, 0)]
+    assert deferred.guilds() == [2]
+    assert deferred.pop(2, 1) == [(10, None)]
+    assert len(deferred) == 0
+
+
+def test_raid_joins_do_not_wait_for_a_full_queue(monkeypatch):
+    async def scenario():
+        guild = Guild()
+        config = ServerConfig(str(guild.id))
+        config.set('raid_join_threshold', 1)  # Every join is part of a raid
+        configs = ServerConfigCache()
+        configs.put(config)
+        cog = Detection(SimpleNamespace(server_configs=configs))
+
+        async def announce_raid(guild, config):
+            pass
+
+        release = asyncio.Event()
+        checked = []
+
+        async def process_join(member, deep=True, quick_risk=None, received=None):
+            await release.wait()
+            checked.append(member.id)
+
+        monkeypatch.setattr(cog, 'announce_raid', announce_raid)
+        cog.join_queue = JoinQueue(process_join, workers=1, maxsize=1)
+
+        for member_id in range(10, 15):
+            member = guild.add(member_id, f'raider{member_id}')
+            await asyncio.wait_for(cog.on_member_join(member), 1)
+
+        deferred = cog.deferred_checks.pop(guild.id, 10)
+        assert deferred and all(quick_risk is None for _, quick_risk in deferred)
+        release.set()
+        await asyncio.wait_for(cog.join_queue._queue.join(), 1)
+        await cog.join_queue.stop()
+        assert sorted(checked + [member_id for member_id, _ in deferred]) == [10, 11, 12, 13, 14]
+    asyncio.run(scenario())
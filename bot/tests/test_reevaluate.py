@@ -0,0 +1,90 @@
+import asyncio
+import copy
+from fakes import Guild, Role, detection_cog
+from utils.fingerprint import AvatarFingerprint
+
+OWNER_AVATAR = AvatarFingerprint(0, 0, 0, ())
+MEMBER_AVATAR = AvatarFingerprint(0x0123456789abcdef, 0x0f0f0f0f0f0f0f0f, 0x1122334455667788, ())
+
+
+def reporting_cog():
+    """A cog for a guild with one ordinary member, recording reports instead of sending them."""
+    guild = Guild()
+    owner_roles = [Role(2, 'Server Owner', administrator=True), Role(3, 'Community Manager')]
+    guild.add(1, 'HoboStank', owner_roles, owner=True)
+    member = guild.add(2, 'SomeoneNice')
+    cog = detection_cog(guild, {'avatar1': OWNER_AVATAR, 'avatar2': MEMBER_AVATAR})
+    cog.reports = []
+
+    async def report_join(reported, result):
+        cog.reports.append((reported.id, result))
+
+    cog.report_join = report_join
+    return cog, member
+
+
+def renamed(member, nick: str):
+    before = copy.copy(member)
+    member.nick = nick
+    return before
+
+
+def test_rename_to_a_staff_name_is_reported():
+    async def scenario():
+        cog, member = reporting_cog()
+        await cog.check_user(member)
+        requests = len(cog.avatar_requests)
+
+        await cog.on_member_update(renamed(member, 'H0boStank'), member)
+        assert [member_id for member_id, _ in cog.reports] == [2]
+        assert cog.reports[0][1].factors[0].startswith('Nickname similar to server owner')
+        assert len(cog.avatar_requests) == requests  # The avatar rule was reused
+    asyncio.run(scenario())
+
+
+def test_rename_that_adds_no_risk_is_not_reported():
+    async def scenario():
+        cog, member = reporting_cog()
+        await cog.check_user(member)
+        await cog.on_member_update(renamed(member, 'StillNice'), member)
+        assert cog.reports == []
+    asyncio.run(scenario())
+
+
+def test_role_changes_do_not_trigger_a_check():
+    async def scenario():
+        cog, member = reporting_cog()
+        await cog.check_user(member)
+        misses = cog.verdicts.misses
+
+        before = copy.copy(member)
+        member.roles = [*member.roles, Role(4, 'Server Owner')]
+        await cog.on_member_update(before, member)
+        assert cog.verdicts.misses == misses and cog.reports == []
+    asyncio.run(scenario())
+
+
+def test_without_a_baseline_only_the_detection_threshold_reports():
+    async def scenario():
+        cog, member = reporting_cog()
+        await cog.on_member_update(renamed(member, 'H0boStank'), member)
+        assert cog.reports == []  # Risk 2 is below the 0.7 default
+
+        cog, member = reporting_cog()
+        (await cog.get_server_config('1')).set('min_detection_score', 0.2)
+        await cog.on_member_update(renamed(member, 'H0boStank'), member)
+        assert [member_id for member_id, _ in cog.reports] == [2]
+    asyncio.run(scenario())
+
+
+def test_partial_checks_skip_the_verdict_cache():
+    async def scenario():
+        cog, member = reporting_cog()
+        member.nick = 'H0boStank'
+        full = await cog.check_user(member)
+        partial = await cog.check_user(member, only={'names'})
+        assert set(partial.parts) == {'names'} and set(full.parts) > {'names'}
+        assert cog.verdicts.hits == 0
+        assert (await cog.check_user(member)).parts == full.parts
+        assert cog.verdicts.hits == 1
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+import random
+from test_db import run_db, scammer
+from utils import db, scammer_set
+from utils.scammer_set import KnownScammerSet
+
+SNOWFLAKE = 1100000000000000000  # Discord IDs are 64-bit snowflakes
+
+
+def test_membership_matches_a_python_set(monkeypatch):
+    monkeypatch.setattr(scammer_set, 'MERGE_THRESHOLD', 16)
+    rng = random.Random(5)
+    loaded = {SNOWFLAKE + rng.randrange(10 ** 9) for _ in range(500)}
+    known = KnownScammerSet()
+    known.load((str(discord_id), None) for discord_id in loaded)
+    assert known.loaded
+
+    added = {SNOWFLAKE + rng.randrange(10 ** 9) for _ in range(100)}  # Crosses the merge threshold
+    for discord_id in added:
+        known.add(discord_id)
+    expected = loaded | added
+    assert len(known) == len(expected)
+    for discord_id in list(expected)[:200] + [SNOWFLAKE + rng.randrange(10 ** 9) for _ in range(200)]:
+        assert (discord_id in known) == (discord_id in expected)
+        assert (str(discord_id) in known) == (discord_id in expected)
+
+
+def test_update_counts_new_ids_and_tracks_the_newest_change():
+    start = datetime(2024, 1, 1)
+    known = KnownScammerSet()
+    known.load([(str(SNOWFLAKE), start), (str(SNOWFLAKE + 1), start + timedelta(hours=1))])
+    assert known.last_updated == start + timedelta(hours=1)
+
+    added = known.update([
+        (str(SNOWFLAKE + 1), start + timedelta(hours=2)),  # Updated profile, not new
+        (str(SNOWFLAKE + 2), start + timedelta(hours=3)),
+    ])
+    assert added == 1
+    assert known.last_updated == start + timedelta(hours=3)
+    assert SNOWFLAKE + 2 in known and len(known) == 3
+
+
+def test_load_replaces_earlier_contents():
+    known = KnownScammerSet()
+    known.add(SNOWFLAKE)
+    known.load([(str(SNOWFLAKE + 1), None)])
+    assert SNOWFLAKE not in known and SNOWFLAKE + 1 in known
+    assert known.last_updated is None
+
+
+def test_refresh_picks_up_profiles_changed_since_the_last_load():
+    async def scenario():
+        earlier = datetime.utcnow() - timedelta(minutes=5)
+        await db._write_scammers([scammer(str(SNOWFLAKE), last_updated=earlier)])
+        known = KnownScammerSet()
+        known.load(await db.load_known_scammer_ids())
+        assert known.last_updated == earlier
+
+        await db._write_scammers([scammer(str(SNOWFLAKE + 1))])
+        rows = await db.load_known_scammer_ids(since=known.last_updated)
+        assert known.update(rows) == 1
+        assert SNOWFLAKE + 1 in known
+    run_db(scenario)
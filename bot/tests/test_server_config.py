@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from utils import db
+from utils.server_config import ServerConfig, ServerConfigCache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace database loads with a counted, slightly slow stand-in."""
+    calls = []
+
+    async def load(self):
+        calls.append(self.guild_id)
+        await asyncio.sleep(0.01)
+        self._config = {**self.default_config, 'guild_id': self.guild_id}
+        return self._config
+
+    monkeypatch.setattr(ServerConfig, 'load', load)
+    return calls
+
+
+def test_concurrent_gets_share_one_load(loads):
+    async def scenario():
+        cache = ServerConfigCache()
+        configs = await asyncio.gather(*(cache.get('1') for _ in range(10)))
+        assert loads == ['1']
+        assert all(config is configs[0] for config in configs)
+        assert cache.misses == 10 and cache.hits == 0
+        await cache.get('1')
+        assert cache.hits == 1
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_reloaded(loads):
+    async def scenario():
+        cache = ServerConfigCache(ttl=0.05)
+        await cache.get('1')
+        assert '1' in cache
+        await asyncio.sleep(0.06)
+        assert '1' not in cache
+        await cache.get('1')
+        assert loads == ['1', '1']
+    asyncio.run(scenario())
+
+
+def test_least_recently_used_entries_are_evicted(loads):
+    async def scenario():
+        cache = ServerConfigCache(max_entries=2)
+        await cache.get('1')
+        await cache.get('2')
+        await cache.get('1')  # '2' is now the least recently used
+        await cache.get('3')
+        assert len(cache) == 2
+        assert '1' in cache and '3' in cache and '2' not in cache
+    asyncio.run(scenario())
+
+
+def test_failed_loads_are_retried_soon(monkeypatch):
+    async def failed_load(self):
+        return self.default_config  # What load() returns when the database is down
+
+    monkeypatch.setattr(ServerConfig, 'load', failed_load)
+    monkeypatch.setattr('utils.server_config.CONFIG_RETRY_TTL', 0.01)
+
+    async def scenario():
+        cache = ServerConfigCache(ttl=300)
+        config = await cache.get('1')
+        assert not config.loaded
+        await asyncio.sleep(0.02)
+        assert '1' not in cache
+    asyncio.run(scenario())
+
+
+def run_db(scenario):
+    """Run a scenario against a fresh in-memory database."""
+    async def wrapper():
+        await db.init_db()
+        try:
+            return await scenario()
+        finally:
+            await db.engine.dispose()  # Drops the in-memory database
+    return asyncio.run(wrapper())
+
+
+async def unexpected_load(self):
+    raise AssertionError('cached guilds should not be loaded again')
+
+
+def test_save_writes_through_to_the_cache(monkeypatch):
+    async def scenario():
+        cache = ServerConfigCache()
+        cached = await cache.get('1')
+        assert cached.loaded
+
+        # A config loaded elsewhere (e.g. by a command) replaces the cached one once saved
+        config = ServerConfig('1', cache=cache)
+        await config.load()
+        config.set('min_detection_score', 0.5)
+        config.set('custom_patterns', ['crypto airdrop'])
+        assert await config.save()
+
+        stored = ServerConfig('1')
+        await stored.load()
+        assert stored.get('min_detection_score') == 0.5
+        assert stored.get('custom_patterns') == ['crypto airdrop']
+
+        monkeypatch.setattr(ServerConfig, 'load', unexpected_load)
+        assert await cache.get('1') is config
+    run_db(scenario)
+
+
+def test_failed_save_invalidates_the_cache():
+    async def scenario():
+        cache = ServerConfigCache()
+        config = await cache.get('1')
+        async with db.engine.begin() as conn:
+            await conn.execute(text("DROP TABLE server_configs"))
+        config.set('min_detection_score', 0.5)
+        assert not await config.save()
+        assert '1' not in cache  # Reloaded from the database on next use
+    run_db(scenario)
+
+
+def test_preload_fills_the_cache_in_bulk(monkeypatch):
+    async def scenario():
+        cache = ServerConfigCache()
+        assert await cache.preload(['1', '2', '3']) == 3
+        monkeypatch.setattr(ServerConfig, 'load', unexpected_load)
+        config = await cache.get('2')
+        assert config.loaded and config.get('raid_join_threshold') == 10
+    run_db(scenario)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from fakes import Guild, Role, detection_cog
+from utils.fingerprint import AvatarFingerprint
+from utils.verdict_cache import VerdictCache
+
+
+def test_changed_fingerprints_miss():
+    cache = VerdictCache()
+    cache.put(1, 10, ('alice', 'avatar1'), 'verdict')
+    assert cache.get(1, 10, ('alice', 'avatar1')) == 'verdict'
+    assert cache.get(1, 10, ('alice', 'avatar2')) is None
+    assert cache.get(2, 10, ('alice', 'avatar1')) is None  # Per guild
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_deep_results_answer_quick_checks_but_not_the_reverse():
+    cache = VerdictCache()
+    cache.put(1, 10, 'fp', 'quick', deep=False)
+    assert cache.get(1, 10, 'fp', deep=True) is None
+    assert cache.get(1, 10, 'fp', deep=False) == 'quick'
+    cache.put(1, 10, 'fp', 'deep')
+    assert cache.get(1, 10, 'fp', deep=False) == 'deep'
+
+
+def test_entries_expire_and_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = VerdictCache(ttl=60, max_entries=2)
+    cache.put(1, 10, 'fp', 'a')
+    cache.put(1, 11, 'fp', 'b')
+    cache.get(1, 10, 'fp')  # 11 is now the least recently used
+    cache.put(1, 12, 'fp', 'c')
+    assert len(cache) == 2 and cache.get(1, 11, 'fp') is None
+
+    now[0] += 61
+    assert cache.get(1, 10, 'fp') is None
+    assert len(cache) == 1
+
+
+def test_discard_and_clear_guild():
+    cache = VerdictCache()
+    for guild_id, member_id in ((1, 10), (1, 11), (2, 10)):
+        cache.put(guild_id, member_id, 'fp', 'verdict')
+    cache.discard(1, 10)
+    cache.clear_guild(2)
+    assert len(cache) == 1 and cache.get(1, 11, 'fp') == 'verdict'
+
+
+OWNER_AVATAR = AvatarFingerprint(0, 0, 0, ())
+MEMBER_AVATAR = AvatarFingerprint(0x0123456789abcdef, 0x0f0f0f0f0f0f0f0f, 0x1122334455667788, ())
+
+
+def guild_with_member():
+    guild = Guild()
+    owner_roles = [Role(2, 'Server Owner', administrator=True), Role(3, 'Community Manager')]
+    guild.add(1, 'HoboStank', owner_roles, owner=True)
+    return guild, guild.add(2, 'SomeoneNice')
+
+
+def test_unchanged_members_are_answered_from_the_cache():
+    async def scenario():
+        guild, member = guild_with_member()
+        cog = detection_cog(guild, {'avatar1': OWNER_AVATAR, 'avatar2': MEMBER_AVATAR})
+
+        first = await cog.check_user(member)
+        second = await cog.check_user(member)
+        assert cog.verdicts.hits == 1
+        assert second.factors == first.factors and second.risk_level == first.risk_level
+        assert cog.avatar_requests.count('avatar2') == 1
+
+        member.nick = 'H0boStank'
+        renamed = await cog.check_user(member)
+        assert cog.verdicts.hits == 1
+        assert renamed.risk_level > first.risk_level
+    asyncio.run(scenario())
+
+
+def test_only_matching_scammer_avatars_invalidate_verdicts():
+    async def scenario():
+        guild, member = guild_with_member()
+        cog = detection_cog(guild, {'avatar1': OWNER_AVATAR, 'avatar2': MEMBER_AVATAR})
+        clean = await cog.check_user(member)
+        assert clean.risk_level == 0
+
+        # Flagged members elsewhere with other avatars leave the verdict alone
+        inverted = MEMBER_AVATAR.phash ^ (2 ** 64 - 1)
+        for n in range(20):
+            cog.scammer_avatars.add(str(100 + n), AvatarFingerprint(n, inverted ^ n, n, ()))
+        await cog.check_user(member)
+        assert cog.verdicts.hits == 1
+
+        cog.scammer_avatars.add('999', MEMBER_AVATAR._replace(phash=MEMBER_AVATAR.phash ^ 0b101))
+        flagged = await cog.check_user(member)
+        assert cog.verdicts.hits == 1
+        assert flagged.factors == ["Avatar matches a known scammer's avatar (user 999, 2 bits apart)"]
+    asyncio.run(scenario())
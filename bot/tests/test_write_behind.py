@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from utils.write_behind import WriteBehindQueue
+
+
+class Recorder:
+    """Flush function that records each batch and returns one result per record."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    async def __call__(self, records):
+        self.batches.append(list(records))
+        if self.fail_on in records:
+            raise ValueError('bad record')
+        return [record * 10 for record in records]
+
+
+def test_writes_arriving_together_are_coalesced():
+    async def scenario():
+        flush = Recorder()
+        queue = WriteBehindQueue('test', flush, max_batch=100, max_delay=0.05)
+        results = await asyncio.gather(*(queue.write(n) for n in range(5)))
+        assert results == [0, 10, 20, 30, 40]
+        assert flush.batches == [[0, 1, 2, 3, 4]]
+    asyncio.run(scenario())
+
+
+def test_full_batches_are_written_without_waiting():
+    async def scenario():
+        flush = Recorder()
+        queue = WriteBehindQueue('test', flush, max_batch=2, max_delay=60)
+        results = await asyncio.wait_for(asyncio.gather(*(queue.write(n) for n in range(4))), 1)
+        assert results == [0, 10, 20, 30]
+        assert flush.batches == [[0, 1], [2, 3]]
+    asyncio.run(scenario())
+
+
+def test_failed_batch_is_retried_one_record_at_a_time():
+    async def scenario():
+        flush = Recorder(fail_on=2)
+        queue = WriteBehindQueue('test', flush, max_batch=100, max_delay=0.01)
+        results = await asyncio.gather(*(queue.write(n) for n in range(4)))
+        assert results == [0, 10, None, 30]
+        assert flush.batches[0] == [0, 1, 2, 3]
+        assert flush.batches[1:] == [[0], [1], [2], [3]]
+    asyncio.run(scenario())
+
+
+def test_close_flushes_pending_records():
+    async def scenario():
+        flush = Recorder()
+        queue = WriteBehindQueue('test', flush, max_batch=100, max_delay=60)
+        futures = [await queue.submit(n) for n in range(3)]
+        await asyncio.wait_for(queue.close(), 1)
+        assert [future.result() for future in futures] == [0, 10, 20]
+        assert len(queue) == 0
+        with pytest.raises(RuntimeError):
+            await queue.submit(3)
+    asyncio.run(scenario())
+
+
+def test_submit_waits_while_the_queue_is_full():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_flush(records):
+            await release.wait()
+            return records
+
+        queue = WriteBehindQueue('test', slow_flush, max_batch=1, max_delay=0, max_pending=2)
+        await queue.submit(1)
+        await queue.submit(2)
+        blocked = asyncio.ensure_future(queue.submit(3))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        release.set()
+        await asyncio.wait_for(blocked, 1)
+        await queue.close()
+    asyncio.run(scenario())